@@ -0,0 +1,196 @@
+"""
+Fake Upstreams - Local stand-ins for every service RLM Core calls
+
+One FastAPI app that answers like:
+- OpenAI / OpenRouter: /v1/embeddings, /v1/chat/completions
+- Ollama: /api/generate (streaming and not), /api/embed, /api/embeddings
+- Supabase: /rest/v1/memory_antibodies (GET/POST), /rest/v1/rpc/*
+- The audit webhook: /api/hooks/audit-result
+
+Every route waits `latency` (+ uniform `jitter`) and fails with a 500 at
+`error_rate`, so the benchmarks measure RLM Core itself against a known,
+repeatable upstream. Embeddings are deterministic per text: the same text
+always maps to the same unit vector, so Vector-Skip and caches behave
+the same on every run.
+
+    python benchmarks/fakes.py --port 9911 --latency-ms 20 --error-rate 0.01
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+from datetime import datetime, timezone
+
+import numpy as np
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+class FakeConfig:
+    def __init__(
+        self,
+        latency: float = 0.02,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        token_interval: float = 0.005,
+        tokens: int = 32,
+        dimensions: int = 768,
+        seed: int = 0,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.token_interval = token_interval
+        self.tokens = tokens
+        self.dimensions = dimensions
+        self.random = random.Random(seed)
+
+
+def fake_vector(text: str, dimensions: int) -> list[float]:
+    seed = int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), "little")
+    vector = np.random.default_rng(seed).standard_normal(dimensions)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+def build_app(config: FakeConfig) -> FastAPI:
+    app = FastAPI(title="RLM Core fake upstreams")
+    calls: dict[str, int] = {}
+
+    async def upstream(name: str):
+        """Latency + error injection shared by every route. Returns an error response or None."""
+        calls[name] = calls.get(name, 0) + 1
+        delay = config.latency + config.random.uniform(0, config.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if config.error_rate and config.random.random() < config.error_rate:
+            return JSONResponse({"error": "injected failure"}, status_code=500)
+        return None
+
+    # --- OpenAI / OpenRouter ---
+    @app.post("/v1/embeddings")
+    async def openai_embeddings(request: Request):
+        body = await request.json()
+        if error := await upstream("openai_embeddings"):
+            return error
+        texts = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        return {
+            "data": [{"index": i, "embedding": fake_vector(t, config.dimensions)} for i, t in enumerate(texts)],
+            "model": body.get("model"),
+        }
+
+    @app.post("/v1/chat/completions")
+    async def openai_chat(request: Request):
+        await request.json()
+        if error := await upstream("openai_chat"):
+            return error
+        verdict = {"consistent": True, "confidence": 0.9, "reasoning": "Fake upstream verdict"}
+        return {"choices": [{"message": {"role": "assistant", "content": json.dumps(verdict)}}]}
+
+    # --- Ollama ---
+    @app.post("/api/generate")
+    async def ollama_generate(request: Request):
+        body = await request.json()
+        if error := await upstream("ollama_generate"):
+            return error
+        if body.get("stream", True):
+            async def tokens():
+                for i in range(config.tokens):
+                    if config.token_interval > 0:
+                        await asyncio.sleep(config.token_interval)
+                    yield json.dumps({"response": f"tok{i} ", "done": False}) + "\n"
+                yield json.dumps({"response": "", "done": True}) + "\n"
+            return StreamingResponse(tokens(), media_type="application/x-ndjson")
+        if body.get("format") == "json":
+            text = json.dumps({"consistent": True, "confidence": 0.8, "reasoning": "Fake upstream verdict"})
+        else:
+            text = "PASS"
+        return {"response": text, "done": True}
+
+    @app.post("/api/embed")
+    async def ollama_embed(request: Request):
+        body = await request.json()
+        if error := await upstream("ollama_embed"):
+            return error
+        texts = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        return {"embeddings": [fake_vector(t, config.dimensions) for t in texts]}
+
+    @app.post("/api/embeddings")
+    async def ollama_embeddings(request: Request):
+        body = await request.json()
+        if error := await upstream("ollama_embeddings"):
+            return error
+        return {"embedding": fake_vector(body["prompt"], config.dimensions)}
+
+    # --- Supabase ---
+    antibodies: list[dict] = []
+
+    @app.get("/rest/v1/memory_antibodies")
+    async def supabase_select(request: Request):
+        if error := await upstream("supabase_select"):
+            return error
+        since = request.query_params.get("created_at", "gte.")[4:]
+        limit = int(request.query_params.get("limit", 1000))
+        offset = int(request.query_params.get("offset", 0))
+        return [row for row in antibodies if row.get("created_at", "") >= since][offset:offset + limit]
+
+    @app.post("/rest/v1/memory_antibodies")
+    async def supabase_insert(request: Request):
+        rows = await request.json()
+        if error := await upstream("supabase_insert"):
+            return error
+        # created_at comes from the column default, like the real table
+        created_at = datetime.now(timezone.utc).isoformat(timespec="microseconds")
+        antibodies.extend({**row, "created_at": created_at} for row in (rows if isinstance(rows, list) else [rows]))
+        return JSONResponse(None, status_code=201)
+
+    @app.post("/rest/v1/rpc/{function}")
+    async def supabase_rpc(function: str, request: Request):
+        await request.json()
+        if error := await upstream(f"supabase_rpc_{function}"):
+            return error
+        return []
+
+    # --- Audit webhook ---
+    @app.post("/api/hooks/audit-result")
+    async def audit_webhook(request: Request):
+        await request.json()
+        if error := await upstream("audit_webhook"):
+            return error
+        return {"success": True}
+
+    @app.get("/calls")
+    async def call_counts():
+        return calls
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9911)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--token-interval-ms", type=float, default=5.0)
+    parser.add_argument("--tokens", type=int, default=32)
+    parser.add_argument("--dimensions", type=int, default=768)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    import uvicorn
+    config = FakeConfig(
+        latency=args.latency_ms / 1000,
+        jitter=args.jitter_ms / 1000,
+        error_rate=args.error_rate,
+        token_interval=args.token_interval_ms / 1000,
+        tokens=args.tokens,
+        dimensions=args.dimensions,
+        seed=args.seed,
+    )
+    uvicorn.run(build_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+"""
+RLM Core Benchmarks - Latency and throughput against local fake upstreams
+
+Starts benchmarks/fakes.py and RLM Core (uvicorn) as subprocesses, drives
+the HTTP API with a fixed request mix and reports p50/p95/p99 latency,
+throughput and error rate per scenario:
+- recycle: /recycle into the antibody write-behind (runs first, so the
+  verify scenarios also search a populated antibody index)
+- verify_cold: unique claims, full path (Vector-Skip miss, then the LLM)
+- verify_cached: one claim repeated (L1 verdict cache)
+- verify_vector_skip: claims identical to a PIN (no LLM call)
+- embed_batch: /embed with a batch of unique texts
+- bicameral_ttft: time to the first "A:" frame of /bicameral_stream, at
+  --stream-concurrency (default 1): under load it would mostly measure
+  the scheduler queue instead of the stream path
+
+Results are written as JSON. With --baseline the run is compared against a
+previous result and exits 1 when a scenario regressed by more than
+--tolerance (p95 latency up, or throughput down).
+
+    cd rlm-core
+    python benchmarks/run.py --baseline benchmarks/baseline.json
+    python benchmarks/run.py --write-baseline benchmarks/baseline.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+import httpx
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+BENCH_DIR = Path(__file__).resolve().parent
+
+# Regression checks: metric -> True when higher is better
+CHECKS = {"p95_ms": False, "throughput_rps": True}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def wait_ready(url: str, process: subprocess.Popen, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"{url} exited with code {process.returncode} before becoming ready")
+            try:
+                if (await client.get(url)).status_code < 500:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} not ready after {timeout}s")
+
+
+def start_fakes(args, port: int) -> subprocess.Popen:
+    return subprocess.Popen([
+        sys.executable, str(BENCH_DIR / "fakes.py"),
+        "--port", str(port),
+        "--latency-ms", str(args.latency_ms),
+        "--jitter-ms", str(args.jitter_ms),
+        "--error-rate", str(args.error_rate),
+        "--token-interval-ms", str(args.token_interval_ms),
+        "--seed", str(args.seed),
+    ])
+
+
+def start_service(args, port: int, fake_url: str, workdir: Path) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join(filter(None, [str(ROOT / "src"), os.environ.get("PYTHONPATH")])),
+        "OLLAMA_BASE_URL": fake_url,
+        "NEXT_PUBLIC_SUPABASE_URL": fake_url,
+        "SUPABASE_SERVICE_ROLE_KEY": "bench",
+        "AUDIT_WEBHOOK_URL": f"{fake_url}/api/hooks/audit-result",
+        # Antibodies go through the fake Supabase, never the local stand-in
+        "RLM_ANTIBODY_STORE": "supabase",
+        # Every run starts cold: no verdicts, antibodies or audits left from a previous one
+        "RLM_L2_CACHE_PATH": "off",
+        "RLM_ANTIBODY_SPILL_PATH": "off",
+        "RLM_AUDIT_QUEUE_PATH": "off",
+    }
+    env.pop("SUPABASE_JWT_SECRET", None)
+    if args.mode == "cloud":
+        env["OPENAI_API_KEY"] = "bench"
+        env["CLOUD_API_BASE_URL"] = f"{fake_url}/v1"
+    else:
+        env.pop("OPENAI_API_KEY", None)
+        env.pop("OPENROUTER_API_KEY", None)
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "rlm_core.main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--log-level", "warning"],
+        cwd=workdir, env=env,
+    )
+
+
+def summarize(latencies: list[float], errors: int, elapsed: float) -> dict:
+    values = np.array(latencies) * 1000 if latencies else np.zeros(1)
+    total = len(latencies) + errors
+    return {
+        "requests": total,
+        "errors": errors,
+        "error_rate": round(errors / total, 4) if total else 0.0,
+        "p50_ms": round(float(np.percentile(values, 50)), 3),
+        "p95_ms": round(float(np.percentile(values, 95)), 3),
+        "p99_ms": round(float(np.percentile(values, 99)), 3),
+        "mean_ms": round(float(values.mean()), 3),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+    }
+
+
+async def run_scenario(
+    request: Callable[[int], Awaitable[float]], requests: int, concurrency: int, warmup: int
+) -> dict:
+    """Runs `request(i)` (returns the latency to record) `requests` times, `concurrency` at a time."""
+    for i in range(warmup):
+        try:
+            await request(-1 - i)
+        except Exception:
+            pass
+
+    latencies: list[float] = []
+    errors = 0
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index, errors
+        while next_index < requests:
+            i = next_index
+            next_index += 1
+            try:
+                latencies.append(await request(i))
+            except Exception:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+def scenarios(client: httpx.AsyncClient, run_id: str, embed_batch: int) -> dict[str, Callable[[int], Awaitable[float]]]:
+    unrelated_pin = {"id": "pin-0", "content": "The deployment target is a single region."}
+
+    async def recycle(i: int) -> float:
+        body = {
+            "user_prompt": f"{run_id} prompt {i}",
+            "rejected_output": f"{run_id} sycophantic answer {i}",
+            "correction": "State the constraint instead of agreeing.",
+            "project_id": "bench-project",
+        }
+        started = time.perf_counter()
+        response = await client.post("/recycle", json=body)
+        response.raise_for_status()
+        return time.perf_counter() - started
+
+    async def post_verify(body: dict) -> float:
+        started = time.perf_counter()
+        response = await client.post("/verify", json=body)
+        response.raise_for_status()
+        return time.perf_counter() - started
+
+    async def verify_cold(i: int) -> float:
+        return await post_verify({"claim": f"{run_id} cold claim {i}", "pin_nodes": [unrelated_pin]})
+
+    async def verify_cached(i: int) -> float:
+        return await post_verify({"claim": f"{run_id} cached claim", "pin_nodes": [unrelated_pin]})
+
+    async def verify_vector_skip(i: int) -> float:
+        claim = f"{run_id} pinned claim {i}"
+        return await post_verify({"claim": claim, "pin_nodes": [{"id": "pin-1", "content": claim}]})
+
+    async def embed(i: int) -> float:
+        texts = [f"{run_id} text {i}-{j}" for j in range(embed_batch)]
+        started = time.perf_counter()
+        response = await client.post("/embed", json={"texts": texts})
+        response.raise_for_status()
+        return time.perf_counter() - started
+
+    async def bicameral_ttft(i: int) -> float:
+        body = {"claim": f"{run_id} stream claim {i}", "context": [{"id": "n1", "content": "context node"}]}
+        started = time.perf_counter()
+        ttft: Optional[float] = None
+        async with client.stream("POST", "/bicameral_stream", json=body) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if line.startswith("E:"):
+                    raise RuntimeError(line)
+                if ttft is None and line.startswith("A:"):
+                    ttft = time.perf_counter() - started
+        if ttft is None:
+            raise RuntimeError("stream ended without an A: frame")
+        return ttft
+
+    return {
+        "recycle": recycle,
+        "verify_cold": verify_cold,
+        "verify_cached": verify_cached,
+        "verify_vector_skip": verify_vector_skip,
+        "embed_batch": embed,
+        "bicameral_ttft": bicameral_ttft,
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    regressions = []
+    for name, base in baseline.get("scenarios", {}).items():
+        current = results["scenarios"].get(name)
+        if current is None:
+            continue
+        for metric, higher_is_better in CHECKS.items():
+            old, new = base.get(metric), current.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if (-change if higher_is_better else change) > tolerance:
+                regressions.append(f"{name}.{metric}: {old} -> {new} ({change:+.1%})")
+        if current["error_rate"] > base.get("error_rate", 0.0) + 0.01:
+            regressions.append(f"{name}.error_rate: {base.get('error_rate', 0.0)} -> {current['error_rate']}")
+    return regressions
+
+
+async def benchmark(args) -> dict:
+    fake_port, service_port = free_port(), free_port()
+    fake_url = f"http://127.0.0.1:{fake_port}"
+    service_url = f"http://127.0.0.1:{service_port}"
+    workdir = Path(args.workdir or BENCH_DIR / ".run")
+    workdir.mkdir(parents=True, exist_ok=True)
+
+    fakes = start_fakes(args, fake_port)
+    service = start_service(args, service_port, fake_url, workdir)
+    try:
+        await wait_ready(f"{fake_url}/calls", fakes)
+        await wait_ready(f"{service_url}/scheduler/stats", service)
+
+        limits = httpx.Limits(max_connections=args.concurrency * 2, max_keepalive_connections=args.concurrency * 2)
+        headers = {"Authorization": "Bearer bench"}
+        async with httpx.AsyncClient(base_url=service_url, headers=headers, limits=limits, timeout=60.0) as client:
+            run_id = uuid.uuid4().hex[:8]
+            results = {}
+            for name, request in scenarios(client, run_id, args.embed_batch).items():
+                if args.only and name not in args.only:
+                    continue
+                concurrency = args.stream_concurrency if name == "bicameral_ttft" else args.concurrency
+                results[name] = await run_scenario(request, args.requests, concurrency, args.warmup)
+                print(f"[Bench] {name:<20} " + "  ".join(
+                    f"{key}={results[name][key]}" for key in ("p50_ms", "p95_ms", "p99_ms", "throughput_rps", "error_rate")
+                ))
+            upstream_calls = (await client.get(f"{fake_url}/calls")).json()
+    finally:
+        for process in (service, fakes):
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    return {
+        "config": {
+            "mode": args.mode,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "stream_concurrency": args.stream_concurrency,
+            "embed_batch": args.embed_batch,
+            "latency_ms": args.latency_ms,
+            "jitter_ms": args.jitter_ms,
+            "error_rate": args.error_rate,
+            "token_interval_ms": args.token_interval_ms,
+        },
+        "environment": {"python": platform.python_version(), "platform": platform.platform()},
+        "scenarios": results,
+        "upstream_calls": upstream_calls,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=("ollama", "cloud"), default="ollama", help="which upstream API RLM Core uses")
+    parser.add_argument("--requests", type=int, default=200, help="measured requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--stream-concurrency", type=int, default=1, help="concurrency of bicameral_ttft")
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--embed-batch", type=int, default=32)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="fake upstream latency")
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fake upstream 500 rate")
+    parser.add_argument("--token-interval-ms", type=float, default=5.0, help="fake streaming token interval")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", nargs="*", help="scenario names to run")
+    parser.add_argument("--output", default=str(BENCH_DIR / "results" / "latest.json"))
+    parser.add_argument("--baseline", help="compare against this result file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative regression")
+    parser.add_argument("--write-baseline", help="also save the results as the new baseline")
+    parser.add_argument("--workdir", help="working directory for the service (SQLite files)")
+    args = parser.parse_args()
+
+    results = asyncio.run(benchmark(args))
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2) + "\n")
+    print(f"[Bench] Results written to {output}")
+    if args.write_baseline:
+        Path(args.write_baseline).write_text(json.dumps(results, indent=2) + "\n")
+        print(f"[Bench] Baseline written to {args.write_baseline}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        if baseline.get("config") != results["config"]:
+            print("[Bench] WARNING: baseline was recorded with a different configuration.")
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("[Bench] REGRESSION:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+        print(f"[Bench] No regression beyond {args.tolerance:.0%} against {args.baseline}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,618 @@
+"""
+Antibody Index - In-process nearest-neighbour search over memory_antibodies
+
+Keeps a local copy of the antibody embeddings, sharded per project, so a
+lookup is a matrix product in memory instead of a match_antibodies RPC:
+- Flat NumPy shards (exact cosine, one BLAS call per shard), or HNSW
+  shards when hnswlib is installed and RLM_ANTIBODY_INDEX=hnsw
+- Filled incrementally: periodic pulls of rows newer than a watermark,
+  plus rows written through /recycle, added as they are stored. The store
+  assigns created_at when a row is inserted, and each pull re-reads a
+  short overlap before the watermark, so rows whose insert committed late
+  are still picked up
+- Backed by Supabase, or by a local SQLite stand-in when Supabase is not
+  configured, so the whole path also runs offline
+
+AntibodyWriter is the write side: /recycle enqueues, and a single writer
+embeds and bulk-inserts in batches.
+"""
+import asyncio
+import json
+import random
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Optional
+
+import httpx
+import numpy as np
+
+from .embeddings import top_k_indices
+from .upstream import UpstreamPool
+
+# Optional approximate index
+try:
+    import hnswlib
+    HNSW_AVAILABLE = True
+except ImportError:
+    hnswlib = None
+    HNSW_AVAILABLE = False
+
+
+def _vector(value) -> np.ndarray:
+    # PostgREST serializes pgvector columns as "[0.1,0.2,...]" strings
+    if isinstance(value, str):
+        value = json.loads(value)
+    return np.asarray(value, dtype=np.float32)
+
+
+def _timestamp(moment: datetime) -> str:
+    return moment.isoformat(timespec="microseconds")
+
+
+def _rewind(timestamp: str, seconds: float) -> str:
+    """`timestamp` (ISO 8601, as the store returns it) moved `seconds` back."""
+    try:
+        moment = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+    except ValueError:
+        return timestamp
+    return _timestamp(moment - timedelta(seconds=seconds))
+
+
+class AntibodyStore(ABC):
+    """
+    Where antibodies live. Rows: id, content, project_id, embedding, created_at.
+    created_at is assigned by the store at insert time, never by the writer.
+    """
+
+    @abstractmethod
+    async def fetch(self, since: Optional[str], limit: int, offset: int = 0) -> list[dict]:
+        """Rows created at or after `since`, oldest first (ties by id), skipping `offset`."""
+
+    @abstractmethod
+    async def insert(self, rows: list[dict]) -> None:
+        """Stores rows of id, content, project_id, embedding."""
+
+    async def aclose(self):
+        pass
+
+
+class SupabaseAntibodyStore(AntibodyStore):
+    def __init__(self, pool: UpstreamPool, url: str, key: str):
+        self.pool = pool
+        self.url = f"{url}/rest/v1/memory_antibodies"
+        self.headers = {"apikey": key, "Authorization": f"Bearer {key}"}
+
+    async def fetch(self, since: Optional[str], limit: int, offset: int = 0) -> list[dict]:
+        params = {
+            "select": "id,content,project_id,embedding,created_at",
+            "order": "created_at.asc,id.asc",
+            "limit": str(limit),
+            "offset": str(offset),
+        }
+        if since:
+            params["created_at"] = f"gte.{since}"
+        response = await self.pool.client("supabase").get(self.url, headers=self.headers, params=params)
+        response.raise_for_status()
+        return response.json()
+
+    async def insert(self, rows: list[dict]) -> None:
+        response = await self.pool.client("supabase").post(
+            self.url,
+            # Ids are assigned client-side, so a retried batch is a no-op for rows already stored
+            headers={**self.headers, "Prefer": "return=minimal,resolution=ignore-duplicates"},
+            # created_at is left to the column default (now())
+            json=[
+                {
+                    "id": row["id"],
+                    "content": row["content"],
+                    "project_id": row.get("project_id"),
+                    "embedding": [float(x) for x in row["embedding"]],
+                }
+                for row in rows
+            ],
+        )
+        response.raise_for_status()
+
+
+class LocalAntibodyStore(AntibodyStore):
+    """SQLite stand-in for the memory_antibodies table (development, offline runs)."""
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS memory_antibodies ("
+                " id TEXT PRIMARY KEY,"
+                " content TEXT NOT NULL,"
+                " project_id TEXT,"
+                " embedding BLOB NOT NULL,"
+                " created_at TEXT NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS memory_antibodies_created_at ON memory_antibodies (created_at)")
+            self._conn = conn
+        return self._conn
+
+    def _fetch(self, since: Optional[str], limit: int, offset: int) -> list[dict]:
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT id, content, project_id, embedding, created_at FROM memory_antibodies"
+                " WHERE created_at >= ? ORDER BY created_at ASC, id ASC LIMIT ? OFFSET ?",
+                (since or "", limit, offset),
+            ).fetchall()
+        return [
+            {
+                "id": row[0],
+                "content": row[1],
+                "project_id": row[2],
+                "embedding": np.frombuffer(row[3], dtype=np.float32),
+                "created_at": row[4],
+            }
+            for row in rows
+        ]
+
+    def _insert(self, rows: list[dict]):
+        with self._lock:
+            created_at = _timestamp(datetime.now(timezone.utc))
+            self._connect().executemany(
+                "INSERT OR IGNORE INTO memory_antibodies (id, content, project_id, embedding, created_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                [
+                    (
+                        row["id"], row["content"], row.get("project_id"),
+                        np.asarray(row["embedding"], dtype=np.float32).tobytes(), created_at,
+                    )
+                    for row in rows
+                ],
+            )
+
+    async def fetch(self, since: Optional[str], limit: int, offset: int = 0) -> list[dict]:
+        return await asyncio.to_thread(self._fetch, since, limit, offset)
+
+    async def insert(self, rows: list[dict]) -> None:
+        await asyncio.to_thread(self._insert, rows)
+
+    async def aclose(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class _Shard:
+    """One project's antibodies: normalized vectors plus their ids and contents."""
+    MIN_ROWS = 64
+
+    def __init__(self, dim: int, hnsw: bool):
+        self.dim = dim
+        self.ids: list[str] = []
+        self.contents: list[str] = []
+        self.matrix = np.zeros((self.MIN_ROWS, dim), dtype=np.float32)
+        self.hnsw = None
+        if hnsw:
+            self.hnsw = hnswlib.Index(space="ip", dim=dim)
+            self.hnsw.init_index(max_elements=self.MIN_ROWS, ef_construction=200, M=16)
+            self.hnsw.set_ef(64)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, ids: list[str], contents: list[str], vectors: np.ndarray):
+        start, end = len(self.ids), len(self.ids) + len(ids)
+        if end > len(self.matrix):
+            matrix = np.zeros((max(end, len(self.matrix) * 2), self.dim), dtype=np.float32)
+            matrix[:start] = self.matrix[:start]
+            self.matrix = matrix
+        self.matrix[start:end] = vectors
+        self.ids.extend(ids)
+        self.contents.extend(contents)
+        if self.hnsw is not None:
+            if end > self.hnsw.get_max_elements():
+                self.hnsw.resize_index(len(self.matrix))
+            self.hnsw.add_items(vectors, np.arange(start, end))
+
+    def search(self, query: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+        k = min(k, len(self.ids))
+        if self.hnsw is not None:
+            labels, distances = self.hnsw.knn_query(query, k=k)
+            return labels[0], 1.0 - distances[0]
+        scores = self.matrix[:len(self.ids)] @ query
+        top = top_k_indices(scores, k)
+        return top, scores[top]
+
+
+class AntibodyIndex:
+    """
+    Antibody vectors sharded by project_id (None = antibodies without a
+    project). A project query covers its own shard and the unscoped one;
+    a query without a project covers every shard.
+    """
+    def __init__(self, kind: str = "flat"):
+        if kind == "hnsw" and not HNSW_AVAILABLE:
+            print("[Antibodies] hnswlib not installed, using the flat index.")
+            kind = "flat"
+        self.kind = kind
+        self.dim: Optional[int] = None
+        self.skipped = 0
+        self._shards: dict[Optional[str], _Shard] = {}
+        self._ids: set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def add(self, rows: list[dict]) -> int:
+        """Adds rows not indexed yet; returns how many were new."""
+        grouped: dict[Optional[str], list[tuple[str, str, np.ndarray]]] = {}
+        for row in rows:
+            if row["id"] in self._ids or row.get("embedding") is None:
+                continue
+            vector = _vector(row["embedding"])
+            if self.dim is None:
+                self.dim = vector.size
+            if vector.size != self.dim:
+                # Written by another embedding model: not comparable
+                self.skipped += 1
+                continue
+            norm = np.linalg.norm(vector)
+            if norm == 0:
+                continue
+            self._ids.add(row["id"])
+            grouped.setdefault(row.get("project_id"), []).append((row["id"], row["content"], vector / norm))
+
+        for project_id, items in grouped.items():
+            shard = self._shards.get(project_id)
+            if shard is None:
+                shard = self._shards[project_id] = _Shard(self.dim, self.kind == "hnsw")
+            ids, contents, vectors = zip(*items)
+            shard.add(list(ids), list(contents), np.stack(vectors))
+        return sum(len(items) for items in grouped.values())
+
+    def search(self, vector, project_id: Optional[str], threshold: float, k: int) -> list[dict]:
+        """Antibodies with cosine similarity above `threshold`, best first."""
+        query = np.asarray(vector, dtype=np.float32)
+        if self.dim is None or query.size != self.dim or k <= 0:
+            return []
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return []
+        query = query / norm
+
+        if project_id is None:
+            shards = list(self._shards.values())
+        else:
+            shards = [s for s in (self._shards.get(project_id), self._shards.get(None)) if s is not None]
+
+        matches = []
+        for shard in shards:
+            if not len(shard):
+                continue
+            positions, scores = shard.search(query, k)
+            for position, score in zip(positions, scores):
+                if score > threshold:
+                    matches.append({
+                        "id": shard.ids[position],
+                        "content": shard.contents[position],
+                        "similarity": float(score),
+                    })
+        matches.sort(key=lambda m: m["similarity"], reverse=True)
+        return matches[:k]
+
+    def stats(self) -> dict:
+        return {
+            "kind": self.kind,
+            "entries": len(self._ids),
+            "shards": len(self._shards),
+            "dim": self.dim,
+            "skipped": self.skipped,
+        }
+
+
+class AntibodySync:
+    """
+    Keeps an AntibodyIndex current by pulling rows newer than its watermark.
+    created_at is taken when the insert starts, not when it commits, so a
+    slow insert can become visible after newer rows were already pulled.
+    Each pull therefore starts `overlap` seconds before the watermark;
+    rows already indexed are skipped by id.
+    """
+    def __init__(
+        self, store: AntibodyStore, index: AntibodyIndex, interval: float,
+        page_size: int = 1000, overlap: float = 60.0
+    ):
+        self.store = store
+        self.index = index
+        self.interval = interval
+        self.page_size = page_size
+        self.overlap = overlap
+        # Newest created_at pulled from the store. Local writes never move it:
+        # rows other workers stored meanwhile may be older than ours
+        self.watermark: Optional[str] = None
+        self.pulls = 0
+        self.errors = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def refresh(self) -> int:
+        """Pulls everything newer than the watermark, page by page."""
+        added = 0
+        since = _rewind(self.watermark, self.overlap) if self.watermark else None
+        skip = 0
+        while True:
+            rows = await self.store.fetch(since, self.page_size, skip)
+            added += self.index.add(rows)
+            newest = rows[-1].get("created_at") if rows else None
+            if newest and (self.watermark is None or newest > self.watermark):
+                self.watermark = newest
+            if len(rows) < self.page_size or newest is None:
+                break
+            # Next page starts at the newest timestamp, past the rows already read
+            # at it (one insert batch shares a single created_at)
+            ties = sum(1 for row in rows if row.get("created_at") == newest)
+            skip = skip + ties if newest == since else ties
+            since = newest
+        self.pulls += 1
+        return added
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def aclose(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.store.aclose()
+
+    async def _run(self):
+        # The first pull runs in the background so startup is not delayed
+        while True:
+            try:
+                added = await self.refresh()
+                if added:
+                    print(f"[Antibodies] Indexed {added} antibodies ({len(self.index)} total).")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.errors += 1
+                print(f"[Antibodies] Refresh failed: {str(e)}")
+            if self.interval <= 0:
+                return
+            await asyncio.sleep(self.interval)
+
+    def stats(self) -> dict:
+        return {**self.index.stats(), "watermark": self.watermark, "pulls": self.pulls, "errors": self.errors}
+
+
+class _SpillFile:
+    """On-disk overflow for the writer buffer (SQLite, FIFO by insertion)."""
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS pending (seq INTEGER PRIMARY KEY AUTOINCREMENT, item TEXT NOT NULL)")
+            self._conn = conn
+        return self._conn
+
+    def push(self, items: list[dict]):
+        with self._lock:
+            self._connect().executemany("INSERT INTO pending (item) VALUES (?)", [(json.dumps(i),) for i in items])
+
+    def pop(self, limit: int) -> list[dict]:
+        with self._lock:
+            conn = self._connect()
+            rows = conn.execute("SELECT seq, item FROM pending ORDER BY seq LIMIT ?", (limit,)).fetchall()
+            if rows:
+                conn.execute("DELETE FROM pending WHERE seq <= ?", (rows[-1][0],))
+        return [json.loads(item) for _, item in rows]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._connect().execute("SELECT COUNT(*) FROM pending").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class WriterFull(Exception):
+    """The write buffer is full and no spill file is configured."""
+
+
+class AntibodyWriter:
+    """
+    Write-behind pipeline for new antibodies.
+
+    submit() only appends to a bounded in-memory buffer. Past it, items go
+    to an overflow list that a second task moves to the spill file (when
+    one is configured) off the event loop. A single background task flushes
+    when `batch_size` items are waiting or `flush_interval` has passed:
+    one batched embedding call, one bulk insert, retried with jittered
+    exponential backoff. Items still pending at shutdown are flushed, and
+    whatever cannot be written is spilled and picked up on the next start.
+    """
+    def __init__(
+        self,
+        store: AntibodyStore,
+        index: AntibodyIndex,
+        embed: Callable[[list[str]], Awaitable[np.ndarray]],
+        max_buffer: int,
+        batch_size: int,
+        flush_interval: float,
+        spill_path: Optional[str] = None,
+        max_retries: int = 5,
+    ):
+        self.store = store
+        self.index = index
+        self.embed = embed
+        self.max_buffer = max_buffer
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.spill = _SpillFile(spill_path) if spill_path else None
+        self.written = 0
+        self.batches = 0
+        self.retries = 0
+        self.spilled = 0
+        self.dropped = 0
+        self._buffer: deque[dict] = deque()
+        self._overflow: list[dict] = [] # waiting for the spiller
+        self._wakeup: Optional[asyncio.Event] = None
+        self._spill_now: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._spiller: Optional[asyncio.Task] = None
+
+    def submit(self, item: dict):
+        """
+        Queues {id, content, embed_text, project_id}.
+        Raises WriterFull when the buffer is full and there is nowhere to
+        spill, or the spill file is falling a whole buffer behind.
+        """
+        if len(self._buffer) >= self.max_buffer:
+            if self.spill is None or len(self._overflow) >= self.max_buffer:
+                self.dropped += 1
+                raise WriterFull("Antibody write buffer is full")
+            self._overflow.append(item)
+            if self._spill_now is not None:
+                self._spill_now.set()
+        else:
+            self._buffer.append(item)
+        if self._wakeup is not None and len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+
+    async def start(self):
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+            if self.spill is not None:
+                self._spill_now = asyncio.Event()
+                self._spiller = asyncio.create_task(self._spill_overflow())
+
+    async def aclose(self):
+        tasks = [t for t in (self._task, self._spiller) if t is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = self._spiller = None
+        # Drain what is left, then keep anything unwritten on disk
+        while self._buffer:
+            if not await self._flush(retries=1):
+                break
+        if self.spill is not None:
+            unwritten = list(self._buffer) + self._overflow
+            if unwritten:
+                await asyncio.to_thread(self.spill.push, unwritten)
+                self.spilled += len(unwritten)
+                print(f"[Antibodies] Spilled {len(unwritten)} unwritten antibodies to disk.")
+            self._buffer.clear()
+            self._overflow = []
+            await asyncio.to_thread(self.spill.close)
+
+    async def _spill_overflow(self):
+        while True:
+            await self._spill_now.wait()
+            self._spill_now.clear()
+            if not self._overflow:
+                continue
+            items, self._overflow = self._overflow, []
+            # A push cancelled by aclose() still completes in its thread
+            try:
+                await asyncio.to_thread(self.spill.push, items)
+                self.spilled += len(items)
+            except Exception as e:
+                print(f"[Antibodies] Could not spill overflow: {str(e)}")
+                self._overflow = items + self._overflow
+                await asyncio.sleep(1.0)
+                self._spill_now.set()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self._refill()
+            while self._buffer:
+                if not await self._flush(self.max_retries):
+                    break
+                await self._refill()
+
+    async def _refill(self):
+        # Spilled items (overflow, or left over by a previous process) go next
+        if self.spill is not None and len(self._buffer) < self.batch_size:
+            self._buffer.extend(await asyncio.to_thread(self.spill.pop, self.max_buffer - len(self._buffer)))
+
+    async def _flush(self, retries: int) -> bool:
+        """Writes the oldest batch. On failure it stays at the head of the buffer."""
+        batch = [self._buffer[i] for i in range(min(self.batch_size, len(self._buffer)))]
+        for attempt in range(retries):
+            try:
+                vectors = await self.embed([item["embed_text"] for item in batch])
+                rows = [
+                    {
+                        "id": item["id"],
+                        "content": item["content"],
+                        "embedding": vector,
+                        "project_id": item.get("project_id"),
+                    }
+                    for item, vector in zip(batch, vectors)
+                ]
+                await self.store.insert(rows)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if isinstance(e, httpx.HTTPStatusError) and 400 <= e.response.status_code < 500 \
+                        and e.response.status_code not in (408, 429):
+                    # Rejected rows will never be accepted: don't block the queue on them
+                    print(f"[Antibodies] Dropped {len(batch)} antibodies rejected by the store: {str(e)}")
+                    for _ in batch:
+                        self._buffer.popleft()
+                    self.dropped += len(batch)
+                    return True
+                if attempt + 1 == retries:
+                    print(f"[Antibodies] Write of {len(batch)} antibodies failed: {str(e)}")
+                    return False
+                self.retries += 1
+                # Full jitter: spreads retries of concurrent workers apart
+                await asyncio.sleep(random.uniform(0, min(30.0, 0.5 * 2 ** attempt)))
+                continue
+            for _ in batch:
+                self._buffer.popleft()
+            self.index.add(rows)
+            self.written += len(rows)
+            self.batches += 1
+            return True
+        return False
+
+    @property
+    def buffered(self) -> int:
+        return len(self._buffer)
+
+    def stats(self) -> dict:
+        return {
+            "buffered": len(self._buffer),
+            "overflow": len(self._overflow),
+            "spill_pending": self.spill.count() if self.spill is not None else 0,
+            "written": self.written,
+            "batches": self.batches,
+            "retries": self.retries,
+            "spilled": self.spilled,
+            "dropped": self.dropped,
+        }
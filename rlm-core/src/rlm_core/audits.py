@@ -0,0 +1,369 @@
+"""
+Shadow Audits - Durable, rate-limited Devil's Advocate pipeline
+
+/verify only records that a node needs an audit; the audit itself runs
+later, off the request path:
+- submit() is an in-memory dict insert (one pending audit per node, the
+  newest claim wins) and a persister moves it to a SQLite queue, so
+  audits survive restarts
+- A fixed pool of workers claims queued audits and runs the LLM call
+  under its own token bucket
+- Results are POSTed to the webhook in batches (a JSON array per URL),
+  under a second token bucket, with jittered retry on failure
+
+Queue rows go pending -> audited -> deleted once the webhook accepts
+them. A row re-submitted while in flight gets a new version, so the
+stale result is discarded instead of overwriting the newer audit. All
+worker processes on a host share the queue file; rows are leased to one
+process at a time, so an audit is not run or delivered twice.
+"""
+import asyncio
+import json
+import os
+import random
+import socket
+import sqlite3
+import threading
+import time
+from typing import Awaitable, Callable, Optional
+
+import httpx
+from pydantic import BaseModel
+
+
+class AuditCallback(BaseModel):
+    node_id: str
+    project_id: str
+    original_claim: str
+    original_response: str
+    context: list[dict] = []
+    webhook_url: str
+
+
+class TokenBucket:
+    """`rate` tokens per second, up to `burst` at once. rate <= 0 disables the limit."""
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = max(burst, 1.0)
+        self.tokens = self.burst
+        self.waited = 0.0
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, n: float = 1.0):
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self.tokens < n:
+                delay = (n - self.tokens) / self.rate
+                self.waited += delay
+                await asyncio.sleep(delay)
+                self.tokens = n
+                self._updated = time.monotonic()
+            self.tokens -= n
+
+
+class _AuditFile:
+    """
+    SQLite queue, one row per node_id, shared by every worker process on the
+    host. ":memory:" keeps it for the process lifetime only.
+
+    A claimed row is leased to its owner (host:pid) until `lease_until`;
+    claims run in a write transaction, so two processes never lease the
+    same row. Leases of a crashed process expire and are claimed again.
+    """
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS audits (
+            node_id TEXT PRIMARY KEY,
+            payload TEXT NOT NULL,
+            version INTEGER NOT NULL DEFAULT 0,
+            state TEXT NOT NULL DEFAULT 'pending',
+            result TEXT,
+            lease_owner TEXT,
+            lease_until REAL NOT NULL DEFAULT 0,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            not_before REAL NOT NULL DEFAULT 0
+        )
+    """
+
+    def __init__(self, path: str, lease: float):
+        self.path = path
+        self.lease = lease
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(self.SCHEMA)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(audits)")}
+            # Files written before leases had an owner
+            if "lease_owner" not in columns:
+                conn.execute("ALTER TABLE audits ADD COLUMN lease_owner TEXT")
+                conn.execute("ALTER TABLE audits ADD COLUMN lease_until REAL NOT NULL DEFAULT 0")
+            self._conn = conn
+        return self._conn
+
+    def upsert(self, payloads: list[dict]):
+        with self._lock:
+            self._connect().executemany(
+                """
+                INSERT INTO audits (node_id, payload) VALUES (?, ?)
+                ON CONFLICT(node_id) DO UPDATE SET
+                    payload = excluded.payload, version = version + 1, state = 'pending',
+                    result = NULL, lease_owner = NULL, lease_until = 0, attempts = 0, not_before = 0
+                """,
+                [(p["node_id"], json.dumps(p)) for p in payloads],
+            )
+
+    def release(self):
+        """
+        Frees the leases held under this owner: at startup, those left by a
+        previous process with the same pid; at shutdown, our own.
+        """
+        with self._lock:
+            self._connect().execute(
+                "UPDATE audits SET lease_owner = NULL, lease_until = 0 WHERE lease_owner = ?", (self.owner,)
+            )
+
+    def claim(self, state: str, limit: int) -> list[tuple[str, int, dict, Optional[dict], int]]:
+        """Leases up to `limit` due rows in `state`: (node_id, version, payload, result, attempts)."""
+        with self._lock:
+            conn = self._connect()
+            now = time.time()
+            # IMMEDIATE takes the write lock up front: no other process can lease between SELECT and UPDATE
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = conn.execute(
+                    "SELECT node_id, version, payload, result, attempts FROM audits "
+                    "WHERE state = ? AND lease_until <= ? AND not_before <= ? ORDER BY rowid LIMIT ?",
+                    (state, now, now, limit),
+                ).fetchall()
+                conn.executemany(
+                    "UPDATE audits SET lease_owner = ?, lease_until = ? WHERE node_id = ? AND version = ?",
+                    [(self.owner, now + self.lease, r[0], r[1]) for r in rows],
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return [(r[0], r[1], json.loads(r[2]), json.loads(r[3]) if r[3] else None, r[4]) for r in rows]
+
+    # Updates below only apply while this owner still holds the row's lease
+
+    def audited(self, node_id: str, version: int, result: dict):
+        with self._lock:
+            self._connect().execute(
+                "UPDATE audits SET state = 'audited', result = ?, lease_owner = NULL, lease_until = 0, attempts = 0 "
+                "WHERE node_id = ? AND version = ? AND lease_owner = ?",
+                (json.dumps(result), node_id, version, self.owner),
+            )
+
+    def retry(self, node_id: str, version: int, delay: float):
+        with self._lock:
+            self._connect().execute(
+                "UPDATE audits SET lease_owner = NULL, lease_until = 0, attempts = attempts + 1, not_before = ? "
+                "WHERE node_id = ? AND version = ? AND lease_owner = ?",
+                (time.time() + delay, node_id, version, self.owner),
+            )
+
+    def delete(self, keys: list[tuple[str, int]]):
+        with self._lock:
+            self._connect().executemany(
+                "DELETE FROM audits WHERE node_id = ? AND version = ? AND lease_owner = ?",
+                [(node_id, version, self.owner) for node_id, version in keys],
+            )
+
+    def counts(self) -> dict:
+        with self._lock:
+            rows = self._connect().execute("SELECT state, COUNT(*) FROM audits GROUP BY state").fetchall()
+        return dict(rows)
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class AuditPipeline:
+    def __init__(
+        self,
+        audit: Callable[[AuditCallback], Awaitable[dict]],
+        post: Callable[[str, list[dict]], Awaitable[None]],
+        path: str,
+        workers: int,
+        llm_limit: TokenBucket,
+        webhook_limit: TokenBucket,
+        batch_size: int,
+        flush_interval: float,
+        max_attempts: int,
+        lease: float = 300.0,
+    ):
+        self.audit = audit
+        self.post = post
+        self.file = _AuditFile(path, lease)
+        self.workers = workers
+        self.llm_limit = llm_limit
+        self.webhook_limit = webhook_limit
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+        self.submitted = 0
+        self.deduplicated = 0
+        self.audited = 0
+        self.delivered = 0
+        self.batches = 0
+        self.failed = 0
+        self.dropped = 0
+        self._inbox: dict[str, AuditCallback] = {}
+        self._unsent = 0
+        self._persist_now: Optional[asyncio.Event] = None
+        self._work: Optional[asyncio.Event] = None
+        self._flush_now: Optional[asyncio.Event] = None
+        self._tasks: list[asyncio.Task] = []
+
+    def submit(self, callback: AuditCallback):
+        """Queues an audit for the node; a pending one for the same node is replaced."""
+        self.submitted += 1
+        if callback.node_id in self._inbox:
+            self.deduplicated += 1
+        self._inbox[callback.node_id] = callback
+        if self._persist_now is not None:
+            self._persist_now.set()
+
+    async def start(self):
+        if self._tasks:
+            return
+        self._persist_now, self._work, self._flush_now = asyncio.Event(), asyncio.Event(), asyncio.Event()
+        await asyncio.to_thread(self.file.release)
+        self._work.set()
+        self._tasks = [asyncio.create_task(self._persist()), asyncio.create_task(self._deliver())]
+        self._tasks += [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def aclose(self):
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        # Whatever was submitted but not yet persisted is written before exit,
+        # and rows this process had leased go back to the other workers now
+        await self._persist_inbox()
+        await asyncio.to_thread(self.file.release)
+        await asyncio.to_thread(self.file.close)
+
+    async def _persist_inbox(self):
+        if self._inbox:
+            inbox, self._inbox = self._inbox, {}
+            await asyncio.to_thread(self.file.upsert, [c.model_dump() for c in inbox.values()])
+
+    async def _persist(self):
+        while True:
+            await self._persist_now.wait()
+            self._persist_now.clear()
+            try:
+                await self._persist_inbox()
+                self._work.set()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[Audit] Could not persist audit queue: {str(e)}")
+                await asyncio.sleep(1.0)
+
+    async def _worker(self):
+        while True:
+            self._work.clear()
+            rows = await asyncio.to_thread(self.file.claim, "pending", 1)
+            if not rows:
+                try:
+                    await asyncio.wait_for(self._work.wait(), timeout=1.0)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            self._work.set() # more may be waiting: let the next worker look
+            node_id, version, payload, _, attempts = rows[0]
+            try:
+                await self.llm_limit.acquire()
+                result = await self.audit(AuditCallback(**payload))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                await self._failed(node_id, version, attempts, f"audit of node {node_id}", e)
+                continue
+            await asyncio.to_thread(self.file.audited, node_id, version, result)
+            self.audited += 1
+            self._unsent += 1
+            if self._unsent >= self.batch_size:
+                self._flush_now.set()
+
+    async def _deliver(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_now.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_now.clear()
+            while True:
+                rows = await asyncio.to_thread(self.file.claim, "audited", self.batch_size)
+                if not rows:
+                    break
+                self._unsent = max(0, self._unsent - len(rows))
+                by_url: dict[str, list] = {}
+                for row in rows:
+                    by_url.setdefault(row[2]["webhook_url"], []).append(row)
+                for url, batch in by_url.items():
+                    await self._post(url, batch)
+
+    async def _post(self, url: str, batch: list):
+        body = [
+            {"node_id": node_id, "project_id": payload["project_id"], "audit": result}
+            for node_id, _, payload, result, _ in batch
+        ]
+        try:
+            await self.webhook_limit.acquire()
+            await self.post(url, body)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            for node_id, version, _, _, attempts in batch:
+                await self._failed(node_id, version, attempts, f"webhook delivery to {url}", e)
+            return
+        await asyncio.to_thread(self.file.delete, [(row[0], row[1]) for row in batch])
+        self.delivered += len(batch)
+        self.batches += 1
+
+    async def _failed(self, node_id: str, version: int, attempts: int, what: str, error: Exception):
+        self.failed += 1
+        rejected = isinstance(error, httpx.HTTPStatusError) and 400 <= error.response.status_code < 500 \
+            and error.response.status_code not in (408, 429)
+        if rejected or attempts + 1 >= self.max_attempts:
+            print(f"[Audit] Giving up on {what}: {str(error)}")
+            await asyncio.to_thread(self.file.delete, [(node_id, version)])
+            self.dropped += 1
+            return
+        # Full jitter, so a recovering upstream is not hit by every retry at once
+        await asyncio.to_thread(self.file.retry, node_id, version, random.uniform(0, min(300.0, 2.0 * 2 ** attempts)))
+
+    async def queue_counts(self) -> dict:
+        """Persisted audits per state (pending, audited)."""
+        return await asyncio.to_thread(self.file.counts)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "inbox": len(self._inbox),
+            "submitted": self.submitted,
+            "deduplicated": self.deduplicated,
+            "audited": self.audited,
+            "delivered": self.delivered,
+            "batches": self.batches,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "llm_wait_s": round(self.llm_limit.waited, 3),
+            "webhook_wait_s": round(self.webhook_limit.waited, 3),
+        }
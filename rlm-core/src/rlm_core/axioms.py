@@ -0,0 +1,173 @@
+"""
+Axiom Matcher - Streaming contradiction scan against live PIN axioms
+
+Compiles an axiom set once into an Aho-Corasick automaton over words, then
+scans generated text token by token, keeping its state across chunks:
+each word costs one automaton step, no matter how long the output is or
+how many axioms are live.
+
+Negation words are taken out of the automaton's alphabet and tracked by
+position instead. A match whose span carries a different polarity than
+its axiom ("el cielo NO es azul" against "el cielo es azul", or the
+reverse) is a contradiction. Every axiom and its negated forms are
+therefore covered by a single pattern. Only a negation between the
+matched words counts ("No, el cielo es azul" agrees with the axiom),
+unless the axiom itself starts with one ("no hay cielo").
+"""
+import hashlib
+import re
+from collections import OrderedDict, deque
+from typing import Optional
+
+NEGATIONS = frozenset({"no", "not"})
+
+_WORD = re.compile(r"\w+")
+_TRAILING_WORD = re.compile(r"\w+$")
+
+
+def _words(text: str) -> list[str]:
+    return _WORD.findall(text.lower())
+
+
+class AxiomMatcher:
+    """Word-level Aho-Corasick automaton built once per axiom set."""
+    def __init__(self, axioms: list[str]):
+        self.axioms = axioms
+        self.max_len = 0
+        # Node 0 is the root; outputs hold (pattern length, axiom index, negated,
+        # leading), leading = the axiom starts with a negation
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[list[tuple[int, int, bool, bool]]] = [[]]
+        for index, axiom in enumerate(axioms):
+            words = _words(axiom)
+            negated = any(w in NEGATIONS for w in words)
+            leading = bool(words) and words[0] in NEGATIONS
+            canonical = [w for w in words if w not in NEGATIONS]
+            if canonical:
+                self._insert(canonical, (len(canonical), index, negated, leading))
+        self._link()
+
+    @property
+    def size(self) -> int:
+        return len(self._goto)
+
+    def _insert(self, words: list[str], output: tuple[int, int, bool, bool]):
+        node = 0
+        for word in words:
+            nxt = self._goto[node].get(word)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][word] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append(output)
+        self.max_len = max(self.max_len, output[0])
+
+    def _link(self):
+        # Breadth-first failure links; outputs of the suffix state are merged in
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for word, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and word not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(word, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def step(self, node: int, word: str) -> int:
+        while node and word not in self._goto[node]:
+            node = self._fail[node]
+        return self._goto[node].get(word, 0)
+
+    def outputs(self, node: int) -> list[tuple[int, int, bool, bool]]:
+        return self._out[node]
+
+    def scanner(self) -> "AxiomScanner":
+        return AxiomScanner(self)
+
+
+class AxiomScanner:
+    """
+    Per-stream scan state. feed() only looks at the new chunk; a word split
+    across chunks is held back until it is complete.
+    """
+    def __init__(self, matcher: AxiomMatcher):
+        self.matcher = matcher
+        self._node = 0
+        self._position = 0 # count of non-negation words seen
+        self._negations: deque[int] = deque() # positions a negation word preceded
+        self._partial = ""
+
+    def feed(self, chunk: str) -> Optional[str]:
+        """Returns the contradicted axiom, if the new text contradicts one."""
+        text = self._partial + chunk
+        # The trailing word may continue in the next chunk
+        match = _TRAILING_WORD.search(text)
+        end = match.start() if match else len(text)
+        self._partial = text[end:]
+        return self._scan(text[:end])
+
+    def flush(self) -> Optional[str]:
+        """Scans the held-back word at the end of the stream."""
+        text, self._partial = self._partial, ""
+        return self._scan(text)
+
+    def _scan(self, text: str) -> Optional[str]:
+        for word in _words(text):
+            if word in NEGATIONS:
+                # Negations older than the longest pattern can never fall in a span
+                while self._negations and self._negations[0] < self._position - self.matcher.max_len:
+                    self._negations.popleft()
+                self._negations.append(self._position)
+                continue
+            self._position += 1
+            self._node = self.matcher.step(self._node, word)
+            for length, index, negated, leading in self.matcher.outputs(self._node):
+                # A negation at `start` precedes the first matched word: it only
+                # belongs to the match when the axiom also opens with one
+                start = self._position - length
+                first = start if leading else start + 1
+                in_span = any(first <= p < self._position for p in self._negations)
+                if in_span != negated:
+                    return self.matcher.axioms[index]
+        return None
+
+
+class AxiomMatcherCache:
+    """LRU of compiled matchers keyed by the axiom set's content, not its order."""
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._matchers: OrderedDict[bytes, AxiomMatcher] = OrderedDict()
+
+    @staticmethod
+    def key(axioms: list[str]) -> bytes:
+        digest = hashlib.blake2b(digest_size=16)
+        for axiom in sorted(set(axioms)):
+            digest.update(axiom.encode())
+            digest.update(b"\0")
+        return digest.digest()
+
+    def get(self, axioms: list[str]) -> AxiomMatcher:
+        key = self.key(axioms)
+        matcher = self._matchers.get(key)
+        if matcher is not None:
+            self._matchers.move_to_end(key)
+            self.hits += 1
+            return matcher
+        self.misses += 1
+        matcher = AxiomMatcher(axioms)
+        self._matchers[key] = matcher
+        while len(self._matchers) > self.max_entries:
+            self._matchers.popitem(last=False)
+        return matcher
+
+    def stats(self) -> dict:
+        return {"entries": len(self._matchers), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,435 @@
+"""
+Verification Cache - Logic Memory for RLM Core
+
+Prevents paying for the same thought twice. Verdicts are stored as
+serialized bytes behind a small async backend interface, so the same
+VerificationCache API can sit on a local in-process store or a shared one.
+
+Tiers:
+- L1: MemoryBackend, per process
+- L2: SQLiteBackend, a WAL-mode file shared by every worker on the host,
+  surviving restarts and deploys
+- Semantic: SemanticVerdictCache, optional near-duplicate lookup that maps a
+  paraphrased claim to the cache key of an already-paid verdict
+"""
+import asyncio
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Generic, Optional, Type, TypeVar
+
+import numpy as np
+from pydantic import BaseModel
+
+T = TypeVar("T", bound=BaseModel)
+
+
+class CacheBackend(ABC):
+    """Byte-oriented key/value store with optional per-entry TTL (seconds)."""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        ...
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        ...
+
+    async def get_entry(self, key: str) -> Optional[tuple[bytes, Optional[float]]]:
+        """Value plus remaining TTL in seconds (None = no expiry)."""
+        value = await self.get(key)
+        return None if value is None else (value, None)
+
+    def stats(self) -> dict:
+        return {}
+
+    async def start(self) -> None:
+        pass
+
+    async def aclose(self) -> None:
+        pass
+
+
+class MemoryBackend(CacheBackend):
+    """
+    In-process LRU. OrderedDict gives O(1) lookup, recency update and
+    eviction; entries are bounded both by count and by total value bytes.
+    """
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict() # key -> (expires_at, value)
+        self._bytes = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at and expires_at <= time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        if len(value) > self.max_bytes:
+            return
+        self._remove(key)
+        expires_at = time.monotonic() + ttl if ttl else 0.0
+        self._entries[key] = (expires_at, value)
+        self._bytes += len(value)
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    async def delete(self, key: str) -> None:
+        self._remove(key)
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[1])
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class SQLiteBackend(CacheBackend):
+    """
+    On-disk store shared by all workers on a host (SQLite in WAL mode).
+
+    Reads go straight to the file (read-through, off the event loop).
+    Writes are buffered and flushed in batches by a background task
+    (write-behind), which also compacts the file: expired rows are
+    dropped and the oldest rows trimmed to the entry/byte bounds.
+    """
+    def __init__(
+        self,
+        path: str,
+        max_entries: int,
+        max_bytes: int,
+        flush_interval: float = 0.2,
+        compact_interval: float = 300.0,
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.flush_interval = flush_interval
+        self.compact_interval = compact_interval
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._pending: dict[str, tuple[bytes, float]] = {} # key -> (value, expires_at)
+        self._task: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+        self.flushes = 0
+        self.trimmed = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS verdicts ("
+                " key TEXT PRIMARY KEY,"
+                " value BLOB NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " stored_at REAL NOT NULL,"
+                " expires_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS verdicts_stored_at ON verdicts (stored_at)")
+            self._conn = conn
+        return self._conn
+
+    def _read(self, key: str) -> Optional[tuple[bytes, float]]:
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT value, expires_at FROM verdicts WHERE key = ? AND (expires_at = 0 OR expires_at > ?)",
+                (key, time.time()),
+            ).fetchone()
+        return None if row is None else (bytes(row[0]), row[1])
+
+    def _write(self, rows: list[tuple[str, bytes, float]]):
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO verdicts (key, value, size, stored_at, expires_at) VALUES (?, ?, ?, ?, ?)",
+                    [(key, value, len(value), now, expires_at) for key, value, expires_at in rows],
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _compact(self):
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM verdicts WHERE expires_at != 0 AND expires_at <= ?", (time.time(),))
+            count, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM verdicts").fetchone()
+            if count > self.max_entries or size > self.max_bytes:
+                # Trim the oldest rows until both bounds hold again
+                keep = min(self.max_entries, int(count * self.max_bytes / size) if size else count)
+                cursor = conn.execute(
+                    "DELETE FROM verdicts WHERE key IN (SELECT key FROM verdicts ORDER BY stored_at ASC LIMIT ?)",
+                    (count - keep,),
+                )
+                self.trimmed += cursor.rowcount
+            conn.execute("PRAGMA incremental_vacuum")
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = await self.get_entry(key)
+        return None if entry is None else entry[0]
+
+    async def get_entry(self, key: str) -> Optional[tuple[bytes, Optional[float]]]:
+        now = time.time()
+        pending = self._pending.get(key)
+        row = pending if pending is not None else await asyncio.to_thread(self._read, key)
+        if row is None or (row[1] and row[1] <= now):
+            self.misses += 1
+            return None
+        self.hits += 1
+        value, expires_at = row
+        return value, (expires_at - now) if expires_at else None
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        self._pending[key] = (value, time.time() + ttl if ttl else 0.0)
+        if self._task is None:
+            # No background loop (e.g. used outside the app lifespan): write through
+            await self.flush()
+
+    async def delete(self, key: str) -> None:
+        self._pending.pop(key, None)
+
+        def _delete():
+            with self._lock:
+                self._connect().execute("DELETE FROM verdicts WHERE key = ?", (key,))
+        await asyncio.to_thread(_delete)
+
+    async def flush(self) -> None:
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, {}
+        rows = [(key, value, expires_at) for key, (value, expires_at) in batch.items()]
+        try:
+            await asyncio.to_thread(self._write, rows)
+            self.flushes += 1
+        except sqlite3.Error as e:
+            print(f"[Cache] L2 write failed, retrying later: {str(e)}")
+            for key, entry in batch.items():
+                self._pending.setdefault(key, entry)
+
+    async def _run(self):
+        last_compaction = time.monotonic()
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+            if time.monotonic() - last_compaction >= self.compact_interval:
+                last_compaction = time.monotonic()
+                try:
+                    await asyncio.to_thread(self._compact)
+                except sqlite3.Error as e:
+                    print(f"[Cache] L2 compaction failed: {str(e)}")
+
+    async def start(self) -> None:
+        await asyncio.to_thread(self._connect)
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def aclose(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def stats(self) -> dict:
+        return {
+            "l2_hits": self.hits,
+            "l2_misses": self.misses,
+            "l2_pending_writes": len(self._pending),
+            "l2_flushes": self.flushes,
+            "l2_trimmed": self.trimmed,
+        }
+
+
+class TieredBackend(CacheBackend):
+    """L1 in front of L2: L2 hits are promoted into L1, writes go to both."""
+    def __init__(self, l1: CacheBackend, l2: CacheBackend):
+        self.l1 = l1
+        self.l2 = l2
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = await self.get_entry(key)
+        return None if entry is None else entry[0]
+
+    async def get_entry(self, key: str) -> Optional[tuple[bytes, Optional[float]]]:
+        entry = await self.l1.get_entry(key)
+        if entry is not None:
+            return entry
+        entry = await self.l2.get_entry(key)
+        if entry is not None:
+            await self.l1.set(key, entry[0], entry[1])
+        return entry
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        await self.l1.set(key, value, ttl)
+        await self.l2.set(key, value, ttl)
+
+    async def delete(self, key: str) -> None:
+        await self.l1.delete(key)
+        await self.l2.delete(key)
+
+    async def start(self) -> None:
+        await self.l1.start()
+        await self.l2.start()
+
+    async def aclose(self) -> None:
+        await self.l1.aclose()
+        await self.l2.aclose()
+
+    def stats(self) -> dict:
+        return {**self.l1.stats(), **self.l2.stats()}
+
+
+class VerificationCache(Generic[T]):
+    """
+    Typed cache of verification verdicts.
+    Values are stored serialized, so every hit returns a fresh model that
+    callers may modify without touching the cached copy.
+    """
+    def __init__(self, backend: CacheBackend, model: Type[T], ttl: Optional[float] = None):
+        self.backend = backend
+        self.model = model
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.lookup_seconds = 0.0
+        self.max_lookup_seconds = 0.0
+
+    async def get(self, key: str) -> Optional[T]:
+        started = time.perf_counter()
+        raw = await self.backend.get(key)
+        elapsed = time.perf_counter() - started
+        self.lookup_seconds += elapsed
+        self.max_lookup_seconds = max(self.max_lookup_seconds, elapsed)
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return self.model.model_validate_json(raw)
+
+    async def set(self, key: str, value: T) -> None:
+        await self.backend.set(key, value.model_dump_json().encode(), self.ttl)
+
+    async def start(self) -> None:
+        await self.backend.start()
+
+    async def aclose(self) -> None:
+        await self.backend.aclose()
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hit_ratio,
+            "avg_lookup_us": (self.lookup_seconds / lookups * 1e6) if lookups else 0.0,
+            "max_lookup_us": self.max_lookup_seconds * 1e6,
+            **self.backend.stats(),
+        }
+
+
+class SemanticVerdictCache:
+    """
+    Near-duplicate tier. Within a scope (e.g. one PIN set) it remembers the
+    normalized embedding of every verified claim and the cache key of its
+    verdict; a new claim within `max_distance` (cosine) of a remembered one
+    reuses that verdict. Each scope is a fixed-size ring of vectors, so a
+    lookup is one matrix-vector product.
+    """
+    def __init__(self, max_distance: float, max_per_scope: int, max_scopes: int):
+        self.max_distance = max_distance
+        self.max_per_scope = max_per_scope
+        self.max_scopes = max_scopes
+        self._scopes: OrderedDict[str, "_SemanticScope"] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, scope: str, vector: np.ndarray) -> Optional[str]:
+        entry = self._scopes.get(scope)
+        match = entry.nearest(vector, self.max_distance) if entry is not None else None
+        if match is None:
+            self.misses += 1
+            return None
+        self._scopes.move_to_end(scope)
+        self.hits += 1
+        return match
+
+    def add(self, scope: str, vector: np.ndarray, key: str) -> None:
+        entry = self._scopes.get(scope)
+        if entry is None or entry.dim != vector.shape[0]:
+            entry = _SemanticScope(self.max_per_scope, vector.shape[0])
+            self._scopes[scope] = entry
+            while len(self._scopes) > self.max_scopes:
+                self._scopes.popitem(last=False)
+        self._scopes.move_to_end(scope)
+        entry.add(vector, key)
+
+    def stats(self) -> dict:
+        return {"semantic_hits": self.hits, "semantic_misses": self.misses, "semantic_scopes": len(self._scopes)}
+
+
+class _SemanticScope:
+    def __init__(self, capacity: int, dim: int):
+        self.dim = dim
+        self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self.keys: list[Optional[str]] = [None] * capacity
+        self.size = 0
+        self.cursor = 0
+
+    def nearest(self, vector: np.ndarray, max_distance: float) -> Optional[str]:
+        if self.size == 0 or vector.shape[0] != self.dim:
+            return None
+        scores = self.vectors[:self.size] @ vector
+        best = int(np.argmax(scores))
+        return self.keys[best] if 1.0 - scores[best] <= max_distance else None
+
+    def add(self, vector: np.ndarray, key: str):
+        self.vectors[self.cursor] = vector
+        self.keys[self.cursor] = key
+        self.cursor = (self.cursor + 1) % len(self.keys)
+        self.size = min(self.size + 1, len(self.keys))
@@ -0,0 +1,362 @@
+"""
+Embedding Engine - Batched embedding calls for RLM Core
+
+Sends texts to the embedding provider in size- and token-capped batches:
+- Cloud (OpenAI-compatible): arrays in the `input` field of /embeddings
+- Ollama: the batch /api/embed API when the server has it, otherwise
+  one /api/embeddings call per text fanned out under a semaphore
+
+Output order always matches input order; failures are reported per item.
+
+Also hosts EmbeddingStore, the bounded cache that keeps vectors in a
+contiguous float32 arena instead of per-text Python lists.
+"""
+import asyncio
+import hashlib
+from collections import OrderedDict
+from typing import Callable, Optional
+
+import httpx
+import numpy as np
+
+from .upstream import UpstreamPool, env_int
+
+CLOUD_EMBEDDING_MODEL = "text-embedding-3-small"
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 chars per token) used for batch capping."""
+    return len(text) // 4 + 1
+
+
+class EmbeddingResult:
+    """Embeddings in input order. Failed items are None and listed in `errors`."""
+    def __init__(self, size: int):
+        self.embeddings: list[Optional[list[float]]] = [None] * size
+        self.errors: dict[int, str] = {}
+
+    @property
+    def failed(self) -> bool:
+        return len(self.errors) == len(self.embeddings) and bool(self.embeddings)
+
+
+def _route_missing(response: httpx.Response) -> bool:
+    """
+    True when the server has no /api/embed route. Ollama also answers 404
+    for an unknown model, with a JSON {"error": "model ... not found"} body;
+    that is a per-request error and must not disable the batch API.
+    """
+    if response.status_code == 405:
+        return True
+    if response.status_code != 404:
+        return False
+    try:
+        body = response.json()
+    except ValueError:
+        return True
+    error = body.get("error", "") if isinstance(body, dict) else ""
+    return "model" not in str(error).lower()
+
+
+class EmbeddingBatcher:
+    """
+    Batching engine shared by /embed and the internal embedding lookups.
+    A single semaphore bounds in-flight upstream calls across all requests.
+    """
+    def __init__(
+        self,
+        pool: UpstreamPool,
+        use_cloud: bool,
+        cloud_base_url: str,
+        cloud_headers: Callable[[], dict],
+        ollama_base_url: str,
+        timeout: Optional[float] = None,
+    ):
+        self.pool = pool
+        self.use_cloud = use_cloud
+        self.cloud_base_url = cloud_base_url
+        self.cloud_headers = cloud_headers
+        self.ollama_base_url = ollama_base_url
+        self.timeout = timeout
+        self.max_batch_size = env_int("RLM_EMBED_BATCH_SIZE", 128)
+        self.max_batch_tokens = env_int("RLM_EMBED_BATCH_TOKENS", 8000)
+        self.concurrency = env_int("RLM_EMBED_CONCURRENCY", 8)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        # None = not probed yet; False = server only has /api/embeddings
+        self._ollama_batch_api: Optional[bool] = None
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._semaphore
+
+    def model_for(self, model: str) -> str:
+        return CLOUD_EMBEDDING_MODEL if self.use_cloud else model
+
+    def chunk(self, texts: list[str]) -> list[list[int]]:
+        """Splits input indices into batches capped by item count and estimated tokens."""
+        batches: list[list[int]] = []
+        current: list[int] = []
+        current_tokens = 0
+        for i, text in enumerate(texts):
+            tokens = estimate_tokens(text)
+            if current and (
+                len(current) >= self.max_batch_size
+                or current_tokens + tokens > self.max_batch_tokens
+            ):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(i)
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    async def embed(self, texts: list[str], model: str = "nomic-embed-text") -> EmbeddingResult:
+        result = EmbeddingResult(len(texts))
+        if texts:
+            await asyncio.gather(*[
+                self._embed_batch(batch, texts, model, result) for batch in self.chunk(texts)
+            ])
+        return result
+
+    async def _embed_batch(self, batch: list[int], texts: list[str], model: str, result: EmbeddingResult):
+        batch_texts = [texts[i] for i in batch]
+        try:
+            if self.use_cloud:
+                vectors = await self._cloud_batch(batch_texts)
+            elif self._ollama_batch_api is not False:
+                vectors = await self._ollama_batch(batch_texts, model)
+                if vectors is None:
+                    vectors = await self._ollama_fan_out(batch_texts, model, batch, result)
+            else:
+                vectors = await self._ollama_fan_out(batch_texts, model, batch, result)
+        except (httpx.HTTPError, KeyError, IndexError, ValueError) as e:
+            unknown_model = isinstance(e, httpx.HTTPStatusError) and e.response.status_code == 404
+            if len(batch) == 1 or unknown_model or isinstance(e, httpx.RequestError):
+                # Transport errors mean the provider is unreachable and an unknown
+                # model fails every item alike: don't retry per item
+                for i in batch:
+                    result.errors[i] = str(e) or type(e).__name__
+                return
+            # Retry item by item so one bad input does not fail the whole batch
+            await asyncio.gather(*[
+                self._embed_batch([i], texts, model, result) for i in batch
+            ])
+            return
+
+        for i, vector in zip(batch, vectors):
+            if vector is not None:
+                result.embeddings[i] = vector
+
+    async def _cloud_batch(self, batch_texts: list[str]) -> list[list[float]]:
+        async with self.semaphore:
+            response = await self.pool.client("cloud").post(
+                f"{self.cloud_base_url}/embeddings",
+                headers=self.cloud_headers(),
+                json={"model": CLOUD_EMBEDDING_MODEL, "input": batch_texts},
+                timeout=self.timeout,
+            )
+        response.raise_for_status()
+        data = response.json()["data"]
+        vectors: list[list[float]] = [None] * len(batch_texts)
+        for position, item in enumerate(data):
+            vectors[item.get("index", position)] = item["embedding"]
+        if any(v is None for v in vectors):
+            raise ValueError("Embedding provider returned fewer vectors than inputs")
+        return vectors
+
+    async def _ollama_batch(self, batch_texts: list[str], model: str) -> Optional[list[list[float]]]:
+        """Ollama >= 0.3 batch API. Returns None when the server does not support it."""
+        async with self.semaphore:
+            response = await self.pool.client("ollama").post(
+                f"{self.ollama_base_url}/api/embed",
+                json={"model": model, "input": batch_texts},
+                timeout=self.timeout,
+            )
+        if _route_missing(response):
+            if self._ollama_batch_api is None:
+                print("[Embeddings] Ollama batch API unavailable, falling back to per-text calls.")
+            self._ollama_batch_api = False
+            return None
+        response.raise_for_status()
+        self._ollama_batch_api = True
+        vectors = response.json()["embeddings"]
+        if len(vectors) != len(batch_texts):
+            raise ValueError("Embedding provider returned fewer vectors than inputs")
+        return vectors
+
+    async def _ollama_fan_out(
+        self, batch_texts: list[str], model: str, batch: list[int], result: EmbeddingResult
+    ) -> list[Optional[list[float]]]:
+        """Legacy /api/embeddings, one text per call, bounded by the shared semaphore."""
+        async def one(position: int, text: str) -> Optional[list[float]]:
+            try:
+                async with self.semaphore:
+                    response = await self.pool.client("ollama").post(
+                        f"{self.ollama_base_url}/api/embeddings",
+                        json={"model": model, "prompt": text},
+                        timeout=self.timeout,
+                    )
+                response.raise_for_status()
+                return response.json().get("embedding", [])
+            except (httpx.HTTPError, ValueError) as e:
+                result.errors[batch[position]] = str(e) or type(e).__name__
+                return None
+
+        return await asyncio.gather(*[one(p, t) for p, t in enumerate(batch_texts)])
+
+
+class EmbeddingStore:
+    """
+    Bounded embedding cache keyed by a content hash of (model, text).
+
+    Vectors live in one contiguous float32 arena (rows = slots) with their
+    L2 norms alongside, so lookups can return pre-normalized matrices.
+    Slots freed by LRU eviction are reused; the arena grows geometrically
+    up to the memory cap and is never larger than it.
+    """
+    MIN_ROWS = 64
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.dim: Optional[int] = None
+        self._arena: Optional[np.ndarray] = None
+        self._norms: Optional[np.ndarray] = None
+        self._slots: OrderedDict[bytes, int] = OrderedDict() # LRU order, oldest first
+        self._used = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(text: str, model: str) -> bytes:
+        return hashlib.blake2b(f"{model}\0{text}".encode(), digest_size=16).digest()
+
+    @property
+    def capacity(self) -> int:
+        if self.dim is None:
+            return 0
+        return max(1, self.max_bytes // (self.dim * 4 + 4))
+
+    @property
+    def nbytes(self) -> int:
+        if self._arena is None:
+            return 0
+        return self._arena.nbytes + self._norms.nbytes
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, key: bytes) -> bool:
+        return key in self._slots
+
+    def get(self, key: bytes) -> Optional[np.ndarray]:
+        slot = self._slots.get(key)
+        if slot is None:
+            self.misses += 1
+            return None
+        self._slots.move_to_end(key)
+        self.hits += 1
+        return self._arena[slot].copy()
+
+    def get_many(self, keys: list[bytes], normalized: bool = False) -> tuple[Optional[np.ndarray], list[int]]:
+        """
+        Returns (matrix, missing). `matrix` has one row per key (zeros for
+        misses) and `missing` lists the positions that must be fetched.
+        """
+        if self._arena is None:
+            self.misses += len(keys)
+            return None, list(range(len(keys)))
+
+        slots = np.empty(len(keys), dtype=np.intp)
+        missing: list[int] = []
+        for position, key in enumerate(keys):
+            slot = self._slots.get(key)
+            if slot is None:
+                missing.append(position)
+                slots[position] = 0
+            else:
+                self._slots.move_to_end(key)
+                slots[position] = slot
+        self.hits += len(keys) - len(missing)
+        self.misses += len(missing)
+
+        matrix = self._arena[slots] # fancy indexing copies: safe against later slot reuse
+        if normalized:
+            norms = self._norms[slots]
+            norms[norms == 0] = 1.0
+            matrix /= norms[:, None]
+        if missing:
+            matrix[missing] = 0.0
+        return matrix, missing
+
+    def put(self, key: bytes, vector) -> None:
+        vec = np.asarray(vector, dtype=np.float32)
+        if vec.ndim != 1 or vec.size == 0:
+            return
+        if self.dim != vec.size:
+            # Embedding model changed: vectors of another size cannot share the arena
+            self.evictions += len(self._slots)
+            self._reset(vec.size)
+
+        slot = self._slots.get(key)
+        if slot is None:
+            slot = self._allocate()
+            self._slots[key] = slot
+        else:
+            self._slots.move_to_end(key)
+        self._arena[slot] = vec
+        self._norms[slot] = np.linalg.norm(vec)
+
+    def clear(self) -> None:
+        self._reset(self.dim)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._slots),
+            "capacity": self.capacity,
+            "bytes": self.nbytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _reset(self, dim: Optional[int]):
+        self.dim = dim
+        self._arena = None
+        self._norms = None
+        self._slots.clear()
+        self._used = 0
+
+    def _allocate(self) -> int:
+        if self._arena is None or self._used == len(self._arena):
+            if self._arena is not None and len(self._arena) >= self.capacity:
+                # Full: evict the least recently used entry and reuse its slot
+                _, slot = self._slots.popitem(last=False)
+                self.evictions += 1
+                return slot
+            self._grow()
+        slot = self._used
+        self._used += 1
+        return slot
+
+    def _grow(self):
+        current = 0 if self._arena is None else len(self._arena)
+        rows = min(self.capacity, max(self.MIN_ROWS, current * 2))
+        arena = np.zeros((rows, self.dim), dtype=np.float32)
+        norms = np.zeros(rows, dtype=np.float32)
+        if current:
+            arena[:current] = self._arena
+            norms[:current] = self._norms
+        self._arena, self._norms = arena, norms
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first, via a partial sort."""
+    if k >= len(scores):
+        return np.argsort(-scores)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
@@ -0,0 +1,114 @@
+"""
+Embedding Encoding - Compact wire formats for /embed
+
+JSON float lists are ~10x the size of the vectors they carry and cost more
+CPU to format than the model takes to produce them. /embed can also answer:
+- Raw bytes (Accept: application/octet-stream): little-endian rows,
+  shape and dtype in X-Embedding-* headers
+- base64 (encoding_format="base64"): one string per row, OpenAI style
+- dtype float32, float16, or int8 with a per-row float32 scale
+  (value = int8 * scale)
+
+Binary layout: count x dimensions values, row-major; for int8 followed by
+count float32 scales. The same module decodes it on the client side with
+np.frombuffer, as views over the received buffer.
+"""
+import base64
+from typing import Optional, Union
+
+import numpy as np
+
+DTYPES = {"float32": np.dtype("<f4"), "float16": np.dtype("<f2"), "int8": np.dtype("i1")}
+SCALE_DTYPE = np.dtype("<f4")
+
+BufferLike = Union[bytes, bytearray, memoryview]
+
+
+class PackedEmbeddings:
+    """One contiguous byte buffer holding every row (and int8 scales)."""
+    def __init__(self, embeddings: list[Optional[list[float]]], dtype: str):
+        self.dtype = dtype
+        self.count = len(embeddings)
+        self.dimensions = next((len(e) for e in embeddings if e), 0)
+        self.failed = [i for i, e in enumerate(embeddings) if not e]
+
+        matrix = np.zeros((self.count, self.dimensions), dtype=np.float32)
+        for i, emb in enumerate(embeddings):
+            if emb:
+                matrix[i] = emb
+
+        wire = DTYPES[dtype]
+        size = self.count * self.dimensions * wire.itemsize
+        scales_size = self.count * SCALE_DTYPE.itemsize if dtype == "int8" else 0
+        # Values and scales are written straight into the response buffer
+        self.buffer = np.empty(size + scales_size, dtype=np.uint8)
+        values = self.buffer[:size].view(wire).reshape(self.count, self.dimensions)
+        self.scales: Optional[np.ndarray] = None
+        if dtype == "int8":
+            scales = self.buffer[size:].view(SCALE_DTYPE)
+            np.divide(np.abs(matrix).max(axis=1, initial=0.0), 127.0, out=scales)
+            safe = np.where(scales == 0, 1.0, scales).astype(np.float32)
+            np.rint(matrix / safe[:, None], out=matrix)
+            values[:] = matrix
+            self.scales = scales
+        else:
+            values[:] = matrix
+        self.values = values
+
+    @property
+    def body(self) -> bytes:
+        # The Starlette pinned by fastapi 0.109 only renders bytes or str content
+        return self.buffer.tobytes()
+
+    def headers(self, model: str) -> dict:
+        headers = {
+            "X-Embedding-Dtype": self.dtype,
+            "X-Embedding-Count": str(self.count),
+            "X-Embedding-Dimensions": str(self.dimensions),
+            "X-Embedding-Model": model,
+        }
+        if self.failed:
+            headers["X-Embedding-Failed"] = ",".join(map(str, self.failed))
+        return headers
+
+    def base64_rows(self) -> list[str]:
+        return [base64.b64encode(row.data).decode("ascii") for row in self.values]
+
+
+def decode_embeddings(
+    body: BufferLike, dtype: str, count: int, dimensions: int, dequantize: bool = True
+) -> Union[np.ndarray, tuple[np.ndarray, np.ndarray]]:
+    """
+    Decodes a binary /embed body into a (count, dimensions) array.
+    float32/float16 come back as read-only views over `body` (no copy).
+    int8 is dequantized to float32, or returned as (values, scales) views
+    when dequantize=False.
+    """
+    wire = DTYPES[dtype]
+    size = count * dimensions * wire.itemsize
+    values = np.frombuffer(body, dtype=wire, count=count * dimensions).reshape(count, dimensions)
+    if dtype != "int8":
+        return values
+    scales = np.frombuffer(body, dtype=SCALE_DTYPE, count=count, offset=size)
+    if not dequantize:
+        return values, scales
+    return values.astype(np.float32) * scales[:, None]
+
+
+def decode_response(response) -> np.ndarray:
+    """Decodes an httpx/requests response of a binary /embed call using its headers."""
+    headers = response.headers
+    return decode_embeddings(
+        response.content,
+        headers["X-Embedding-Dtype"],
+        int(headers["X-Embedding-Count"]),
+        int(headers["X-Embedding-Dimensions"]),
+    )
+
+
+def decode_base64_embedding(data: str, dtype: str = "float32", scale: Optional[float] = None) -> np.ndarray:
+    """Decodes one base64 row; int8 rows need their `scale`."""
+    values = np.frombuffer(base64.b64decode(data), dtype=DTYPES[dtype])
+    if dtype == "int8":
+        return values.astype(np.float32) * (scale or 0.0)
+    return values
@@ -0,0 +1,182 @@
+"""
+Axiom Registry - Versioned, incremental axiom sync to the Rust hypervisor
+
+Keeps one TruthHypervisor per project together with the axiom pool it was
+last given, a content hash and a version number. A request's pool is
+diffed against the project's current one:
+- Same content hash: nothing is sent
+- Additions and changed polarities: add_axiom() for those entries only
+- Removals: the hypervisor is rebuilt from the new pool, swapped in
+  atomically so in-flight generations keep the instance they started with
+
+The pool is the project's PIN axioms plus known fallacies (antibodies).
+Fallacies are matched per claim, so they are additive: the ones seen by
+earlier requests stay in the pool, and only PIN removals (or trimming the
+oldest fallacies past the cap) force a rebuild.
+
+RustTruthEnforcer (the llama-cpp logits processor) reuses a per-model
+map of the only tokens the hypervisor can penalize, instead of handing it
+the whole vocabulary on every generated token.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Iterable, Optional
+
+import numpy as np
+
+# Native extension built from neuro-hypervisor/ (maturin / cargo)
+try:
+    from .neuro_hypervisor import TruthHypervisor
+    HYPERVISOR_AVAILABLE = True
+except ImportError:
+    try:
+        from neuro_hypervisor import TruthHypervisor
+        HYPERVISOR_AVAILABLE = True
+    except ImportError:
+        TruthHypervisor = None
+        HYPERVISOR_AVAILABLE = False
+        print("[RLM-Core] neuro_hypervisor not available, logit-level enforcement disabled.")
+
+
+def pool_digest(pool: dict[str, bool]) -> str:
+    digest = hashlib.sha256()
+    for claim in sorted(pool):
+        digest.update(claim.encode())
+        digest.update(b"\1" if pool[claim] else b"\0")
+    return digest.hexdigest()
+
+
+class ProjectAxioms:
+    """The axiom pool a project's hypervisor currently holds."""
+    def __init__(self, hypervisor: Any):
+        self.hypervisor = hypervisor
+        self.pool: dict[str, bool] = {}
+        self.fallacies: OrderedDict[str, None] = OrderedDict() # oldest first
+        self.digest = pool_digest({})
+        self.version = 0
+
+
+class AxiomRegistry:
+    def __init__(self, factory: Optional[Callable[[], Any]], max_projects: int, max_fallacies: int = 256):
+        self.factory = factory
+        self.max_projects = max_projects
+        self.max_fallacies = max_fallacies
+        self.syncs = 0
+        self.skipped = 0
+        self.rebuilds = 0
+        self.sent = 0 # axioms pushed to a hypervisor
+        self._projects: OrderedDict[str, ProjectAxioms] = OrderedDict()
+
+    @property
+    def available(self) -> bool:
+        return self.factory is not None
+
+    def sync(self, project_id: Optional[str], axioms: dict[str, bool], fallacies: Iterable[str] = ()) -> ProjectAxioms:
+        """
+        Brings the project's hypervisor up to `axioms` plus every fallacy it
+        has been given so far, sending only the difference.
+        """
+        key = project_id or "_global"
+        state = self._projects.get(key)
+        if state is None:
+            state = ProjectAxioms(self.factory())
+            self._projects[key] = state
+            while len(self._projects) > self.max_projects:
+                self._projects.popitem(last=False)
+        else:
+            self._projects.move_to_end(key)
+
+        for claim in fallacies:
+            state.fallacies[claim] = None
+            state.fallacies.move_to_end(claim)
+        if len(state.fallacies) > self.max_fallacies:
+            # Trim well below the cap, so the rebuild this causes stays rare
+            while len(state.fallacies) > self.max_fallacies * 3 // 4:
+                state.fallacies.popitem(last=False)
+        pool = dict.fromkeys(state.fallacies, False)
+        pool.update(axioms) # a PIN outranks an antibody with the same text
+
+        digest = pool_digest(pool)
+        if digest == state.digest:
+            self.skipped += 1
+            return state
+
+        if any(claim not in pool for claim in state.pool):
+            # The extension has no removal: build a fresh instance and swap it in
+            hypervisor = self.factory()
+            for claim, is_true in pool.items():
+                hypervisor.add_axiom(claim, is_true)
+            state.hypervisor = hypervisor
+            self.rebuilds += 1
+            self.sent += len(pool)
+        else:
+            changed = {c: t for c, t in pool.items() if state.pool.get(c) != t}
+            for claim, is_true in changed.items():
+                state.hypervisor.add_axiom(claim, is_true)
+            self.sent += len(changed)
+
+        state.pool = dict(pool)
+        state.digest = digest
+        state.version += 1
+        self.syncs += 1
+        return state
+
+    def stats(self) -> dict:
+        return {
+            "projects": len(self._projects),
+            "syncs": self.syncs,
+            "skipped": self.skipped,
+            "rebuilds": self.rebuilds,
+            "axioms_sent": self.sent,
+        }
+
+
+# Token texts calculate_logit_bias() looks up (veto and caution lists in
+# neuro-hypervisor/src/lib.rs); keep in sync with the extension
+BIAS_TOKENS = frozenset({
+    "sí", "si", "yes", "cierto", "correct", "true", "correctamente",
+    "efectivamente", "así es", "exacto", "perfecto", "claro", "por supuesto",
+    "siempre", "nunca", "obligatorio", "always", "never",
+})
+
+_vocab_cache: dict[str, dict[str, int]] = {}
+_vocab_lock = threading.Lock()
+
+
+def token_vocab(llm: Any) -> dict[str, int]:
+    """Lowercased token text -> id for BIAS_TOKENS, built once per model file."""
+    key = getattr(llm, "model_path", None) or str(id(llm))
+    with _vocab_lock:
+        vocab = _vocab_cache.get(key)
+        if vocab is None:
+            vocab = {}
+            for token_id in range(llm.n_vocab()):
+                text = llm.detokenize([token_id]).decode("utf-8", errors="ignore").strip().lower()
+                if text in BIAS_TOKENS and text not in vocab:
+                    vocab[text] = token_id
+            _vocab_cache[key] = vocab
+    return vocab
+
+
+class RustTruthEnforcer:
+    """
+    llama-cpp logits processor: asks the hypervisor for penalties given the
+    text so far and applies them to the next-token scores. Only the tokens
+    added since the previous step are detokenized.
+    """
+    def __init__(self, llm: Any, hypervisor: Any):
+        self.llm = llm
+        self.hypervisor = hypervisor
+        self.vocab = token_vocab(llm)
+        self._text = ""
+        self._seen = 0
+
+    def __call__(self, input_ids: np.ndarray, scores: np.ndarray) -> np.ndarray:
+        if len(input_ids) > self._seen:
+            new_ids = [int(i) for i in input_ids[self._seen:]]
+            self._text += self.llm.detokenize(new_ids).decode("utf-8", errors="ignore")
+            self._seen = len(input_ids)
+        for token_id, bias in self.hypervisor.calculate_logit_bias(self._text, self.vocab).items():
+            scores[token_id] += bias
+        return scores
@@ -0,0 +1,147 @@
+"""
+Inference Executor - Off-loop execution of blocking llama-cpp work
+
+llama-cpp calls are synchronous and hold a core (or all of them) for the
+whole generation. Running them inside an `async def` freezes the event loop,
+so every other endpoint, cache hits included, waits behind one prompt.
+
+All local inference goes through a dedicated worker pool instead:
+- A bounded number of pending jobs; past that, callers get InferenceBusy
+  (served as 503 + Retry-After) instead of an ever-growing backlog
+- Streaming jobs push tokens back to the event loop through an asyncio.Queue
+- A streaming job stops at the next token once its consumer goes away
+  (client disconnect, early interrupt), freeing the worker
+"""
+import asyncio
+import functools
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Iterable, Optional, TypeVar
+
+T = TypeVar("T")
+
+_ITEM, _ERROR, _DONE = range(3)
+
+
+class InferenceBusy(Exception):
+    """Every worker is busy and the pending queue is full."""
+    def __init__(self, retry_after: int):
+        super().__init__("Local inference queue is full")
+        self.retry_after = retry_after
+
+
+class InferenceExecutor:
+    """
+    Thread pool dedicated to local model calls. llama.cpp releases the GIL
+    while evaluating, so threads run in parallel; a process pool would have
+    to reload the GGUF in every process.
+    """
+    def __init__(self, workers: int, max_pending: int, retry_after: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.retry_after = retry_after
+        self.completed = 0
+        self.rejected = 0
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    @property
+    def pool(self) -> ThreadPoolExecutor:
+        # Created lazily so the executor can be restarted after shutdown()
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="rlm-inference")
+        return self._pool
+
+    async def run(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        """Runs a blocking call on the pool. Raises InferenceBusy when saturated."""
+        return await asyncio.wrap_future(self._submit(functools.partial(fn, *args, **kwargs)))
+
+    def stream(self, fn: Callable[[], Iterable[T]]) -> AsyncIterator[T]:
+        """
+        Runs a blocking generator on the pool and yields its items on the loop.
+        Admission happens immediately (InferenceBusy is raised here, before any
+        response has started); generation starts as soon as a worker is free.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        cancel = threading.Event()
+
+        def emit(kind: int, value=None):
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, (kind, value))
+            except RuntimeError:
+                cancel.set() # event loop already closed
+
+        def produce():
+            iterator = None
+            try:
+                if cancel.is_set():
+                    return
+                iterator = fn()
+                for item in iterator:
+                    if cancel.is_set():
+                        break
+                    emit(_ITEM, item)
+            except BaseException as e:
+                emit(_ERROR, e)
+            finally:
+                close = getattr(iterator, "close", None)
+                if close is not None:
+                    close()
+                emit(_DONE)
+
+        self._submit(produce)
+        return self._drain(queue, cancel)
+
+    @staticmethod
+    async def _drain(queue: asyncio.Queue, cancel: threading.Event) -> AsyncIterator:
+        try:
+            while True:
+                kind, value = await queue.get()
+                if kind == _DONE:
+                    return
+                if kind == _ERROR:
+                    raise value
+                yield value
+        finally:
+            # Consumer finished or went away: stop generating at the next token
+            cancel.set()
+
+    def _submit(self, fn: Callable[[], T]) -> Future:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise InferenceBusy(self.retry_after)
+            self._pending += 1
+        try:
+            future = self.pool.submit(fn)
+        except BaseException:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, future: Optional[Future]):
+        with self._lock:
+            self._pending -= 1
+            if future is not None and not future.cancelled():
+                self.completed += 1
+
+    def shutdown(self):
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "pending": self._pending,
+            "max_pending": self.max_pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,297 @@
+"""
+Local Model Manager - Lifecycle of the llama-cpp GGUF instances
+
+Owns every llama-cpp model in the process:
+- Loading is lazy (first request), eager (during startup) or off
+- GGUF weights are mmap-backed, so extra instances share the page cache
+  instead of each holding a private copy of the weights
+- Each freshly loaded instance runs a one-token warm-up, so the first
+  real request does not pay for page faults and buffer allocation
+- N instances, each with its own thread budget, are checked out one per
+  request by the inference workers
+- Instances are unloaded after a configurable idle period
+
+PrefixStateCache keeps the evaluated KV state of shared prompt prefixes
+(preambles, invariant blocks), so a request only evaluates its own suffix.
+"""
+import asyncio
+import hashlib
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional
+
+LOAD_MODES = ("lazy", "eager", "off")
+ACQUIRE_RECHECK = 0.5 # seconds between re-checks while waiting for an instance
+
+
+class PrefixStateCache:
+    """
+    LRU of llama-cpp states keyed by (model, prefix hash), capped in bytes.
+    States are plain copies of the context, so one cached prefix serves every
+    instance of the same model. Called from the inference workers.
+    """
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.reused = 0
+        self.evictions = 0
+        self._states: OrderedDict[bytes, Any] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(model: str, prefix: str) -> bytes:
+        return hashlib.blake2b(f"{model}\0{prefix}".encode(), digest_size=16).digest()
+
+    def prime(self, llm: Any, model: str, prefix: str):
+        """
+        Leaves `llm` with `prefix` already evaluated. llama-cpp then skips the
+        matching tokens of the next prompt and only evaluates the suffix.
+        """
+        if self.max_bytes <= 0 or not prefix:
+            return
+        tokens = llm.tokenize(prefix.encode("utf-8"))
+        if llm.n_tokens >= len(tokens) and list(llm.input_ids[:len(tokens)]) == tokens:
+            # The instance still holds this prefix from its previous request
+            self.reused += 1
+            return
+
+        key = self.key(model, prefix)
+        with self._lock:
+            state = self._states.get(key)
+            if state is not None:
+                self._states.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+        if state is not None:
+            llm.load_state(state)
+            return
+
+        llm.reset()
+        llm.eval(tokens)
+        state = llm.save_state()
+        size = state.llama_state_size
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._states.pop(key, None)
+            if previous is not None:
+                self.nbytes -= previous.llama_state_size
+            while self._states and self.nbytes + size > self.max_bytes:
+                _, evicted = self._states.popitem(last=False)
+                self.nbytes -= evicted.llama_state_size
+                self.evictions += 1
+            self._states[key] = state
+            self.nbytes += size
+
+    def clear(self):
+        with self._lock:
+            self._states.clear()
+            self.nbytes = 0
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._states),
+            "bytes": self.nbytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "reused": self.reused,
+            "evictions": self.evictions,
+        }
+
+
+class LocalModelManager:
+    """
+    Pool of llama-cpp instances. checkout() is blocking and meant to be
+    called from the inference workers, never from the event loop.
+    """
+    def __init__(
+        self,
+        factory: Optional[Callable[..., Any]],
+        model_path: str,
+        mode: str = "lazy",
+        instances: int = 1,
+        n_threads: Optional[int] = None,
+        n_ctx: int = 4096,
+        use_mlock: bool = False,
+        warmup: bool = True,
+        idle_unload: float = 0.0,
+        prefix_cache_bytes: int = 0,
+    ):
+        if mode not in LOAD_MODES:
+            print(f"[Models] Unknown load mode '{mode}', using 'lazy'.")
+            mode = "lazy"
+        self.factory = factory
+        self.model_path = model_path
+        self.mode = mode
+        self.instances = max(1, instances)
+        # Split the cores between instances so they don't oversubscribe the CPU
+        self.n_threads = n_threads or max(1, (os.cpu_count() or 1) // self.instances)
+        self.n_ctx = n_ctx
+        self.use_mlock = use_mlock
+        self.warmup = warmup
+        self.idle_unload = idle_unload
+        self.prefix_cache = PrefixStateCache(prefix_cache_bytes)
+        self.loads = 0
+        self.unloads = 0
+        self.load_seconds = 0.0
+        self._free: queue.LifoQueue = queue.LifoQueue() # LIFO keeps the hottest instance busy
+        self._loaded = 0
+        self._in_use = 0
+        self._last_used = time.monotonic()
+        self._lock = threading.Lock()
+        self._reaper: Optional[asyncio.Task] = None
+
+    @property
+    def available(self) -> bool:
+        return self.mode != "off" and self.factory is not None and os.path.exists(self.model_path)
+
+    @property
+    def loaded(self) -> int:
+        return self._loaded
+
+    async def start(self):
+        if not self.available:
+            if self.mode != "off" and self.factory is not None:
+                print(f"[Models] {self.model_path} not found, surgical inference disabled.")
+            return
+        if self.mode == "eager":
+            await asyncio.to_thread(self.preload)
+        if self.idle_unload > 0:
+            self._reaper = asyncio.create_task(self._reap())
+
+    async def aclose(self):
+        if self._reaper is not None:
+            self._reaper.cancel()
+            self._reaper = None
+        await asyncio.to_thread(self.unload)
+
+    def preload(self):
+        """Loads (and warms up) every instance up front."""
+        with self._lock:
+            missing = self.instances - self._loaded
+            self._loaded += missing
+        for _ in range(missing):
+            try:
+                self._free.put(self._load())
+            except BaseException:
+                with self._lock:
+                    self._loaded -= 1
+                raise
+
+    @contextmanager
+    def checkout(self) -> Iterator[Any]:
+        """Borrows an instance for one generation, loading it on first use."""
+        llm = self._acquire()
+        try:
+            yield llm
+        finally:
+            with self._lock:
+                self._in_use -= 1
+                self._last_used = time.monotonic()
+            self._free.put(llm)
+
+    def prime(self, llm: Any, prefix: str):
+        """Restores (or evaluates and caches) the KV state of a shared prompt prefix."""
+        self.prefix_cache.prime(llm, f"{self.model_path}:{self.n_ctx}", prefix)
+
+    def unload(self):
+        """Drops every idle instance. Instances checked out right now are kept."""
+        # Draining and the count change happen under one lock, so _acquire never
+        # sees an empty queue while _loaded still counts the dropped instances
+        idle = []
+        with self._lock:
+            while True:
+                try:
+                    idle.append(self._free.get_nowait())
+                except queue.Empty:
+                    break
+            self._loaded -= len(idle)
+            if idle and self._loaded == 0:
+                # Nothing left to restore into: release the prefix states too
+                self.prefix_cache.clear()
+        for llm in idle:
+            close = getattr(llm, "close", None)
+            if close is not None:
+                close()
+        if idle:
+            self.unloads += len(idle)
+            print(f"[Models] Unloaded {len(idle)} idle instance(s).")
+
+    def stats(self) -> dict:
+        return {
+            "mode": self.mode,
+            "available": self.available,
+            "instances": self.instances,
+            "loaded": self._loaded,
+            "in_use": self._in_use,
+            "n_threads": self.n_threads,
+            "loads": self.loads,
+            "unloads": self.unloads,
+            "load_seconds": round(self.load_seconds, 3),
+            "prefix_cache": self.prefix_cache.stats(),
+        }
+
+    def _acquire(self) -> Any:
+        with self._lock:
+            self._in_use += 1
+        try:
+            while True:
+                with self._lock:
+                    try:
+                        return self._free.get_nowait()
+                    except queue.Empty:
+                        pass
+                    load = self._loaded < self.instances
+                    if load:
+                        self._loaded += 1
+                if load:
+                    try:
+                        return self._load()
+                    except BaseException:
+                        with self._lock:
+                            self._loaded -= 1
+                        raise
+                # Wait for an instance to be returned; the timeout re-checks the count,
+                # in case the instance being waited for was unloaded instead
+                try:
+                    return self._free.get(timeout=ACQUIRE_RECHECK)
+                except queue.Empty:
+                    continue
+        except BaseException:
+            with self._lock:
+                self._in_use -= 1
+            raise
+
+    def _load(self) -> Any:
+        started = time.perf_counter()
+        llm = self.factory(
+            model_path=self.model_path,
+            n_ctx=self.n_ctx,
+            n_threads=self.n_threads,
+            n_threads_batch=self.n_threads,
+            use_mmap=True,
+            use_mlock=self.use_mlock,
+            verbose=False,
+        )
+        if self.warmup:
+            llm("Hello", max_tokens=1)
+        elapsed = time.perf_counter() - started
+        self.loads += 1
+        self.load_seconds += elapsed
+        print(f"[Models] Loaded {os.path.basename(self.model_path)} ({self.n_threads} threads) in {elapsed:.2f}s")
+        return llm
+
+    async def _reap(self):
+        interval = min(self.idle_unload, 60.0)
+        while True:
+            await asyncio.sleep(interval)
+            idle = time.monotonic() - self._last_used
+            if self._loaded and self._in_use == 0 and idle >= self.idle_unload:
+                await asyncio.to_thread(self.unload)
@@ -7,7 +7,11 @@ FastAPI microservice that provides:
 3. Local embedding generation
 """
 import os
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+import asyncio
+import hmac
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 from typing import Literal, Optional
@@ -16,7 +20,7 @@ import json
 from jose import jwt, JWTError
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi import Depends
-from datetime import datetime
+from datetime import datetime, timezone
 import numpy as np
 import math
 from functools import lru_cache
@@ -30,10 +34,58 @@ except ImportError:
     LLAMA_CPP_AVAILABLE = False
     print("[RLM-Core] llama-cpp-python not available, surgical inference disabled.")
 
+from .upstream import UpstreamConfig, UpstreamPool, env_bool, env_float, env_int
+from .embeddings import EmbeddingBatcher, EmbeddingStore, top_k_indices
+from .cache import MemoryBackend, SemanticVerdictCache, SQLiteBackend, TieredBackend, VerificationCache
+from .singleflight import SingleFlight
+from .scheduler import ModelScheduler, SchedulerSaturated, priority_for
+from .router import RouteDecision, RouteTarget, SmartRouter
+from .resilience import BreakerRegistry, Hedger
+from .inference import InferenceBusy, InferenceExecutor
+from .local_models import LocalModelManager
+from .axioms import AxiomMatcherCache
+from .hypervisor import AxiomRegistry, RustTruthEnforcer, TruthHypervisor
+from .streaming import bicameral_frames, json_loads
+from .encoding import PackedEmbeddings
+from .metrics import (
+    CACHE_EVENTS, FALLBACKS, TTFT_SECONDS, VECTOR_SKIP, InstrumentedTransport, MetricsMiddleware,
+    SamplingProfiler, registry as metrics_registry, stage,
+)
+from .audits import AuditCallback, AuditPipeline, TokenBucket
+from .antibodies import (
+    AntibodyIndex, AntibodySync, AntibodyWriter, LocalAntibodyStore, SupabaseAntibodyStore, WriterFull
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Opens the pooled upstream clients on startup and drains them on shutdown."""
+    await upstreams.start()
+    await verification_cache.start()
+    await local_models.start()
+    await antibody_sync.start()
+    await antibody_writer.start()
+    await audit_pipeline.start()
+    if profiler:
+        profiler.start()
+    try:
+        yield
+    finally:
+        if profiler:
+            profiler.stop()
+        await audit_pipeline.aclose()
+        await antibody_writer.aclose()
+        await antibody_sync.aclose()
+        await verification_cache.aclose()
+        await upstreams.aclose()
+        inference_executor.shutdown()
+        await local_models.aclose()
+
 app = FastAPI(
     title="RLM Core",
     description="Local Reasoning Engine for WorkGraph OS",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 security = HTTPBearer()
@@ -43,18 +95,8 @@ security = HTTPBearer()
 OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
 DEFAULT_LOCAL_MODEL = os.getenv("DEFAULT_LOCAL_MODEL", "phi3:mini")
 SUPABASE_JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET")
-
-# Cloud Configuration (Render Support)
-OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-USE_CLOUD_EMBEDDINGS = bool(OPENROUTER_API_KEY or OPENAI_API_KEY)
-
-if USE_CLOUD_EMBEDDINGS:
-    print(f"[RLM-Core] Cloud Mode Activated. Using {'OpenRouter' if OPENROUTER_API_KEY else 'OpenAI'} for embeddings/verification.")
-    # Default to a cheap, good cloud model if using cloud
-    if DEFAULT_LOCAL_MODEL == "phi3:mini": 
-        DEFAULT_LOCAL_MODEL = "openai/gpt-4o-mini" if OPENROUTER_API_KEY else "gpt-4o-mini"
-
+# Bearer token for the ops endpoints (stats, metrics, profiler); without it they take a user JWT
+ADMIN_TOKEN = os.getenv("RLM_ADMIN_TOKEN")
 
 # Cloud Configuration (Render Support)
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
@@ -73,27 +115,45 @@ if IS_RENDER_DEPLOYMENT:
     
     print("[RLM-Core] PRODUCTION MODE: Strict checks passed. Cloud Engine Active.")
 
+# Local (Ollama) and cloud models are configured separately; the router picks per request
+DEFAULT_CLOUD_MODEL = os.getenv("DEFAULT_CLOUD_MODEL") or (
+    "openai/gpt-4o-mini" if OPENROUTER_API_KEY else "gpt-4o-mini"
+)
+
 if USE_CLOUD_EMBEDDINGS:
-    print(f"[RLM-Core] Cloud Mode Activated. Using {'OpenRouter' if OPENROUTER_API_KEY else 'OpenAI'} for embeddings/verification.")
-    # Default to a cheap, good cloud model if using cloud
-    if DEFAULT_LOCAL_MODEL == "phi3:mini": 
-        DEFAULT_LOCAL_MODEL = "openai/gpt-4o-mini" if OPENROUTER_API_KEY else "gpt-4o-mini"
+    print(f"[RLM-Core] Cloud Mode Activated. Using {'OpenRouter' if OPENROUTER_API_KEY else 'OpenAI'} for embeddings/verification ({DEFAULT_CLOUD_MODEL}).")
+
+
+_jwt_bypass_warned = False
 
 
-def verify_jwt(credentials: HTTPAuthorizationCredentials = Depends(security)):
+def verify_jwt(request: Request, credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Validates the Supabase JWT. Zero Trust enforcement."""
+    global _jwt_bypass_warned
     if not SUPABASE_JWT_SECRET:
         # [DEV-MODE-ONLY] Allow bypassing if secret is missing to prevent 500 crashes during onboarding
-        print("[Security] WARNING: SUPABASE_JWT_SECRET not set. Bypassing JWT verification (Development Mode).")
+        if not _jwt_bypass_warned:
+            _jwt_bypass_warned = True
+            print("[Security] WARNING: SUPABASE_JWT_SECRET not set. Bypassing JWT verification (Development Mode).")
         return {"sub": "dev-user", "role": "authenticated"}
     
-    try:
-        token = credentials.credentials
-        payload = jwt.decode(token, SUPABASE_JWT_SECRET, algorithms=["HS256"], audience="authenticated")
-        return payload
-    except JWTError as e:
-        raise HTTPException(status_code=401, detail=f"Unauthorized: {str(e)}")
-
+    with stage(request.url.path, "auth"):
+        try:
+            token = credentials.credentials
+            payload = jwt.decode(token, SUPABASE_JWT_SECRET, algorithms=["HS256"], audience="authenticated")
+            return payload
+        except JWTError as e:
+            raise HTTPException(status_code=401, detail=f"Unauthorized: {str(e)}")
+
+def verify_admin(request: Request, credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """Guards the ops endpoints: the admin token when RLM_ADMIN_TOKEN is set, a valid JWT otherwise."""
+    if not ADMIN_TOKEN:
+        return verify_jwt(request, credentials)
+    if not hmac.compare_digest(credentials.credentials.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Unauthorized: invalid admin token")
+    return {"sub": "admin", "role": "admin"}
+
+app.add_middleware(MetricsMiddleware, known_paths=lambda: {route.path for route in app.routes})
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -103,8 +163,146 @@ app.add_middleware(
 )
 
 # Configuration
-DEFAULT_LOCAL_MODEL = os.getenv("DEFAULT_LOCAL_MODEL", "phi3:mini")
 MODEL_PATH = os.getenv("MODEL_PATH", "models/phi-3-mini-4k-instruct-q4.gguf")
+CLOUD_API_BASE_URL = os.getenv("CLOUD_API_BASE_URL") or (
+    "https://openrouter.ai/api/v1" if OPENROUTER_API_KEY else "https://api.openai.com/v1"
+)
+VERIFY_TIMEOUT = env_float("RLM_VERIFY_TIMEOUT", 30.0)
+EMBED_TIMEOUT = env_float("RLM_EMBED_TIMEOUT", 60.0)
+
+
+def cloud_headers() -> dict:
+    """Auth headers for the OpenAI-compatible cloud API (OpenRouter or OpenAI)."""
+    headers = {"Authorization": f"Bearer {OPENROUTER_API_KEY or OPENAI_API_KEY}"}
+    if OPENROUTER_API_KEY:
+        headers["HTTP-Referer"] = "https://agent-shield.com"
+        headers["X-Title"] = "AgentShield RLM"
+    return headers
+
+
+# --- [CONNECTION POOL] One keep-alive client per upstream ---
+upstreams = UpstreamPool()
+upstreams.register(UpstreamConfig("cloud", timeout=30.0, http2=True))
+upstreams.register(UpstreamConfig("ollama", timeout=60.0))
+upstreams.register(UpstreamConfig("supabase", timeout=10.0, http2=True))
+upstreams.register(UpstreamConfig("webhook", timeout=10.0))
+# Status and latency of every upstream call feed /metrics
+upstreams.add_layer(InstrumentedTransport)
+# Fail fast while an upstream is down instead of waiting out its timeout
+upstream_breakers = BreakerRegistry(
+    failure_threshold=env_int("RLM_BREAKER_FAILURES", 5),
+    cooldown=env_float("RLM_BREAKER_COOLDOWN", 10.0),
+    probes=env_int("RLM_BREAKER_PROBES", 1),
+    enabled=env_bool("RLM_BREAKER", True)
+)
+upstreams.add_layer(upstream_breakers.layer)
+
+# --- [SCHEDULER] Admission control for upstream LLM calls ---
+model_scheduler = ModelScheduler(
+    window=env_float("RLM_SCHED_WINDOW_MS", 2.0) / 1000,
+    max_queue=env_int("RLM_SCHED_MAX_QUEUE", 256),
+    concurrency={
+        "ollama": env_int("RLM_SCHED_LOCAL_CONCURRENCY", 2),
+        "cloud": env_int("RLM_SCHED_CLOUD_CONCURRENCY", 32)
+    },
+    default_concurrency=8
+)
+
+# --- [SMART ROUTER] Local vs. cloud per request, from live telemetry ---
+smart_router = SmartRouter(
+    local=RouteTarget(
+        "local", "ollama", DEFAULT_LOCAL_MODEL,
+        enabled=env_bool("RLM_ROUTE_LOCAL", not USE_CLOUD_EMBEDDINGS)
+    ),
+    cloud=RouteTarget(
+        "cloud", "cloud", DEFAULT_CLOUD_MODEL, enabled=USE_CLOUD_EMBEDDINGS,
+        price_in=env_float("RLM_CLOUD_PRICE_IN", 0.15), price_out=env_float("RLM_CLOUD_PRICE_OUT", 0.60)
+    ),
+    quality=RouteTarget(
+        "cloud", "cloud", os.getenv("RLM_ROUTE_QUALITY_MODEL", "gpt-4o"), enabled=USE_CLOUD_EMBEDDINGS,
+        price_in=env_float("RLM_QUALITY_PRICE_IN", 5.0), price_out=env_float("RLM_QUALITY_PRICE_OUT", 15.0)
+    ),
+    scheduler=model_scheduler,
+    prefer="cloud" if USE_CLOUD_EMBEDDINGS else "local",
+    slo=env_float("RLM_ROUTE_SLO_MS", 2000.0) / 1000,
+    hourly_budget=env_float("RLM_CLOUD_BUDGET_PER_HOUR", 0.0),
+    window=env_float("RLM_ROUTE_WINDOW", 60.0),
+    max_error_rate=env_float("RLM_ROUTE_MAX_ERROR_RATE", 0.5)
+)
+# Opt-in: race a /verify call that outlives its target's p95 against the other target
+HEDGE_VERIFY = env_bool("RLM_HEDGE_VERIFY", False)
+verify_hedger = Hedger(min_delay=env_float("RLM_HEDGE_MIN_MS", 50.0) / 1000)
+
+# --- [LOCAL MODELS] GGUF instances for surgical inference ---
+local_models = LocalModelManager(
+    Llama,
+    MODEL_PATH,
+    mode=os.getenv("RLM_MODEL_LOAD", "lazy").strip().lower(),
+    instances=env_int("RLM_MODEL_INSTANCES", 1),
+    n_threads=env_int("RLM_MODEL_THREADS", 0) or None,
+    n_ctx=env_int("RLM_MODEL_CTX", 4096),
+    use_mlock=env_bool("RLM_MODEL_MLOCK", False),
+    warmup=env_bool("RLM_MODEL_WARMUP", True),
+    idle_unload=env_float("RLM_MODEL_IDLE_UNLOAD", 0.0),
+    prefix_cache_bytes=env_int("RLM_PREFIX_CACHE_MB", 256) * 1024 * 1024
+)
+
+# Shared preamble of the surgical endpoints
+SURGICAL_PREAMBLE = "Eres un asistente veraz. Di la verdad absoluta.\n"
+
+
+def surgical_prefix(pin_nodes: list[dict]) -> str:
+    """
+    Preamble plus the PIN invariant block: the part of the prompt shared by
+    every request with the same PINs. Its KV state is cached per model and
+    prefix hash, so a request only evaluates its question.
+    """
+    invariants = sorted({node_text(pin) for pin in pin_nodes})
+    if not invariants:
+        return SURGICAL_PREAMBLE
+    return SURGICAL_PREAMBLE + "Invariantes:\n" + "".join(f"- {text}\n" for text in invariants)
+
+# Compiled contradiction scanners for the neuro-symbolic stream, per axiom set
+axiom_matchers = AxiomMatcherCache(env_int("RLM_AXIOM_MATCHER_CACHE", 64))
+
+# Per-project axiom pools held by the Rust hypervisor, synced by diff
+axiom_registry = AxiomRegistry(
+    TruthHypervisor,
+    env_int("RLM_AXIOM_PROJECTS", 256),
+    max_fallacies=env_int("RLM_AXIOM_FALLACIES", 256)
+)
+
+# Keep the Ollama model resident between requests. Ollama reuses the KV cache
+# of a slot's previous prompt up to the first differing token, so prompts keep
+# their shared parts (instructions, invariants) first and per-request parts last.
+OLLAMA_KEEP_ALIVE = os.getenv("RLM_OLLAMA_KEEP_ALIVE", "30m")
+
+# --- [INFERENCE] llama-cpp runs on its own workers, never on the event loop ---
+# One worker per model instance: a llama.cpp context is not thread-safe
+inference_executor = InferenceExecutor(
+    workers=local_models.instances,
+    max_pending=env_int("RLM_INFERENCE_MAX_PENDING", 8),
+    retry_after=env_int("RLM_INFERENCE_RETRY_AFTER", 5)
+)
+
+
+def inference_busy(e: InferenceBusy) -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Local inference saturated, retry later",
+        headers={"Retry-After": str(e.retry_after)}
+    )
+
+
+# --- [BATCHING] Embedding Engine ---
+embedding_batcher = EmbeddingBatcher(
+    upstreams,
+    use_cloud=USE_CLOUD_EMBEDDINGS,
+    cloud_base_url=CLOUD_API_BASE_URL,
+    cloud_headers=cloud_headers,
+    ollama_base_url=OLLAMA_BASE_URL,
+    timeout=EMBED_TIMEOUT
+)
 
 # --- Pydantic Models ---
 class VerificationRequest(BaseModel):
@@ -125,11 +323,44 @@ class VerificationResponse(BaseModel):
 class EmbeddingRequest(BaseModel):
     texts: list[str]
     model: str = "nomic-embed-text"
+    # "base64" or Accept: application/octet-stream enable the compact dtypes
+    encoding_format: Literal["float", "base64"] = "float"
+    dtype: Literal["float32", "float16", "int8"] = "float32"
+
+class EmbeddingError(BaseModel):
+    index: int
+    detail: str
 
 class EmbeddingResponse(BaseModel):
-    embeddings: list[list[float]]
+    embeddings: list[list[float]] # Failed items are empty lists, see `errors`
     model_used: str
     dimensions: int
+    errors: list[EmbeddingError] = []
+
+class BatchClaim(BaseModel):
+    claim: str
+    context: list[dict] = []
+    node_id: Optional[str] = None
+
+class BatchVerificationRequest(BaseModel):
+    """Many claims checked against one shared invariant set."""
+    claims: list[BatchClaim]
+    pin_nodes: list[dict] = []
+    project_id: Optional[str] = None
+    task_complexity: Literal["LOW", "MEDIUM", "HIGH"] = "MEDIUM"
+
+    def requests(self) -> list[VerificationRequest]:
+        return [
+            VerificationRequest(
+                claim=c.claim,
+                context=c.context,
+                pin_nodes=self.pin_nodes,
+                node_id=c.node_id,
+                project_id=self.project_id,
+                task_complexity=self.task_complexity
+            )
+            for c in self.claims
+        ]
 
 class SmartRouteRequest(BaseModel):
     input_tokens: int
@@ -142,6 +373,7 @@ class SmartRouteResponse(BaseModel):
     recommended_model: str
     estimated_cost_usd: float
     reasoning: str
+    predicted_latency_ms: Optional[float] = None
 
 class RecyclePayload(BaseModel):
     user_prompt: str
@@ -151,256 +383,620 @@ class RecyclePayload(BaseModel):
 
 # --- [L1 CACHE] Logic Memory (Cost: $0.00) ---
 import hashlib
+import tempfile
+import uuid
+from collections import OrderedDict
 
-class VerificationCache:
+def normalize_text(text: str) -> str:
+    return " ".join(text.split())
+
+
+class VerificationPrompt:
     """
-    In-Memory LRU Cache for Verification Results.
-    Prevents paying for the same thought twice.
+    The exact inputs the model sees for a /verify request.
+    Cache keys are derived from these, not from the raw request, so fields
+    the prompt ignores (context beyond 5 nodes, text past 200 chars,
+    whitespace) never cause a miss. The keys leave out the route target:
+    every target gets the same prompt, so a verdict is looked up before
+    routing and reused when the router spills to the other target.
     """
-    def __init__(self, capacity: int = 1000):
-        self.capacity = capacity
-        self.cache = {}
-        self.order = [] # simple LRU tracking
-
-    def _generate_key(self, req: VerificationRequest) -> str:
-        # Canonicalize the request to a stable hash
-        # We include claim, context (sorted), and pins (sorted)
-        # We rely on stable JSON serialization
-        
-        # 1. Simplify Context/Pins to deterministic strings
-        ctx_str = json.dumps(req.context, sort_keys=True, default=str)
-        pin_str = json.dumps(req.pin_nodes, sort_keys=True, default=str)
-        
-        raw_key = f"{req.claim}|{ctx_str}|{pin_str}|{req.task_complexity}"
+    MAX_CONTEXT_NODES = 5
+    MAX_NODE_CHARS = 200
+
+    def __init__(self, req: VerificationRequest):
+        self.task_complexity = req.task_complexity
+        self.claim = normalize_text(req.claim)
+        self.context_summary = "\n".join([
+            f"- [{n.get('type', 'node')}] {normalize_text(node_text(n))[:self.MAX_NODE_CHARS]}"
+            for n in req.context[:self.MAX_CONTEXT_NODES]
+        ])
+        # Sorted so the invariant block, which leads the prompt, is byte-identical
+        # for the same PIN set and the upstream can reuse its evaluated prefix
+        self.pin_summary = "\n".join(sorted(
+            f"- [PIN] {normalize_text(node_text(n))[:self.MAX_NODE_CHARS]}"
+            for n in req.pin_nodes
+        ))
+
+    @property
+    def text(self) -> str:
+        return f"""You are a logic verification engine. Determine if the following CLAIM is consistent with the established INVARIANTS (PIN nodes).
+
+INVARIANTS (GROUND TRUTH - Cannot be contradicted):
+{self.pin_summary if self.pin_summary else "No invariants established."}
+
+CONTEXT:
+{self.context_summary if self.context_summary else "No additional context."}
+
+CLAIM TO VERIFY:
+{self.claim}
+
+Respond in JSON format:
+{{"consistent": true/false, "confidence": 0.0-1.0, "reasoning": "brief explanation"}}
+"""
+
+    @property
+    def cache_key(self) -> str:
+        raw_key = "\0".join([self.task_complexity, self.pin_summary, self.context_summary, self.claim])
         return hashlib.sha256(raw_key.encode()).hexdigest()
 
-    def get(self, req: VerificationRequest) -> Optional[VerificationResponse]:
-        key = self._generate_key(req)
-        if key in self.cache:
-            # Move to end (Recently Used)
-            self.order.remove(key)
-            self.order.append(key)
-            print(f"[Cache] HIT for claim: {req.claim[:30]}...")
-            return self.cache[key]
-        return None
-
-    def set(self, req: VerificationRequest, res: VerificationResponse):
-        key = self._generate_key(req)
-        if key in self.cache:
-            self.order.remove(key)
-        
-        self.cache[key] = res
-        self.order.append(key)
-        
-        # Evict if full
-        if len(self.cache) > self.capacity:
-            oldest = self.order.pop(0)
-            del self.cache[oldest]
-            
-verification_cache = VerificationCache()
+    @property
+    def scope_key(self) -> str:
+        """Semantic-cache scope: same complexity and PIN set."""
+        raw_key = "\0".join([self.task_complexity, self.pin_summary])
+        return hashlib.sha256(raw_key.encode()).hexdigest()
+
+# --- [L2 CACHE] Host-wide verdict store, shared by workers and kept across restarts ---
+L2_CACHE_PATH = os.getenv("RLM_L2_CACHE_PATH", os.path.join(tempfile.gettempdir(), "rlm-core-verdicts.sqlite3"))
+
+verification_backend = MemoryBackend(
+    max_entries=env_int("RLM_VERIFY_CACHE_ENTRIES", 1000),
+    max_bytes=env_int("RLM_VERIFY_CACHE_MB", 64) * 1024 * 1024
+)
+if L2_CACHE_PATH and L2_CACHE_PATH.lower() != "off":
+    verification_backend = TieredBackend(
+        verification_backend,
+        SQLiteBackend(
+            L2_CACHE_PATH,
+            max_entries=env_int("RLM_L2_CACHE_ENTRIES", 100_000),
+            max_bytes=env_int("RLM_L2_CACHE_MB", 256) * 1024 * 1024,
+            flush_interval=env_float("RLM_L2_FLUSH_INTERVAL", 0.2),
+            compact_interval=env_float("RLM_L2_COMPACT_INTERVAL", 300.0)
+        )
+    )
+
+verification_cache = VerificationCache(
+    verification_backend,
+    VerificationResponse,
+    ttl=env_float("RLM_VERIFY_CACHE_TTL", 86400.0) or None
+)
+
+# --- [SEMANTIC CACHE] Reuse verdicts for paraphrased claims (opt-in) ---
+semantic_cache = SemanticVerdictCache(
+    max_distance=env_float("RLM_SEMANTIC_CACHE_DISTANCE", 0.05),
+    max_per_scope=env_int("RLM_SEMANTIC_CACHE_PER_SCOPE", 512),
+    max_scopes=env_int("RLM_SEMANTIC_CACHE_SCOPES", 256)
+) if env_bool("RLM_SEMANTIC_CACHE", False) else None
+
+def node_text(node: dict) -> str:
+    return node.get('statement', node.get('content', str(node)))
+
 
 class VectorSkip:
     """
     Semantic Cache / Index.
+    Embeddings are kept in a bounded float32 EmbeddingStore keyed by content hash.
+    PIN sets are kept as pre-normalized matrices so the skip check is a
+    single matrix-vector product.
     """
-    _index = {}
+    MODEL = "nomic-embed-text"
+
+    def __init__(self, store: EmbeddingStore, batcher: EmbeddingBatcher, pin_cache_bytes: int):
+        self.store = store
+        self.batcher = batcher
+        self.pin_cache_bytes = pin_cache_bytes
+        self._pin_matrices: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._pin_bytes = 0
+        # Concurrent misses for the same text share one embedding call
+        self._flights: SingleFlight[np.ndarray] = SingleFlight()
     
     @staticmethod
     def cosine_similarity(a, b):
         return np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b))
     
-    @staticmethod
-    async def get_embedding(text: str, client: httpx.AsyncClient):
-        # Simple local index to avoid API calls for the same text
-        if not hasattr(VectorSkip, "_index"): VectorSkip._index = {}
-        if text in VectorSkip._index: return VectorSkip._index[text]
-        
-        if USE_CLOUD_EMBEDDINGS:
-            # Cloud API Call (OpenAI Compatible)
-            api_key = OPENROUTER_API_KEY or OPENAI_API_KEY
-            base_url = "https://openrouter.ai/api/v1" if OPENROUTER_API_KEY else "https://api.openai.com/v1"
-            headers = {"Authorization": f"Bearer {api_key}"}
-            if OPENROUTER_API_KEY:
-                headers["HTTP-Referer"] = "https://agent-shield.com"
-                headers["X-Title"] = "AgentShield RLM"
-
-            response = await client.post(
-                f"{base_url}/embeddings",
-                headers=headers,
-                json={"model": "text-embedding-3-small", "input": text}
-            )
-            response.raise_for_status()
-            emb = response.json()["data"][0]["embedding"]
-        else:
-            # Local Ollama Call
-            response = await client.post(
-                f"{OLLAMA_BASE_URL}/api/embeddings",
-                json={"model": "nomic-embed-text", "prompt": text}
-            )
-            response.raise_for_status()
-            emb = response.json().get("embedding", [])
+    async def get_embedding(self, text: str) -> np.ndarray:
+        return (await self.get_embeddings([text]))[0]
+
+    async def get_embeddings(self, texts: list[str], normalized: bool = False) -> np.ndarray:
+        """
+        Embeds `texts` as an (n, dim) float32 matrix. Cached rows come from
+        the local index; all misses are fetched in one batched call.
+        """
+        model = self.batcher.model_for(self.MODEL)
+        matrix, missing = self.store.get_many([self.store.key(t, model) for t in texts], normalized)
+        if not missing:
+            return matrix
+
+        unique = list(dict.fromkeys(texts[i] for i in missing))
+        keys = [self.store.key(text, model) for text in unique]
+        text_for = dict(zip(keys, unique))
+        vectors = await self._flights.do_many(
+            keys, lambda new_keys: self._fetch([text_for[k] for k in new_keys], new_keys)
+        )
+
+        fetched = {}
+        for text, vec in zip(unique, vectors):
+            if normalized:
+                vec = vec / (np.linalg.norm(vec) or 1.0)
+            fetched[text] = vec
+
+        dim = len(next(iter(fetched.values())))
+        if matrix is None or matrix.shape[1] != dim:
+            if len(missing) < len(texts):
+                # Embedding model changed under us: cached rows are stale, refetch all
+                return await self.get_embeddings(texts, normalized)
+            matrix = np.empty((len(texts), dim), dtype=np.float32)
+        for i in missing:
+            matrix[i] = fetched[texts[i]]
+        return matrix
+
+    async def _fetch(self, texts: list[str], keys: list[bytes]) -> list[np.ndarray]:
+        result = await self.batcher.embed(texts, self.MODEL)
+        if result.errors or not all(result.embeddings):
+            raise RuntimeError(f"Embedding unavailable: {next(iter(result.errors.values()), 'empty vector')}")
+        vectors = [np.asarray(emb, dtype=np.float32) for emb in result.embeddings]
+        for key, vec in zip(keys, vectors):
+            self.store.put(key, vec)
+        return vectors
+
+    async def best_pin_match(self, claim: str, pin_texts: list[str]) -> tuple[float, int]:
+        """Returns (similarity, index) of the PIN closest to the claim."""
+        similarities, indices = await self.best_pin_matches([claim], pin_texts)
+        return float(similarities[0]), int(indices[0])
+
+    async def best_pin_matches(self, claims: list[str], pin_texts: list[str]) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Best PIN similarity and index for every claim. The claims and any
+        uncached pins are embedded in a single call; scoring is one
+        (claims x pins) matrix product.
+        """
+        pins_key = hashlib.sha256("\0".join(pin_texts).encode()).hexdigest()
+        pins = self._pin_matrices.get(pins_key)
+        if pins is not None:
+            self._pin_matrices.move_to_end(pins_key)
+            queries = await self.get_embeddings(claims, normalized=True)
+
+        if pins is None or pins.shape[1] != queries.shape[1]:
+            matrix = await self.get_embeddings(claims + pin_texts, normalized=True)
+            queries, pins = matrix[:len(claims)], matrix[len(claims):]
+            self._remember_pins(pins_key, pins)
+
+        scores = queries @ pins.T
+        best = np.argmax(scores, axis=1)
+        return scores[np.arange(len(claims)), best], best
+
+    def _remember_pins(self, pins_key: str, pins: np.ndarray):
+        previous = self._pin_matrices.pop(pins_key, None)
+        if previous is not None:
+            self._pin_bytes -= previous.nbytes
+        if pins.nbytes > self.pin_cache_bytes:
+            return
+        self._pin_matrices[pins_key] = pins
+        self._pin_bytes += pins.nbytes
+        while self._pin_bytes > self.pin_cache_bytes:
+            _, evicted = self._pin_matrices.popitem(last=False)
+            self._pin_bytes -= evicted.nbytes
+
+embedding_store = EmbeddingStore(max_bytes=env_int("RLM_EMBED_CACHE_MB", 64) * 1024 * 1024)
+vector_skip = VectorSkip(
+    embedding_store,
+    embedding_batcher,
+    pin_cache_bytes=env_int("RLM_PIN_MATRIX_CACHE_MB", 16) * 1024 * 1024
+)
+VECTOR_SKIP_THRESHOLD = env_float("RLM_VECTOR_SKIP_THRESHOLD", 0.96)
+
+
+class RelevanceRanker:
+    """
+    Semantic context pruning: keeps the k nodes closest to a query.
+    Missing node embeddings are fetched in one batch and scored with a
+    single matrix-vector product; selection is a partial sort.
+    """
+    def __init__(self, vectors: VectorSkip):
+        self.vectors = vectors
+
+    async def top_k(self, query: str, nodes: list[dict], k: int) -> list[dict]:
+        if len(nodes) <= k:
+            # Everything fits in the prompt anyway: no need to embed
+            return list(nodes)
+        matrix = await self.vectors.get_embeddings([query] + [node_text(n) for n in nodes], normalized=True)
+        scores = matrix[1:] @ matrix[0]
+        return [nodes[i] for i in top_k_indices(scores, k)]
+
+def vector_skip_response(similarity: float) -> VerificationResponse:
+    return VerificationResponse(
+        consistent=True,
+        confidence=min(similarity, 1.0),
+        reasoning="Vector-Skip: Semantic match with PIN node found.",
+        model_used="nomic-embed-text (Vector-Skip)",
+        cost_usd=0.0
+    )
+
+relevance_ranker = RelevanceRanker(vector_skip)
+verify_flight: SingleFlight[VerificationResponse] = SingleFlight()
+CONTEXT_TOP_K = env_int("RLM_CONTEXT_TOP_K", 3)
+
+# /bicameral_stream A-frame coalescing: flush pending tokens after this long or this many chars
+STREAM_FLUSH_INTERVAL = env_float("RLM_STREAM_FLUSH_MS", 20.0) / 1000
+STREAM_MAX_FRAME = env_int("RLM_STREAM_MAX_FRAME", 512)
+
+# --- [IMMUNOLOGICAL MEMORY] Local antibody index, kept in sync with the store ---
+SUPABASE_URL = os.getenv("NEXT_PUBLIC_SUPABASE_URL")
+SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+ANTIBODY_STORE = os.getenv("RLM_ANTIBODY_STORE", "auto").strip().lower()
+
+if ANTIBODY_STORE == "supabase" or (ANTIBODY_STORE == "auto" and SUPABASE_URL and SUPABASE_SERVICE_KEY):
+    antibody_store = SupabaseAntibodyStore(upstreams, SUPABASE_URL, SUPABASE_SERVICE_KEY)
+else:
+    # Offline stand-in for memory_antibodies
+    antibody_store = LocalAntibodyStore(
+        os.getenv("RLM_ANTIBODY_STORE_PATH", os.path.join(tempfile.gettempdir(), "rlm-core-antibodies.sqlite3"))
+    )
+antibody_index = AntibodyIndex(os.getenv("RLM_ANTIBODY_INDEX", "flat").strip().lower())
+antibody_sync = AntibodySync(
+    antibody_store,
+    antibody_index,
+    env_float("RLM_ANTIBODY_REFRESH", 60.0),
+    overlap=env_float("RLM_ANTIBODY_SYNC_OVERLAP", 60.0)
+)
+
+# Write-behind for /recycle: batched embeddings and bulk inserts, spilled to disk on overflow/shutdown
+ANTIBODY_SPILL_PATH = os.getenv(
+    "RLM_ANTIBODY_SPILL_PATH", os.path.join(tempfile.gettempdir(), "rlm-core-antibody-queue.sqlite3")
+)
+antibody_writer = AntibodyWriter(
+    antibody_store,
+    antibody_index,
+    vector_skip.get_embeddings,
+    max_buffer=env_int("RLM_ANTIBODY_BUFFER", 1000),
+    batch_size=env_int("RLM_ANTIBODY_BATCH", 64),
+    flush_interval=env_float("RLM_ANTIBODY_FLUSH_MS", 500.0) / 1000,
+    spill_path=None if ANTIBODY_SPILL_PATH.lower() == "off" else ANTIBODY_SPILL_PATH,
+    max_retries=env_int("RLM_ANTIBODY_RETRIES", 5)
+)
+
+# --- [SHADOW AUDITS] Devil's Advocate pass, off the request path ---
+# We assume the webhook URL is reachable via the internal network or externally
+# In dev, this might be host.docker.internal
+AUDIT_WEBHOOK_URL = os.getenv("AUDIT_WEBHOOK_URL", "http://localhost:3000/api/hooks/audit-result")
+
+
+async def perform_shadow_audit(audit: AuditCallback) -> dict:
+    """Asks the routed model how complaisant the original verdict was. Returns the node's audit metadata."""
+    context_summary = "\n".join(
+        f"- {normalize_text(node_text(n))[:VerificationPrompt.MAX_NODE_CHARS]}" for n in audit.context
+    )
+    prompt = f"""You are a Devil's Advocate auditor. Another model accepted the CLAIM below with the given RESPONSE.
+Judge whether it agreed on evidence or merely to please (sycophancy), and state the strongest counter-argument.
+
+CONTEXT:
+{context_summary if context_summary else "No additional context."}
+
+CLAIM:
+{normalize_text(audit.original_claim)}
 
-        VectorSkip._index[text] = emb
-        return emb
+RESPONSE:
+{normalize_text(audit.original_response)}
 
-vector_skip = VectorSkip()
+Respond in JSON format:
+{{"sycophancy_score": 0.0-1.0, "thesis": "what the response wanted to hear", "antithesis": "the brutal criticism / factual truth"}}
+"""
+    route = smart_router.decide(len(prompt) // 4, "MEDIUM")
+    result, _, _ = await call_verifier(route.target, prompt, priority_for("MEDIUM", background=True))
+    try:
+        parsed = json.loads(result.get("response", "{}"))
+    except json.JSONDecodeError:
+        parsed = {}
+    return {
+        "sycophancy_score": min(1.0, max(0.0, float(parsed.get("sycophancy_score", 0.0)))),
+        "thesis": str(parsed.get("thesis", "")),
+        "antithesis": str(parsed.get("antithesis", "")),
+        "audited_at": datetime.now(timezone.utc).isoformat(),
+        "model_auditor": route.target.model
+    }
+
+
+async def post_audit_results(url: str, results: list[dict]):
+    response = await upstreams.client("webhook").post(url, json=results)
+    response.raise_for_status()
+
+
+AUDIT_QUEUE_PATH = os.getenv("RLM_AUDIT_QUEUE_PATH", os.path.join(tempfile.gettempdir(), "rlm-core-audits.sqlite3"))
+audit_pipeline = AuditPipeline(
+    audit=perform_shadow_audit,
+    post=post_audit_results,
+    path=":memory:" if AUDIT_QUEUE_PATH.lower() == "off" else AUDIT_QUEUE_PATH,
+    workers=env_int("RLM_AUDIT_WORKERS", 2),
+    llm_limit=TokenBucket(env_float("RLM_AUDIT_LLM_RATE", 2.0), env_float("RLM_AUDIT_LLM_BURST", 4.0)),
+    webhook_limit=TokenBucket(env_float("RLM_AUDIT_WEBHOOK_RATE", 5.0), env_float("RLM_AUDIT_WEBHOOK_BURST", 5.0)),
+    batch_size=env_int("RLM_AUDIT_BATCH", 20),
+    flush_interval=env_float("RLM_AUDIT_FLUSH_MS", 1000.0) / 1000,
+    max_attempts=env_int("RLM_AUDIT_MAX_ATTEMPTS", 5),
+    lease=env_float("RLM_AUDIT_LEASE", 300.0)
+)
+
+# --- [OBSERVABILITY] Scrape-time gauges over the components above ---
+metrics_registry.gauge(
+    "rlm_scheduler_queued", "Model calls waiting per scheduler lane", ("lane",),
+    fn=lambda: {(name,): lane["queued"] for name, lane in model_scheduler.stats().items()}
+)
+metrics_registry.gauge(
+    "rlm_scheduler_active", "Model calls running per scheduler lane", ("lane",),
+    fn=lambda: {(name,): lane["active"] for name, lane in model_scheduler.stats().items()}
+)
+metrics_registry.gauge(
+    "rlm_inference_pending", "Local inference jobs admitted and not finished",
+    fn=lambda: {(): inference_executor.stats()["pending"]}
+)
+metrics_registry.gauge(
+    "rlm_antibody_buffered", "Antibodies waiting in the write-behind buffer",
+    fn=lambda: {(): antibody_writer.buffered}
+)
+metrics_registry.counter(
+    "rlm_audits_total", "Shadow audits per pipeline event", ("event",),
+    fn=lambda: {
+        (key,): audit_pipeline.stats()[key]
+        for key in ("submitted", "deduplicated", "audited", "delivered", "failed", "dropped")
+    }
+)
+metrics_registry.gauge(
+    "rlm_audit_inbox", "Shadow audits submitted and not yet persisted",
+    fn=lambda: {(): audit_pipeline.stats()["inbox"]}
+)
+metrics_registry.counter(
+    "rlm_verification_cache_total", "Verdict cache lookups and housekeeping per event", ("event",),
+    fn=lambda: {
+        (key,): value for key, value in verification_cache.stats().items()
+        if key in ("hits", "misses", "evictions", "expirations", "l2_hits", "l2_misses", "l2_flushes", "l2_trimmed")
+    }
+)
+metrics_registry.gauge(
+    "rlm_verification_cache_bytes", "Serialized verdict bytes held in the in-process tier",
+    fn=lambda: {(): verification_cache.stats().get("bytes", 0)}
+)
+metrics_registry.counter(
+    "rlm_embedding_store_total", "Embedding store lookups and evictions per event", ("event",),
+    fn=lambda: {(key,): embedding_store.stats()[key] for key in ("hits", "misses", "evictions")}
+)
+metrics_registry.gauge(
+    "rlm_embedding_store_bytes", "Bytes held by the embedding arena",
+    fn=lambda: {(): embedding_store.nbytes}
+)
+metrics_registry.gauge(
+    "rlm_antibody_index_size", "Antibodies held in the in-process index",
+    fn=lambda: {(): len(antibody_index)}
+)
+
+metrics_registry.gauge(
+    "rlm_breaker_open", "Upstream circuit state (0 closed, 1 half-open, 2 open)", ("upstream",),
+    fn=lambda: {
+        (name,): {"closed": 0, "half_open": 1, "open": 2}[breaker.state]
+        for name, breaker in upstream_breakers.breakers.items()
+    }
+)
+
+# Opt-in: samples the event loop's stack for /debug/profile
+PROFILE_INTERVAL_MS = env_float("RLM_PROFILE_INTERVAL_MS", 0.0)
+profiler = SamplingProfiler(PROFILE_INTERVAL_MS / 1000) if PROFILE_INTERVAL_MS > 0 else None
 
 @app.post("/verify", response_model=VerificationResponse)
 async def verify_claim(
     req: VerificationRequest, 
-    background_tasks: BackgroundTasks,
     _=Depends(verify_jwt)
 ):
     """
     Verify if a claim is consistent with PIN nodes using a local SLM.
     This handles 80% of verification tasks without cloud API costs.
     """
+    # Build the verification prompt (the cache key is derived from it)
+    verification_prompt = VerificationPrompt(req)
+
     # [L1 CACHE CHECK] - Instant Return ($0.00)
-    cached_result = verification_cache.get(req)
+    cache_key = verification_prompt.cache_key
+    with stage("/verify", "cache_lookup"):
+        cached_result = await verification_cache.get(cache_key)
+    CACHE_EVENTS.inc(cache="verify", result="hit" if cached_result else "miss")
     if cached_result:
-        cached_result.model_used = f"{cached_result.model_used} (Cached)"
-        cached_result.cost_usd = 0.0
-        return cached_result
-
-    # Build the verification prompt
-    context_summary = "\n".join([
-        f"- [{n.get('type', 'node')}] {n.get('statement', n.get('content', str(n)))[:200]}"
-        for n in req.context[:5]
-    ])
-    
-    pin_summary = "\n".join([
-        f"- [PIN] {n.get('statement', n.get('content', str(n)))[:200]}"
-        for n in req.pin_nodes
-    ])
-    
-    prompt = f"""You are a logic verification engine. Determine if the following CLAIM is consistent with the established INVARIANTS (PIN nodes).
-
-INVARIANTS (GROUND TRUTH - Cannot be contradicted):
-{pin_summary if pin_summary else "No invariants established."}
-
-CONTEXT:
-{context_summary if context_summary else "No additional context."}
+        # Each hit is a fresh copy: the stored verdict is never mutated
+        return cached_result.model_copy(update={
+            "model_used": f"{cached_result.model_used} (Cached)",
+            "cost_usd": 0.0
+        })
+
+    # [SEMANTIC CACHE CHECK] - Paraphrase of an already verified claim
+    claim_vector = None
+    if semantic_cache is not None:
+        try:
+            with stage("/verify", "embedding"):
+                claim_vector = (await vector_skip.get_embeddings([req.claim], normalized=True))[0]
+            with stage("/verify", "semantic_lookup"):
+                similar_key = semantic_cache.lookup(verification_prompt.scope_key, claim_vector)
+                cached_result = await verification_cache.get(similar_key) if similar_key else None
+            CACHE_EVENTS.inc(cache="semantic", result="hit" if cached_result else "miss")
+            if cached_result:
+                return cached_result.model_copy(update={
+                    "model_used": f"{cached_result.model_used} (Semantic Cache)",
+                    "cost_usd": 0.0
+                })
+        except Exception as e:
+            print(f"[SemanticCache] Error during lookup: {str(e)}")
+
+    # [SINGLE-FLIGHT] Concurrent duplicates share the first request's work.
+    # [SMART ROUTER] Only a miss is routed: local or cloud, from live latency, load and budget
+    return await verify_flight.do(
+        cache_key,
+        lambda: run_verification(req, verification_prompt, route_verification(req), claim_vector)
+    )
 
-CLAIM TO VERIFY:
-{req.claim}
 
-Respond in JSON format:
-{{"consistent": true/false, "confidence": 0.0-1.0, "reasoning": "brief explanation"}}
-"""
+def route_verification(req: VerificationRequest) -> RouteDecision:
+    # Rough prompt size: ~4 characters per token
+    input_tokens = (len(req.claim) + sum(len(node_text(n)) for n in req.pin_nodes + req.context[:5])) // 4
+    return smart_router.decide(input_tokens, req.task_complexity)
 
-    try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            # --- [OPTIMIZATION] Vector-Skip: Fast Semantic Check ---
-            if req.pin_nodes:
-                try:
-                    # Check if embeddings are available first
-                    try:
-                        claim_emb = await vector_skip.get_embedding(req.claim, client)
-                    except Exception:
-                         # Silently skip vector check if offline
-                         claim_emb = None
-
-                    if claim_emb:
-                        for pin in req.pin_nodes:
-                            pin_text = pin.get('statement', pin.get('content', str(pin)))
-                            pin_emb = await vector_skip.get_embedding(pin_text, client)
-                            similarity = vector_skip.cosine_similarity(claim_emb, pin_emb)
-                            
-                            if similarity > 0.96:
-                                print(f"[VectorSkip] High similarity ({similarity:.4f}) detected. Skipping LLM.")
-                                return VerificationResponse(
-                                    consistent=True,
-                                    confidence=similarity,
-                                    reasoning="Vector-Skip: Semantic match with PIN node found.",
-                                    model_used="nomic-embed-text (Vector-Skip)",
-                                    cost_usd=0.0
-                                )
-                except Exception as e:
-                    print(f"[VectorSkip] Error during semantic skip: {str(e)}")
-            # --- End Optimization ---
 
-            if USE_CLOUD_EMBEDDINGS:
+async def call_verifier(target: RouteTarget, prompt: str, priority: int) -> tuple[dict, int, int]:
+    """One verification completion on `target`: (result, input tokens, output tokens)."""
+    client = upstreams.client(target.upstream)
+    # [SCHEDULER] Queue behind other model calls, by priority
+    async with model_scheduler.slot(target.upstream, target.model, priority):
+        started = time.perf_counter()
+        try:
+            if target.upstream == "cloud":
                 # Cloud API Verification
-                api_key = OPENROUTER_API_KEY or OPENAI_API_KEY
-                base_url = "https://openrouter.ai/api/v1" if OPENROUTER_API_KEY else "https://api.openai.com/v1"
-                headers = {"Authorization": f"Bearer {api_key}"}
-                if OPENROUTER_API_KEY:
-                    headers["HTTP-Referer"] = "https://agent-shield.com"
-                    headers["X-Title"] = "AgentShield RLM"
-
                 response = await client.post(
-                    f"{base_url}/chat/completions",
-                    headers=headers,
+                    f"{CLOUD_API_BASE_URL}/chat/completions",
+                    headers=cloud_headers(),
                     json={
-                        "model": DEFAULT_LOCAL_MODEL,
+                        "model": target.model,
                         "messages": [{"role": "user", "content": prompt}],
                         "temperature": 0.1,
                         "response_format": {"type": "json_object"}
-                    }
+                    },
+                    timeout=VERIFY_TIMEOUT
                 )
                 response.raise_for_status()
                 result_json = response.json()
                 raw_content = result_json["choices"][0]["message"]["content"]
-                # Normalize result structure for the parser below
+                usage = result_json.get("usage") or {}
+                input_tokens = usage.get("prompt_tokens", len(prompt) // 4)
+                output_tokens = usage.get("completion_tokens", 0)
+                # Normalize to the Ollama result shape
                 result = {"response": raw_content}
             else:
                 # Local Ollama Verification
                 response = await client.post(
                     f"{OLLAMA_BASE_URL}/api/generate",
                     json={
-                        "model": DEFAULT_LOCAL_MODEL,
+                        "model": target.model,
                         "prompt": prompt,
                         "stream": False,
-                        "format": "json"
-                    }
+                        "format": "json",
+                        "keep_alive": OLLAMA_KEEP_ALIVE
+                    },
+                    timeout=VERIFY_TIMEOUT
                 )
                 response.raise_for_status()
                 result = response.json()
-            
-            # Parse the response
+                input_tokens = result.get("prompt_eval_count", 0)
+                output_tokens = result.get("eval_count", 0)
+        except (httpx.RequestError, httpx.HTTPStatusError):
+            smart_router.record(target, time.perf_counter() - started, ok=False)
+            raise
+        smart_router.record(
+            target, time.perf_counter() - started, ok=True,
+            tokens=output_tokens, input_tokens=input_tokens
+        )
+    return result, input_tokens, output_tokens
+
+
+async def run_verification(
+    req: VerificationRequest,
+    verification_prompt: VerificationPrompt,
+    route: RouteDecision,
+    claim_vector: Optional[np.ndarray] = None,
+    vector_skip_checked: bool = False,
+    background: bool = False
+) -> VerificationResponse:
+    """Cache-miss path of /verify: Vector-Skip, then the LLM, then cache store."""
+    prompt = verification_prompt.text
+    cache_key = verification_prompt.cache_key
+    priority = priority_for(req.task_complexity, background)
+    endpoint = "/verify/batch" if background else "/verify"
+    target = route.target
+    try:
+        # --- [OPTIMIZATION] Vector-Skip: Fast Semantic Check ---
+        if req.pin_nodes and not vector_skip_checked:
             try:
+                # One batched embedding call + one matrix-vector product over all PINs
+                with stage(endpoint, "vector_skip"):
+                    similarity, _ = await vector_skip.best_pin_match(
+                        req.claim, [node_text(pin) for pin in req.pin_nodes]
+                    )
+                if similarity > VECTOR_SKIP_THRESHOLD:
+                    VECTOR_SKIP.inc(result="skip")
+                    return vector_skip_response(similarity)
+                VECTOR_SKIP.inc(result="pass")
+            except Exception as e:
+                VECTOR_SKIP.inc(result="error")
+                # Embeddings offline: skip the vector check and go to the LLM
+                print(f"[VectorSkip] Error during semantic skip: {str(e)}")
+        # --- End Optimization ---
+
+        # [HEDGING] A slow or failing target is raced against the alternate one
+        alternate = smart_router.alternate(target) if HEDGE_VERIFY else None
+        with stage(endpoint, "upstream_llm"):
+            alternate_won, (result, input_tokens, output_tokens) = await verify_hedger.run(
+                lambda: call_verifier(target, prompt, priority),
+                (lambda: call_verifier(alternate, prompt, priority)) if alternate else None,
+                smart_router.hedge_delay(target)
+            )
+        if alternate_won:
+            target = alternate
+        cost = target.cost(input_tokens, output_tokens)
+        
+        # Parse the response
+        try:
+            with stage(endpoint, "parse"):
                 parsed = json.loads(result.get("response", "{}"))
                 verification_res = VerificationResponse(
                     consistent=parsed.get("consistent", True),
                     confidence=parsed.get("confidence", 0.7),
                     reasoning=parsed.get("reasoning", "Local model verification"),
-                    model_used=DEFAULT_LOCAL_MODEL,
-                    cost_usd=0.0
+                    model_used=target.model,
+                    cost_usd=cost
                 )
-            except json.JSONDecodeError:
-                verification_res = VerificationResponse(
-                    consistent=True,
-                    confidence=0.5,
-                    reasoning="Could not parse model response, defaulting to consistent",
-                    model_used=DEFAULT_LOCAL_MODEL,
-                    cost_usd=0.0
-                )
-            
-            # [PHASE 2] Trigger Devil's Advocate Audit
-            if req.node_id and req.project_id:
-                # We assume the webhook URL is reachable via the internal network or externally
-                # In dev, this might be host.docker.internal
-                webhook_url = os.getenv("AUDIT_WEBHOOK_URL", "http://localhost:3000/api/hooks/audit-result")
-                
-                background_tasks.add_task(
-                    perform_shadow_audit,
-                    AuditCallback(
-                        node_id=req.node_id,
-                        project_id=req.project_id,
-                        original_claim=req.claim,
-                        original_response=verification_res.reasoning,
-                        context=req.context,
-                        webhook_url=webhook_url
-                    )
-                )
-            
-            # [L1 CACHE STORE]
-            verification_cache.set(req, verification_res)
+        except json.JSONDecodeError:
+            verification_res = VerificationResponse(
+                consistent=True,
+                confidence=0.5,
+                reasoning="Could not parse model response, defaulting to consistent",
+                model_used=target.model,
+                cost_usd=cost
+            )
+        
+        # [PHASE 2] Trigger Devil's Advocate Audit (queued; runs on the audit workers)
+        if req.node_id and req.project_id:
+            with stage(endpoint, "audit_enqueue"):
+                audit_pipeline.submit(AuditCallback(
+                    node_id=req.node_id,
+                    project_id=req.project_id,
+                    original_claim=req.claim,
+                    original_response=verification_res.reasoning,
+                    context=req.context[:VerificationPrompt.MAX_CONTEXT_NODES],
+                    webhook_url=AUDIT_WEBHOOK_URL
+                ))
+        
+        # [L1 CACHE STORE]
+        await verification_cache.set(cache_key, verification_res)
+        if semantic_cache is not None and claim_vector is not None:
+            semantic_cache.add(verification_prompt.scope_key, claim_vector, cache_key)
+        
+        return verification_res
             
-            return verification_res
-                
+    except SchedulerSaturated as e:
+        # Too many queued model calls: degrade immediately instead of piling on
+        FALLBACKS.inc(reason="saturated")
+        print(f"[Verification] {str(e)}. Defaulting to CONSISTENT.")
+        return VerificationResponse(
+            consistent=True,
+            confidence=0.3,
+            reasoning="Logic Engine Saturated - Verification Skipped (Default Safe)",
+            model_used="Saturated-Fallback",
+            cost_usd=0.0
+        )
     except (httpx.RequestError, httpx.HTTPStatusError) as e:
         # Fallback to consistent=True (Innocent until proven guilty) if Logic Engine is down
+        FALLBACKS.inc(reason="offline")
         print(f"[Verification] Logic Engine Offline: {str(e)}. Defaulting to CONSISTENT.")
         return VerificationResponse(
             consistent=True,
@@ -411,55 +1007,166 @@ Respond in JSON format:
         )
 
 
+BATCH_VERIFY_CONCURRENCY = env_int("RLM_BATCH_VERIFY_CONCURRENCY", 8)
+
+
+@app.post("/verify/batch")
+async def verify_batch(
+    req: BatchVerificationRequest,
+    _=Depends(verify_jwt)
+):
+    """
+    Verify many claims against one PIN set.
+    PIN embeddings are computed once and every claim is checked against the
+    Vector-Skip matrix in a single pass; the rest go to the LLM with bounded
+    parallelism. Results stream back as NDJSON lines, in completion order:
+    {"index": i, "result": VerificationResponse} or {"index": i, "error": "..."}
+    """
+    requests = req.requests()
+    prompts = [VerificationPrompt(r) for r in requests]
+
+    async def stream_results():
+        results: dict[int, VerificationResponse] = {}
+
+        # 1. Cache lookups
+        cached = await asyncio.gather(*[verification_cache.get(p.cache_key) for p in prompts])
+        for i, hit in enumerate(cached):
+            if hit:
+                results[i] = hit.model_copy(update={"model_used": f"{hit.model_used} (Cached)", "cost_usd": 0.0})
+                yield json.dumps({"index": i, "result": results[i].model_dump()}) + "\n"
+
+        pending = [i for i in range(len(requests)) if i not in results]
+
+        # 2. Vector-Skip for every remaining claim in one matrix pass
+        if pending and req.pin_nodes:
+            try:
+                similarities, _ = await vector_skip.best_pin_matches(
+                    [requests[i].claim for i in pending], [node_text(pin) for pin in req.pin_nodes]
+                )
+                for i, similarity in zip(pending, similarities.tolist()):
+                    if similarity > VECTOR_SKIP_THRESHOLD:
+                        results[i] = vector_skip_response(similarity)
+                        yield json.dumps({"index": i, "result": results[i].model_dump()}) + "\n"
+                pending = [i for i in pending if i not in results]
+            except Exception as e:
+                print(f"[VectorSkip] Error during batch semantic skip: {str(e)}")
+
+        # 3. LLM for the rest, bounded parallelism, streamed as each verdict lands
+        semaphore = asyncio.Semaphore(BATCH_VERIFY_CONCURRENCY)
+
+        async def verify_one(i: int) -> str:
+            async with semaphore:
+                try:
+                    res = await verify_flight.do(
+                        prompts[i].cache_key,
+                        lambda: run_verification(
+                            requests[i], prompts[i], route_verification(requests[i]),
+                            vector_skip_checked=True, background=True
+                        )
+                    )
+                    return json.dumps({"index": i, "result": res.model_dump()}) + "\n"
+                except Exception as e:
+                    return json.dumps({"index": i, "error": str(e)}) + "\n"
+
+        tasks = [asyncio.create_task(verify_one(i)) for i in pending]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # Client went away mid-stream: stop paying for verdicts nobody reads
+            for task in tasks:
+                task.cancel()
+
+    from fastapi.responses import StreamingResponse
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+
 @app.post("/embed", response_model=EmbeddingResponse)
-async def generate_embeddings(req: EmbeddingRequest, _=Depends(verify_jwt)):
+async def generate_embeddings(req: EmbeddingRequest, request: Request, _=Depends(verify_jwt)):
     """
     Generate embeddings using either Local Ollama or Cloud API (OpenAI/OpenRouter).
+    Texts are sent in batches; failures are reported per item in `errors`.
+    Send `Accept: application/octet-stream` for raw rows, or encoding_format="base64".
     """
-    try:
-        embeddings = []
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            if USE_CLOUD_EMBEDDINGS:
-                # Cloud API Call
-                api_key = OPENROUTER_API_KEY or OPENAI_API_KEY
-                base_url = "https://openrouter.ai/api/v1" if OPENROUTER_API_KEY else "https://api.openai.com/v1"
-                headers = {"Authorization": f"Bearer {api_key}"}
-                if OPENROUTER_API_KEY:
-                    headers["HTTP-Referer"] = "https://agent-shield.com"
-                    headers["X-Title"] = "AgentShield RLM"
-
-                for text in req.texts:
-                    response = await client.post(
-                        f"{base_url}/embeddings",
-                        headers=headers,
-                        json={"model": "text-embedding-3-small", "input": text}
-                    )
-                    response.raise_for_status()
-                    embeddings.append(response.json()["data"][0]["embedding"])
-            else:
-                # Local Ollama Call
-                for text in req.texts:
-                    response = await client.post(
-                        f"{OLLAMA_BASE_URL}/api/embeddings",
-                        json={
-                            "model": req.model,
-                            "prompt": text
-                        }
-                    )
-                    response.raise_for_status()
-                    result = response.json()
-                    embeddings.append(result.get("embedding", []))
-        
-        dimensions = len(embeddings[0]) if embeddings and embeddings[0] else 0
-        
-        return EmbeddingResponse(
-            embeddings=embeddings,
-            model_used=req.model if not USE_CLOUD_EMBEDDINGS else "text-embedding-3-small",
-            dimensions=dimensions
+    binary = "application/octet-stream" in request.headers.get("accept", "")
+    if req.dtype != "float32" and req.encoding_format == "float" and not binary:
+        raise HTTPException(status_code=422, detail=f"dtype '{req.dtype}' needs encoding_format='base64' or a binary Accept header")
+
+    with stage("/embed", "embedding"):
+        result = await embedding_batcher.embed(req.texts, req.model)
+    if result.failed:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Embedding provider not available: {next(iter(result.errors.values()))}"
         )
-        
-    except httpx.RequestError as e:
-        raise HTTPException(status_code=503, detail=f"Embedding provider not available: {str(e)}")
+
+    model_used = embedding_batcher.model_for(req.model)
+    errors = [EmbeddingError(index=i, detail=d) for i, d in sorted(result.errors.items())]
+
+    if binary or req.encoding_format == "base64":
+        # Packed once into a single buffer; no per-float formatting or model validation
+        with stage("/embed", "encode"):
+            packed = PackedEmbeddings(result.embeddings, req.dtype)
+            if binary:
+                return Response(content=packed.body, media_type="application/octet-stream", headers=packed.headers(model_used))
+            body = {
+                "embeddings": packed.base64_rows(),
+                "model_used": model_used,
+                "dimensions": packed.dimensions,
+                "errors": [e.model_dump() for e in errors],
+                "encoding_format": "base64",
+                "dtype": req.dtype
+            }
+            if packed.scales is not None:
+                body["scales"] = packed.scales.tolist()
+            return Response(content=json.dumps(body), media_type="application/json")
+
+    embeddings = [emb if emb is not None else [] for emb in result.embeddings]
+    dimensions = next((len(emb) for emb in embeddings if emb), 0)
+    
+    # The JSON float path is serialized by FastAPI after this returns
+    return EmbeddingResponse(
+        embeddings=embeddings,
+        model_used=model_used,
+        dimensions=dimensions,
+        errors=errors
+    )
+
+
+@app.get("/route/stats")
+async def route_stats(_=Depends(verify_admin)):
+    """Rolling per-target telemetry behind the Smart Router's decisions."""
+    return {
+        **smart_router.stats(),
+        "hedging": verify_hedger.stats(),
+        "breakers": upstream_breakers.stats()
+    }
+
+
+@app.get("/scheduler/stats")
+async def scheduler_stats(_=Depends(verify_admin)):
+    """Queue depth of the model scheduler lanes, the local inference pool and the audit queue."""
+    return {
+        "queue_depth": model_scheduler.queue_depth(),
+        "lanes": model_scheduler.stats(),
+        "inference": inference_executor.stats(),
+        "local_models": local_models.stats(),
+        "audits": {**audit_pipeline.stats(), "queue": await audit_pipeline.queue_counts()}
+    }
+
+
+@app.get("/metrics")
+async def metrics(_=Depends(verify_admin)):
+    """Prometheus text exposition of every RLM Core metric."""
+    return Response(content=metrics_registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.get("/debug/profile")
+async def debug_profile(reset: bool = False, _=Depends(verify_admin)):
+    """Collapsed event-loop stacks from the sampling profiler (RLM_PROFILE_INTERVAL_MS > 0)."""
+    if profiler is None:
+        raise HTTPException(status_code=404, detail="Profiler disabled. Set RLM_PROFILE_INTERVAL_MS.")
+    return Response(content=profiler.collapsed(reset), media_type="text/plain")
 
 
 @app.post("/route", response_model=SmartRouteResponse)
@@ -467,85 +1174,54 @@ async def smart_route(req: SmartRouteRequest, _=Depends(verify_jwt)):
     """
     Determine whether to use local or cloud model based on task characteristics.
     This is the 'Smart Router' that saves money by using local models when possible.
+    Decisions follow live latency, error rates, queue depth and the cloud budget.
     """
-    # Decision logic - COST OPTIMIZED (Cloud First if Available)
-    use_local = True
-    recommended_model = DEFAULT_LOCAL_MODEL
-    cost = 0.0
-    reasoning = ""
-    
-    if USE_CLOUD_EMBEDDINGS:
-        # Cloud Mode: Aggressively use gpt-4o-mini for best value
-        use_local = False
-        
-        if req.require_high_quality:
-            recommended_model = "gpt-4o"
-            cost = (req.input_tokens / 1_000_000) * 5.0  # Premium
-            reasoning = "High quality required - using GPT-4o"
-        elif req.task_type == "embedding":
-            recommended_model = "text-embedding-3-small"
-            cost = (req.input_tokens / 1_000_000) * 0.02
-            reasoning = "High performance cloud embeddings"
-        else:
-            # Verification, Planning, Generation (Standard)
-            # Default to gpt-4o-mini (Extremely cheap & capable)
-            recommended_model = "openai/gpt-4o-mini" if OPENROUTER_API_KEY else "gpt-4o-mini"
-            cost = (req.input_tokens / 1_000_000) * 0.15
-            reasoning = "Optimized Strategy: Using gpt-4o-mini for best performance/cost ratio"
-            
-    else:
-        # Local Mode Fallback logic for Dev
-        if req.require_high_quality:
-            use_local = False
-            recommended_model = "gpt-4o" # Still suggest cloud if forced
-            cost = 5.0
-            reasoning = "Local hardware insufficient for high-quality constraint"
-        elif req.complexity == "HIGH" and req.task_type == "generation":
-            use_local = False
-            recommended_model = "claude-3-5-sonnet"
-            cost = 3.0
-            reasoning = "Complex generation task - routing to cloud"
-        else:
-             use_local = True
-             reasoning = "Local execution (Free)"
+    if req.task_type == "embedding":
+        # Embeddings always go where the embedding batcher sends them
+        if USE_CLOUD_EMBEDDINGS:
+            return SmartRouteResponse(
+                use_local=False,
+                recommended_model=embedding_batcher.model_for("nomic-embed-text"),
+                estimated_cost_usd=(req.input_tokens / 1_000_000) * 0.02,
+                reasoning="High performance cloud embeddings"
+            )
+        return SmartRouteResponse(
+            use_local=True,
+            recommended_model="nomic-embed-text",
+            estimated_cost_usd=0.0,
+            reasoning="Local embeddings (Free)"
+        )
 
+    decision = smart_router.decide(req.input_tokens, req.complexity, req.task_type, req.require_high_quality)
     return SmartRouteResponse(
-        use_local=use_local,
-        recommended_model=recommended_model,
-        estimated_cost_usd=cost,
-        reasoning=reasoning
+        use_local=decision.use_local,
+        recommended_model=decision.target.model,
+        estimated_cost_usd=decision.estimated_cost,
+        reasoning=decision.reasoning,
+        predicted_latency_ms=decision.predicted_latency * 1000 if decision.predicted_latency is not None else None
     )
 
 
 @app.post("/recycle")
-async def recycle_toxic_waste(payload: RecyclePayload, background_tasks: BackgroundTasks):
+async def recycle_toxic_waste(payload: RecyclePayload):
     """
     Cognitive Recycling: Converts rejected sycophantic output into future immunity.
     """
-    async def process_antibody():
-        async with httpx.AsyncClient() as client:
-            # 1. Create Learning Unit
-            learning_unit = f"PAST FAILURE: User asked '{payload.user_prompt}', model replied incorrectly '{payload.rejected_output}'. CORRECTIVE ACTION: {payload.correction}."
-            
-            # 2. Get Embedding
-            emb = await vector_skip.get_embedding(payload.user_prompt, client)
-            
-            # 3. Store in Supabase (Antibody)
-            # Assuming SUPABASE_URL and KEY are in env
-            sb_url = os.getenv("NEXT_PUBLIC_SUPABASE_URL")
-            sb_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
-            if sb_url and sb_key:
-                await client.post(
-                    f"{sb_url}/rest/v1/memory_antibodies",
-                    headers={"apikey": sb_key, "Authorization": f"Bearer {sb_key}"},
-                    json={
-                        "content": learning_unit,
-                        "embedding": emb,
-                        "project_id": payload.project_id
-                    }
-                )
+    # 1. Create Learning Unit
+    learning_unit = f"PAST FAILURE: User asked '{payload.user_prompt}', model replied incorrectly '{payload.rejected_output}'. CORRECTIVE ACTION: {payload.correction}."
+    
+    # 2. Queue the Antibody: embedded and stored in batches by the writer,
+    # then indexed right away (no wait for the next pull)
+    try:
+        antibody_writer.submit({
+            "id": str(uuid.uuid4()),
+            "content": learning_unit,
+            "embed_text": payload.user_prompt,
+            "project_id": payload.project_id
+        })
+    except WriterFull:
+        raise HTTPException(status_code=503, detail="Antibody queue full, retry later", headers={"Retry-After": "5"})
 
-    background_tasks.add_task(process_antibody)
     return {"status": "recycling_initiated"}
 
 
@@ -556,92 +1232,89 @@ async def bicameral_stream(req: VerificationRequest):
     Streams A (Sycophant) chunks immediately with 'A:' prefix.
     Sends B (Fiscal) verdict as 'B:' prefix when ready.
     """
-    async def stream_logic():
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            # 1. Start the Fiscal B (Logic Guard) - MINIFIED SINGLE TOKEN
-            fiscal_prompt = f"L-FISCAL: Is '{req.claim}' a valid premise? Answer PASS or FALLACY only. Response:"
-            fiscal_task = asyncio.create_task(
-                client.post(f"{OLLAMA_BASE_URL}/api/generate", json={
-                    "model": DEFAULT_LOCAL_MODEL, 
-                    "prompt": fiscal_prompt, 
-                    "stream": False,
-                    "options": {"num_predict": 5, "stop": ["\n"], "temperature": 0}
-                })
-            )
+    started = time.perf_counter()
 
-            # --- [V1.8.0] Immunological Memory: Antibody Search ---
-            antibody_injection = ""
-            sb_url = os.getenv("NEXT_PUBLIC_SUPABASE_URL")
-            sb_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
-            if sb_url and sb_key:
-                try:
-                    claim_emb = await vector_skip.get_embedding(req.claim, client)
-                    # Search for top antibodies
-                    search_res = await client.post(
-                        f"{sb_url}/rest/v1/rpc/match_antibodies", # We'll need this RPC
-                        headers={"apikey": sb_key, "Authorization": f"Bearer {sb_key}"},
-                        json={"query_embedding": claim_emb, "match_threshold": 0.5, "match_count": 2}
-                    )
-                    antibodies = search_res.json()
-                    if antibodies:
-                        antibody_injection = "\nNEURAL ANTIBODIES DETECTED (AVOID THESE PAST MISTAKES):\n" + "\n".join([f"- {a['content']}" for a in antibodies])
-                except Exception as e:
-                    print(f"[AntibodySearch] Error: {str(e)}")
-            # --- End Immunological Memory ---
+    async def stream_logic():
+        ollama = upstreams.client("ollama")
+        # 1. Start the Fiscal B (Logic Guard) - MINIFIED SINGLE TOKEN
+        fiscal_prompt = f"L-FISCAL: Is '{req.claim}' a valid premise? Answer PASS or FALLACY only. Response:"
+        fiscal_task = asyncio.create_task(model_scheduler.submit(
+            "ollama", DEFAULT_LOCAL_MODEL, priority_for("LOW"),
+            lambda: ollama.post(f"{OLLAMA_BASE_URL}/api/generate", json={
+                "model": DEFAULT_LOCAL_MODEL, 
+                "prompt": fiscal_prompt, 
+                "stream": False,
+                "keep_alive": OLLAMA_KEEP_ALIVE,
+                "options": {"num_predict": 5, "stop": ["\n"], "temperature": 0}
+            })
+        ))
+
+        # --- [V1.8.0] Immunological Memory: Antibody Search ---
+        async def antibody_search() -> str:
+            if not len(antibody_index):
+                return ""
+            try:
+                with stage("/bicameral_stream", "antibodies"):
+                    claim_emb = await vector_skip.get_embedding(req.claim)
+                    # Search for top antibodies (in-process index, no round trip)
+                    antibodies = antibody_index.search(claim_emb, req.project_id, threshold=0.5, k=2)
+                if antibodies:
+                    return "\nNEURAL ANTIBODIES DETECTED (AVOID THESE PAST MISTAKES):\n" + "\n".join([f"- {a['content']}" for a in antibodies])
+            except Exception as e:
+                print(f"[AntibodySearch] Error: {str(e)}")
+            return ""
+        # --- End Immunological Memory ---
 
-            # 2. Start the Generator A (Creative Stream)
-            # --- [ATOMIC OPTIMIZATION] Semantic Context Pruning ---
-            # Instead of just slicing [:3], we rank context by relevance.
+        # --- [ATOMIC OPTIMIZATION] Semantic Context Pruning ---
+        # Instead of just slicing [:3], we rank context by relevance.
+        async def prune_context() -> Optional[list[dict]]:
             try:
-                claim_emb = await vector_skip.get_embedding(req.claim, client)
-                
-                # Score all context nodes
-                scored_context = []
-                for node in req.context:
-                    node_text = node.get('statement', node.get('content', str(node)))
-                    node_emb = await vector_skip.get_embedding(node_text, client)
-                    similarity = vector_skip.cosine_similarity(claim_emb, node_emb)
-                    scored_context.append((similarity, node))
-                
-                # Sort by similarity descending and take top 3
-                scored_context.sort(key=lambda x: x[0], reverse=True)
-                top_context = [x[1] for x in scored_context[:3]]
-                
-                gen_prompt = f"Eres un asistente veraz. {antibody_injection}\nReact to: {req.claim}. Context: {json.dumps(top_context)}"
+                with stage("/bicameral_stream", "context"):
+                    return await relevance_ranker.top_k(req.claim, req.context, CONTEXT_TOP_K)
             except Exception as e:
                 print(f"[AtomicPruning] Error: {str(e)}")
-                gen_prompt = f"React to: {req.claim}. Context: {json.dumps(req.context[:3])}"
-            # --- End Optimization ---
-            
-            try:
-                # We use a race condition loop
-                async with client.stream(
+                return None
+        # --- End Optimization ---
+
+        async def generation():
+            # Both lookups run concurrently so neither delays the first A: token
+            antibody_injection, top_context = await asyncio.gather(antibody_search(), prune_context())
+
+            # 2. Start the Generator A (Creative Stream)
+            if top_context is not None:
+                gen_prompt = f"Eres un asistente veraz. {antibody_injection}\nReact to: {req.claim}. Context: {json.dumps(top_context)}"
+            else:
+                gen_prompt = f"React to: {req.claim}. Context: {json.dumps(req.context[:CONTEXT_TOP_K])}"
+
+            # The fiscal check (LOW) is granted ahead of the generation on a busy lane
+            async with model_scheduler.slot("ollama", DEFAULT_LOCAL_MODEL, priority_for("MEDIUM")):
+                async with ollama.stream(
                     "POST", f"{OLLAMA_BASE_URL}/api/generate", 
-                    json={"model": DEFAULT_LOCAL_MODEL, "prompt": gen_prompt, "stream": True}
+                    json={"model": DEFAULT_LOCAL_MODEL, "prompt": gen_prompt, "stream": True, "keep_alive": OLLAMA_KEEP_ALIVE}
                 ) as response:
                     async for line in response.aiter_lines():
                         if line:
-                            chunk = json.loads(line)
-                            yield f"A:{chunk.get('response', '')}\n"
-                            
-                            # Periodically check if Fiscal is done
-                            if fiscal_task.done() and not getattr(stream_logic, 'verdict_sent', False):
-                                res = fiscal_task.result()
-                                verdict = res.json().get("response", "").strip()
-                                yield f"B:{verdict}\n"
-                                stream_logic.verdict_sent = True
-                            
+                            chunk = json_loads(line)
+                            yield chunk.get("response", "")
                             if chunk.get("done"):
                                 break
-                
-                # If Fiscal hasn't finished yet, wait for it
-                if not getattr(stream_logic, 'verdict_sent', False):
-                    res = await fiscal_task
-                    verdict = res.json().get("response", "").strip()
-                    yield f"B:{verdict}\n"
-                                
-            except Exception as e:
-                yield f"E:Error: {str(e)}\n"
+
+        async def fiscal_verdict() -> str:
+            res = await fiscal_task
+            return res.json().get("response", "").strip()
+
+        try:
+            # B is sent the instant the Fiscal resolves; A tokens are coalesced into frames
+            first_token = True
+            async for frame in bicameral_frames(generation(), fiscal_verdict(), STREAM_FLUSH_INTERVAL, STREAM_MAX_FRAME):
+                if first_token and frame.startswith("A:"):
+                    first_token = False
+                    TTFT_SECONDS.observe(time.perf_counter() - started, endpoint="/bicameral_stream")
+                yield frame
+        except Exception as e:
+            yield f"E:Error: {str(e)}\n"
+        finally:
+            fiscal_task.cancel()
 
     from fastapi.responses import StreamingResponse
     return StreamingResponse(stream_logic(), media_type="text/plain")
@@ -652,8 +1325,10 @@ async def generate_absolute_truth(req: VerificationRequest):
     """
     Surgical Inference: Generates text while enforcing truth at the logit level.
     """
-    if not local_llm:
+    if not local_models.available:
         raise HTTPException(status_code=503, detail="Surgical engine not initialized. MODEL_PATH missing.")
+    if not axiom_registry.available:
+        raise HTTPException(status_code=503, detail="Truth hypervisor not available. Build neuro-hypervisor.")
 
     # 1. Fetch live axioms (PIN nodes) from context
     # In a real environment, we'd pull from Supabase. 
@@ -664,44 +1339,50 @@ async def generate_absolute_truth(req: VerificationRequest):
         axiom_pool[pin_text] = True # Mark as "Absolute Truth"
     
     # Also fetch known fallacies from antibodies
-    sb_url = os.getenv("NEXT_PUBLIC_SUPABASE_URL")
-    sb_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
-    if sb_url and sb_key:
-        async with httpx.AsyncClient() as client:
-            try:
-                # [Production Logic] Fetch relevant antibodies to treat as known fallacies
-                claim_emb = await vector_skip.get_embedding(req.claim, client)
-                search_res = await client.post(
-                    f"{sb_url}/rest/v1/rpc/match_antibodies",
-                    headers={"apikey": sb_key, "Authorization": f"Bearer {sb_key}"},
-                    json={"query_embedding": claim_emb, "match_threshold": 0.8, "match_count": 5}
-                )
-                antibodies = search_res.json()
-                for a in antibodies:
-                    # We treat rejected_output as a fallacy (False)
-                    axiom_pool[a['content']] = False
-            except Exception as e:
-                print(f"[AxiomSync] Error fetching antibodies: {str(e)}")
-
-    # 2. Sync to Rust Hypervisor (Nanosecond level enforcement)
-    hypervisor.sync_axioms(axiom_pool)
-    
-    # 3. Setup Hypervisor Callback
-    enforcer = RustTruthEnforcer(local_llm)
-    logits_processors = LogitsProcessorList([enforcer])
+    fallacies = []
+    if len(antibody_index):
+        try:
+            # [Production Logic] Fetch relevant antibodies to treat as known fallacies
+            claim_emb = await vector_skip.get_embedding(req.claim)
+            antibodies = antibody_index.search(claim_emb, req.project_id, threshold=0.8, k=5)
+            # We treat rejected_output as a fallacy (False)
+            fallacies = [a['content'] for a in antibodies]
+        except Exception as e:
+            print(f"[AxiomSync] Error fetching antibodies: {str(e)}")
+
+    # 2. Sync to Rust Hypervisor (Nanosecond level enforcement): only the diff is sent
+    with stage("/generate/absolute_truth", "axiom_sync"):
+        axioms = axiom_registry.sync(req.project_id, axiom_pool, fallacies)
+    # Bound now: a later request may swap the project's hypervisor while this one waits for a worker
+    hypervisor, axiom_version = axioms.hypervisor, axioms.version
     
-    # 3. Execute Generative Surgery
-    output = local_llm(
-        f"Eres un asistente veraz. Di la verdad absoluta.\nPregunta: {req.claim}\nRespuesta:",
-        max_tokens=200,
-        logits_processor=logits_processors,
-        stop=["\n"]
-    )
+    prefix = surgical_prefix(req.pin_nodes)
+
+    def surgery():
+        with local_models.checkout() as llm:
+            local_models.prime(llm, prefix)
+            # 3. Setup Hypervisor Callback
+            enforcer = RustTruthEnforcer(llm, hypervisor)
+            logits_processors = LogitsProcessorList([enforcer])
+            return llm(
+                f"{prefix}Pregunta: {req.claim}\nRespuesta:",
+                max_tokens=200,
+                logits_processor=logits_processors,
+                stop=["\n"]
+            )
+
+    # 3. Execute Generative Surgery (off the event loop)
+    try:
+        with stage("/generate/absolute_truth", "inference"):
+            output = await inference_executor.run(surgery)
+    except InferenceBusy as e:
+        raise inference_busy(e)
     
     return {
         "text": output["choices"][0]["text"],
         "model": "llama-cpp (Hypervisor-Enabled)",
-        "hypervisor": "Active (Zero-Hallucination Mode)"
+        "hypervisor": "Active (Zero-Hallucination Mode)",
+        "axiom_version": axiom_version
     }
 
 
@@ -711,58 +1392,53 @@ async def generate_neuro_symbolic(req: VerificationRequest):
     Low-latency generation with 'Speculative Supervision'.
     Parallel verification against axioms and antibodies.
     """
-    if not local_llm:
+    if not local_models.available:
         raise HTTPException(status_code=503, detail="Local LLM not initialized")
 
+    started = time.perf_counter()
+    # Live PIN axioms, compiled once per axiom set
+    live_axioms = [p.get('statement', p.get('content', '')) for p in req.pin_nodes]
+    with stage("/generate/neuro-symbolic", "axiom_sync"):
+        scanner = axiom_matchers.get(live_axioms).scanner()
+
     # 1. Start the generator immediately
-    prompt = f"Eres un asistente veraz. Di la verdad absoluta.\nPregunta: {req.claim}\nRespuesta:"
+    prefix = surgical_prefix(req.pin_nodes)
+    prompt = f"{prefix}Pregunta: {req.claim}\nRespuesta:"
+
+    def generate():
+        with local_models.checkout() as llm:
+            local_models.prime(llm, prefix)
+            yield from llm(prompt, max_tokens=250, stream=True, stop=["\n"])
+
+    try:
+        # Tokens are produced on an inference worker and handed back through a queue
+        stream = inference_executor.stream(generate)
+    except InferenceBusy as e:
+        raise inference_busy(e)
     
     async def output_generator():
-        from fastapi.responses import StreamingResponse
-        import re
-        
-        # Load axioms for fast checking
-        live_axioms = [p.get('statement', p.get('content', '')) for p in req.pin_nodes]
-        
         # Generator
-        buffer = ""
-        # We simulate a stream from local_llm (which supports streaming but here we'll iterate)
-        stream = local_llm(
-            prompt,
-            max_tokens=250,
-            stream=True,
-            stop=["\n"]
-        )
-
-        for chunk in stream:
-            token = chunk["choices"][0]["text"]
-            buffer += token
-            
-            # 2. 'Out-of-Band' Speculative Supervision
-            # Every 20 characters or on punctuation, run a FAST heuristic check
-            if len(buffer) % 20 == 0 or any(p in token for p in [".", "!", "?"]):
-                if await is_hallucination_fast(buffer, live_axioms):
+        try:
+            first_token = True
+            async for chunk in stream:
+                token = chunk["choices"][0]["text"]
+                if first_token:
+                    first_token = False
+                    TTFT_SECONDS.observe(time.perf_counter() - started, endpoint="/generate/neuro-symbolic")
+                
+                # 2. 'Out-of-Band' Speculative Supervision
+                # Every token goes through the compiled axiom scanner (constant cost per word)
+                if scanner.feed(token):
                     yield "[INTERRUPT: Alucinación Semántica Detectada]"
                     break
-            
-            yield token
-
-    async def is_hallucination_fast(text: str, axioms: list[str]) -> bool:
-        """Heuristic check (<1ms) - No LLM involved."""
-        text_lower = text.lower()
-        # 1. Direct Contradiction of live PINs
-        for axiom in axioms:
-            ax_lower = axiom.lower()
-            if ax_lower in text_lower:
-                # Check for simple negation patterns
-                if "no " in ax_lower and ax_lower.replace("no ", "") in text_lower:
-                    return True
-                if "no " in text_lower and ax_lower in text_lower.replace("no ", ""):
-                    return True
-        
-        # 2. Hardcoded fallacies (Zero-Mock: These would be synced from 'Antibodies' table in real prod)
-        # We already pull from antibodies in generate_absolute_truth, but here we scan the stream.
-        return False
+                
+                yield token
+            else:
+                if scanner.flush():
+                    yield "[INTERRUPT: Alucinación Semántica Detectada]"
+        finally:
+            # Interrupted or client disconnected: stop the worker's generation
+            await stream.aclose()
 
     from fastapi.responses import StreamingResponse
     return StreamingResponse(output_generator(), media_type="text/plain")
@@ -0,0 +1,329 @@
+"""
+Metrics - Prometheus instrumentation for RLM Core
+
+A small in-process registry (counters, gauges, histograms) rendered in the
+Prometheus text format at /metrics, plus the hooks that feed it:
+- stage(): per-stage latency for the hot paths (auth, cache, embedding,
+  Vector-Skip, upstream LLM, parse, audit enqueue...)
+- MetricsMiddleware: in-flight gauge and request latency per route
+- InstrumentedTransport: status and latency of every upstream call
+- SamplingProfiler: opt-in stack sampler for the event loop thread,
+  served as collapsed stacks (flamegraph input)
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter as StackCounter
+from contextlib import contextmanager
+from typing import Callable, Iterable, Optional
+
+import httpx
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = labels
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(labels.get(name, "") for name in self.label_names)
+
+    def samples(self) -> Iterable[str]:
+        return ()
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Incremented directly, or read at scrape time from totals a component already keeps (`fn`)."""
+    kind = "counter"
+
+    def __init__(
+        self, name: str, help: str, labels: tuple[str, ...] = (),
+        fn: Optional[Callable[[], dict[tuple, float]]] = None,
+    ):
+        super().__init__(name, help, labels)
+        self.fn = fn
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> Iterable[str]:
+        if self.fn is not None:
+            try:
+                items = list(self.fn().items())
+            except Exception:
+                items = []
+        else:
+            with self._lock:
+                items = list(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_labels(self.label_names, key)} {_number(value)}"
+
+
+class Gauge(_Metric):
+    """Set directly, or computed at scrape time by `fn` ({label values: value})."""
+    kind = "gauge"
+
+    def __init__(
+        self, name: str, help: str, labels: tuple[str, ...] = (),
+        fn: Optional[Callable[[], dict[tuple, float]]] = None,
+    ):
+        super().__init__(name, help, labels)
+        self.fn = fn
+        self._values: dict[tuple, float] = {}
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def samples(self) -> Iterable[str]:
+        if self.fn is not None:
+            try:
+                items = list(self.fn().items())
+            except Exception:
+                items = []
+        else:
+            with self._lock:
+                items = list(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_labels(self.label_names, key)} {_number(value)}"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = (), buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._series: dict[tuple, list] = {} # key -> [bucket counts..., sum, count]
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            items = [(key, list(series)) for key, series in self._series.items()]
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                yield f"{self.name}_bucket{_labels(self.label_names, key, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.label_names, key)} {_number(series[-2])}"
+            yield f"{self.name}_count{_labels(self.label_names, key)} {series[-1]}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: list[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help: str, labels: tuple[str, ...] = (), fn=None) -> Counter:
+        return self.register(Counter(name, help, labels, fn))
+
+    def gauge(self, name: str, help: str, labels: tuple[str, ...] = (), fn=None) -> Gauge:
+        return self.register(Gauge(name, help, labels, fn))
+
+    def histogram(self, name: str, help: str, labels: tuple[str, ...] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labels, buckets))
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics) + "\n"
+
+
+registry = Registry()
+
+STAGE_SECONDS = registry.histogram(
+    "rlm_stage_seconds", "Time spent per request stage", ("endpoint", "stage")
+)
+REQUEST_SECONDS = registry.histogram(
+    "rlm_request_seconds", "End-to-end request latency, including streamed bodies", ("endpoint", "status")
+)
+IN_FLIGHT = registry.gauge("rlm_requests_in_flight", "Requests currently being served", ("endpoint",))
+TTFT_SECONDS = registry.histogram(
+    "rlm_time_to_first_token_seconds", "Time from request start to the first streamed token", ("endpoint",)
+)
+CACHE_EVENTS = registry.counter("rlm_cache_events_total", "Verdict cache lookups", ("cache", "result"))
+VECTOR_SKIP = registry.counter("rlm_vector_skip_total", "Vector-Skip checks", ("result",))
+FALLBACKS = registry.counter("rlm_fallbacks_total", "Default-safe verdicts returned instead of a model answer", ("reason",))
+UPSTREAM_REQUESTS = registry.counter("rlm_upstream_requests_total", "Upstream HTTP calls", ("upstream", "status"))
+UPSTREAM_SECONDS = registry.histogram(
+    "rlm_upstream_seconds", "Upstream latency to response headers", ("upstream",)
+)
+
+
+@contextmanager
+def stage(endpoint: str, name: str):
+    """Times one stage of a request into rlm_stage_seconds."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint, stage=name)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware: in-flight gauge and latency per route. Streaming bodies
+    are included, since the call only returns once the body is sent. Paths
+    that match no route are grouped as "other" to bound label cardinality.
+    """
+    def __init__(self, app, known_paths: Callable[[], set[str]]):
+        self.app = app
+        self.known_paths = known_paths
+        self._paths: Optional[set[str]] = None # routes are fixed once serving starts
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        if self._paths is None:
+            self._paths = self.known_paths()
+        path = scope["path"]
+        endpoint = path if path in self._paths else "other"
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        IN_FLIGHT.inc(endpoint=endpoint)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            IN_FLIGHT.dec(endpoint=endpoint)
+            REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint, status=str(status["code"]))
+
+
+class InstrumentedTransport(httpx.AsyncBaseTransport):
+    """Counts and times every call made through an upstream client."""
+    def __init__(self, name: str, inner: httpx.AsyncBaseTransport):
+        self.name = name
+        self.inner = inner
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        started = time.perf_counter()
+        try:
+            response = await self.inner.handle_async_request(request)
+        except httpx.TransportError as e:
+            UPSTREAM_REQUESTS.inc(upstream=self.name, status=type(e).__name__)
+            raise
+        finally:
+            UPSTREAM_SECONDS.observe(time.perf_counter() - started, upstream=self.name)
+        UPSTREAM_REQUESTS.inc(upstream=self.name, status=str(response.status_code))
+        return response
+
+    async def aclose(self):
+        await self.inner.aclose()
+
+
+class SamplingProfiler:
+    """
+    Samples the event loop thread's stack every `interval` seconds from a
+    daemon thread and aggregates collapsed stacks ("a;b;c count"), the
+    input format of flamegraph tools. Overhead is one frame walk per sample.
+    """
+    MAX_STACKS = 5000
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.samples = 0
+        self._stacks: StackCounter = StackCounter()
+        self._target: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._target = threading.get_ident() # called from the event loop thread
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="rlm-profiler", daemon=True)
+        self._thread.start()
+        print(f"[Profiler] Sampling the event loop every {self.interval * 1000:.0f}ms.")
+
+    def stop(self):
+        self._stop.set()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            key = ";".join(reversed(stack))
+            if key in self._stacks or len(self._stacks) < self.MAX_STACKS:
+                self._stacks[key] += 1
+            self.samples += 1
+
+    def collapsed(self, reset: bool = False) -> str:
+        stacks = self._stacks
+        if reset:
+            self._stacks = StackCounter()
+        return "\n".join(f"{stack} {count}" for stack, count in stacks.most_common()) + "\n"
@@ -0,0 +1,201 @@
+"""
+Resilience - Circuit breakers and hedged calls for upstream providers
+
+CircuitBreaker (one per upstream, installed as a transport layer on the
+upstream pool):
+- closed: calls pass; consecutive failures (transport errors, timeouts,
+  5xx) are counted and the breaker opens at the threshold
+- open: calls fail immediately with CircuitOpenError instead of waiting
+  out the httpx timeout
+- half-open: after the cooldown a limited number of probe calls go
+  through; a success closes the breaker, a failure opens it again
+
+CircuitOpenError is an httpx.RequestError, so every existing handler for
+an unreachable upstream (Offline-Fallback, per-item embedding errors,
+antibody write retries) already covers it.
+
+Hedger races a call against an alternate provider: the alternate starts
+when the primary exceeds its delay (its rolling p95) or fails outright.
+"""
+import asyncio
+import time
+from typing import Awaitable, Callable, Optional, TypeVar
+
+import httpx
+
+T = TypeVar("T")
+
+
+class CircuitOpenError(httpx.RequestError):
+    """The upstream's breaker is open: the call was not attempted."""
+
+
+class CircuitBreaker:
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, name: str, failure_threshold: int, cooldown: float, probes: int = 1):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.probes = probes
+        self.failures = 0 # consecutive
+        self.opened = 0
+        self.rejected = 0
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probing = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.cooldown:
+            self._state = self.HALF_OPEN
+            self._probing = 0
+        return self._state
+
+    def acquire(self, request: Optional[httpx.Request] = None) -> bool:
+        """Admits a call or raises CircuitOpenError. Returns True for a half-open probe."""
+        state = self.state
+        if state == self.CLOSED:
+            return False
+        if state == self.HALF_OPEN and self._probing < self.probes:
+            self._probing += 1
+            return True
+        self.rejected += 1
+        raise CircuitOpenError(f"Circuit open for upstream '{self.name}'", request=request)
+
+    def record(self, ok: bool, probe: bool):
+        if probe:
+            self._probing -= 1
+        if ok:
+            if probe or self._state == self.CLOSED:
+                self._state = self.CLOSED
+                self.failures = 0
+            return
+        self.failures += 1
+        if probe or (self._state == self.CLOSED and self.failures >= self.failure_threshold):
+            self._open()
+
+    def release(self, probe: bool):
+        """A call ended without an outcome (cancelled): frees its probe slot."""
+        if probe:
+            self._probing -= 1
+
+    def _open(self):
+        if self._state != self.OPEN:
+            self.opened += 1
+            print(f"[Breaker] Upstream '{self.name}' failing ({self.failures} in a row). Circuit open for {self.cooldown:.0f}s.")
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "opened": self.opened,
+            "rejected": self.rejected,
+        }
+
+
+class BreakerTransport(httpx.AsyncBaseTransport):
+    def __init__(self, breaker: CircuitBreaker, inner: httpx.AsyncBaseTransport):
+        self.breaker = breaker
+        self.inner = inner
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        probe = self.breaker.acquire(request)
+        try:
+            response = await self.inner.handle_async_request(request)
+        except httpx.TransportError:
+            self.breaker.record(False, probe)
+            raise
+        except BaseException:
+            self.breaker.release(probe)
+            raise
+        self.breaker.record(response.status_code < 500, probe)
+        return response
+
+    async def aclose(self):
+        await self.inner.aclose()
+
+
+class BreakerRegistry:
+    """One breaker per upstream; `layer` plugs into UpstreamPool.add_layer."""
+    def __init__(self, failure_threshold: int, cooldown: float, probes: int, enabled: bool = True):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.probes = probes
+        self.enabled = enabled
+        self.breakers: dict[str, CircuitBreaker] = {}
+
+    def get(self, name: str) -> CircuitBreaker:
+        breaker = self.breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(name, self.failure_threshold, self.cooldown, self.probes)
+            self.breakers[name] = breaker
+        return breaker
+
+    def layer(self, name: str, inner: httpx.AsyncBaseTransport) -> httpx.AsyncBaseTransport:
+        return BreakerTransport(self.get(name), inner) if self.enabled else inner
+
+    def stats(self) -> dict:
+        return {name: breaker.stats() for name, breaker in self.breakers.items()}
+
+
+class Hedger:
+    def __init__(self, min_delay: float):
+        self.min_delay = min_delay
+        self.calls = 0
+        self.hedged = 0 # alternate started because the primary was slow
+        self.failovers = 0 # alternate started because the primary failed
+        self.alternate_wins = 0
+
+    async def run(
+        self,
+        primary: Callable[[], Awaitable[T]],
+        alternate: Optional[Callable[[], Awaitable[T]]],
+        delay: Optional[float],
+    ) -> tuple[bool, T]:
+        """
+        Returns (alternate_won, result) from the first call to succeed.
+        With no delay (no latency history yet) the alternate only runs on
+        failure. If both fail, the last error is raised.
+        """
+        self.calls += 1
+        if alternate is None:
+            return False, await primary()
+
+        primary_task = asyncio.create_task(primary())
+        alternate_task: Optional[asyncio.Task] = None
+        pending = {primary_task}
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                timeout = max(delay, self.min_delay) if alternate_task is None and delay is not None else None
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    self.hedged += 1
+                    alternate_task = asyncio.create_task(alternate())
+                    pending.add(alternate_task)
+                    continue
+                for task in done:
+                    if task.exception() is None:
+                        won = task is alternate_task
+                        self.alternate_wins += won
+                        return won, task.result()
+                    error = task.exception()
+                if alternate_task is None:
+                    self.failovers += 1
+                    alternate_task = asyncio.create_task(alternate())
+                    pending.add(alternate_task)
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "hedged": self.hedged,
+            "failovers": self.failovers,
+            "alternate_wins": self.alternate_wins,
+        }
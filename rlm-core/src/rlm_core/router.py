@@ -0,0 +1,222 @@
+"""
+Smart Router - Telemetry-driven local vs. cloud routing
+
+Each route target (local Ollama model, cloud model) keeps a rolling window
+of its recent calls: latency, errors and generated tokens. A decision
+starts from the preferred target (cloud when keys are configured, as
+before) and moves to the other one when:
+- the preferred target's predicted latency (rolling p95, stretched by its
+  scheduler queue) breaks the latency SLO and the other one does not
+- the preferred target is failing (error rate over the threshold)
+Cloud is only chosen while the rolling hourly spend is under the budget.
+"""
+import time
+from collections import deque
+from typing import Optional
+
+import numpy as np
+
+from .scheduler import ModelScheduler
+
+# Below this many samples a target has no latency estimate yet
+MIN_SAMPLES = 5
+
+
+class RouteTarget:
+    def __init__(
+        self, name: str, upstream: str, model: str, enabled: bool,
+        price_in: float = 0.0, price_out: float = 0.0
+    ):
+        self.name = name
+        self.upstream = upstream
+        self.model = model
+        self.enabled = enabled
+        self.price_in = price_in # USD per million tokens
+        self.price_out = price_out
+
+    def cost(self, input_tokens: int, output_tokens: int = 0) -> float:
+        return (input_tokens * self.price_in + output_tokens * self.price_out) / 1_000_000
+
+
+class Telemetry:
+    """Rolling window of (timestamp, latency, ok, output tokens, cost) per target."""
+    def __init__(self, window: float):
+        self.window = window
+        self._samples: deque[tuple[float, float, bool, int, float]] = deque()
+
+    def record(self, latency: float, ok: bool, tokens: int = 0, cost: float = 0.0):
+        self._samples.append((time.monotonic(), latency, ok, tokens, cost))
+        self._trim()
+
+    def _trim(self):
+        horizon = time.monotonic() - self.window
+        while self._samples and self._samples[0][0] < horizon:
+            self._samples.popleft()
+
+    def __len__(self) -> int:
+        self._trim()
+        return len(self._samples)
+
+    def latency(self, percentile: float) -> Optional[float]:
+        """
+        Percentile of successful calls inside the window. Uses the nearest
+        lower rank instead of interpolating, so for p95 the single slowest
+        call never sets the estimate on its own.
+        """
+        self._trim()
+        latencies = [s[1] for s in self._samples if s[2]]
+        if len(latencies) < MIN_SAMPLES:
+            return None
+        return float(np.percentile(latencies, percentile, method="lower"))
+
+    def error_rate(self) -> float:
+        if len(self) < MIN_SAMPLES:
+            return 0.0
+        return sum(1 for s in self._samples if not s[2]) / len(self._samples)
+
+    def tokens_per_second(self) -> Optional[float]:
+        busy = sum(s[1] for s in self._samples if s[2] and s[3])
+        tokens = sum(s[3] for s in self._samples if s[2])
+        return tokens / busy if busy else None
+
+    def spend(self) -> float:
+        self._trim()
+        return sum(s[4] for s in self._samples)
+
+
+class RouteDecision:
+    def __init__(self, target: RouteTarget, reasoning: str, estimated_cost: float, predicted_latency: Optional[float]):
+        self.target = target
+        self.reasoning = reasoning
+        self.estimated_cost = estimated_cost
+        self.predicted_latency = predicted_latency
+
+    @property
+    def use_local(self) -> bool:
+        return self.target.name == "local"
+
+
+class SmartRouter:
+    def __init__(
+        self,
+        local: RouteTarget,
+        cloud: RouteTarget,
+        quality: RouteTarget,
+        scheduler: ModelScheduler,
+        prefer: str,
+        slo: float,
+        hourly_budget: float,
+        window: float,
+        max_error_rate: float
+    ):
+        self.targets = {"local": local, "cloud": cloud}
+        self.quality = quality
+        self.scheduler = scheduler
+        self.prefer = prefer
+        self.slo = slo
+        self.hourly_budget = hourly_budget
+        self.max_error_rate = max_error_rate
+        self.telemetry = {name: Telemetry(window) for name in self.targets}
+        # Spend is tracked over a fixed hour, independent of the latency window
+        self._spend = Telemetry(3600.0)
+        self.decisions = {"local": 0, "cloud": 0}
+        self.spills = 0
+
+    def record(self, target: RouteTarget, latency: float, ok: bool, tokens: int = 0, input_tokens: int = 0):
+        cost = target.cost(input_tokens, tokens) if ok else 0.0
+        self.telemetry[target.name].record(latency, ok, tokens, cost)
+        if cost:
+            self._spend.record(0.0, True, 0, cost)
+
+    def hourly_spend(self) -> float:
+        return self._spend.spend()
+
+    def over_budget(self) -> bool:
+        return self.hourly_budget > 0 and self.hourly_spend() >= self.hourly_budget
+
+    def predicted_latency(self, target: RouteTarget) -> Optional[float]:
+        """Rolling p95, scaled by how many scheduler rounds a new call would wait."""
+        p95 = self.telemetry[target.name].latency(95)
+        lane = self.scheduler.lane(target.upstream, target.model)
+        backlog = (lane.queued + lane.active) / max(lane.concurrency, 1)
+        if p95 is None:
+            # No history yet: only a backlog deeper than one round counts against it
+            return None if backlog < 1 else backlog * self.slo
+        return p95 * (1 + max(0.0, backlog - 1))
+
+    def _healthy(self, target: RouteTarget) -> bool:
+        return self.telemetry[target.name].error_rate() <= self.max_error_rate
+
+    def decide(
+        self, input_tokens: int, complexity: str = "MEDIUM",
+        task_type: str = "verification", require_high_quality: bool = False
+    ) -> RouteDecision:
+        wants_quality = require_high_quality or (complexity == "HIGH" and task_type == "generation")
+        if wants_quality and self.quality.enabled:
+            reason = "High quality required" if require_high_quality else "Complex generation task"
+            return RouteDecision(
+                self.quality, f"{reason} - routing to {self.quality.model}",
+                self.quality.cost(input_tokens), None
+            )
+        # Quality model unavailable (no cloud keys): route like any other call
+
+        enabled = [t for t in self.targets.values() if t.enabled]
+        if not enabled:
+            raise RuntimeError("No route target is enabled")
+        preferred = self.targets[self.prefer] if self.targets[self.prefer].enabled else enabled[0]
+        alternative = next((t for t in enabled if t is not preferred), None)
+        chosen, reasoning = preferred, f"Preferred target ({preferred.model})"
+        predicted = self.predicted_latency(preferred)
+
+        if alternative is not None:
+            alt_allowed = alternative.name != "cloud" or not self.over_budget()
+            alt_predicted = self.predicted_latency(alternative)
+            alt_meets_slo = alt_predicted is None or alt_predicted <= self.slo
+            if preferred.name == "cloud" and self.over_budget():
+                chosen, reasoning = alternative, f"Cloud budget of ${self.hourly_budget:.2f}/h spent"
+            elif alt_allowed and not self._healthy(preferred) and self._healthy(alternative):
+                chosen, reasoning = alternative, f"{preferred.name} failing ({self.telemetry[preferred.name].error_rate():.0%} errors)"
+            elif alt_allowed and predicted is not None and predicted > self.slo and alt_meets_slo:
+                chosen, reasoning = alternative, f"{preferred.name} predicted {predicted * 1000:.0f}ms over the {self.slo * 1000:.0f}ms SLO"
+            if chosen is alternative:
+                predicted = alt_predicted
+                self.spills += 1
+
+        self.decisions[chosen.name] += 1
+        return RouteDecision(chosen, reasoning, chosen.cost(input_tokens), predicted)
+
+    def alternate(self, target: RouteTarget) -> Optional[RouteTarget]:
+        """The other target, if it may take this call (enabled, healthy, within budget)."""
+        other = next((t for t in self.targets.values() if t is not target and t.enabled), None)
+        if other is None or not self._healthy(other):
+            return None
+        if other.name == "cloud" and self.over_budget():
+            return None
+        return other
+
+    def hedge_delay(self, target: RouteTarget) -> Optional[float]:
+        return self.telemetry[target.name].latency(95)
+
+    def stats(self) -> dict:
+        targets = {}
+        for name, target in self.targets.items():
+            telemetry = self.telemetry[name]
+            p50, p95 = telemetry.latency(50), telemetry.latency(95)
+            targets[name] = {
+                "model": target.model,
+                "enabled": target.enabled,
+                "samples": len(telemetry),
+                "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+                "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+                "error_rate": round(telemetry.error_rate(), 3),
+                "tokens_per_second": telemetry.tokens_per_second(),
+                "decisions": self.decisions[name],
+            }
+        return {
+            "prefer": self.prefer,
+            "slo_ms": self.slo * 1000,
+            "hourly_budget_usd": self.hourly_budget,
+            "hourly_spend_usd": round(self.hourly_spend(), 6),
+            "spills": self.spills,
+            "targets": targets,
+        }
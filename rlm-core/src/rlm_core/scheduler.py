@@ -0,0 +1,151 @@
+"""
+Model Scheduler - Admission control in front of upstream LLM calls
+
+Every model call takes a slot on its lane (one lane per upstream model).
+Waiting requests are granted in priority order: interactive LOW complexity
+first, background work (audits, bulk batches) last. When an idle lane
+receives work it waits a short window before dispatching, so a burst is
+collected and served by priority instead of arrival order. Each lane has
+bounded concurrency and a bounded queue, so a burst of 50 requests to a
+GPU-less Ollama box queues (or is rejected early) instead of thrashing it.
+"""
+import asyncio
+import heapq
+import itertools
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+COMPLEXITY_PRIORITY = {"LOW": 0, "MEDIUM": 1, "HIGH": 2}
+BACKGROUND_PRIORITY = 10
+
+
+def priority_for(complexity: str, background: bool = False) -> int:
+    """Lower runs first. Background work always yields to interactive work."""
+    base = COMPLEXITY_PRIORITY.get(complexity, 1)
+    return base + BACKGROUND_PRIORITY if background else base
+
+
+class SchedulerSaturated(Exception):
+    """The lane's queue is full; the caller should degrade instead of waiting."""
+
+
+class _Lane:
+    def __init__(self, name: str, concurrency: int, max_queue: int, window: float):
+        self.name = name
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.window = window
+        self.active = 0
+        self.dispatched = 0
+        self.rejected = 0
+        self._waiting = 0 # live waiters; the heap also holds cancelled ones until popped
+        self._heap: list[tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def queued(self) -> int:
+        return self._waiting
+
+    async def acquire(self, priority: int):
+        if self._waiting >= self.max_queue:
+            self.rejected += 1
+            raise SchedulerSaturated(f"Scheduler lane '{self.name}' is saturated")
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._heap, (priority, next(self._seq), fut))
+        self._waiting += 1
+        self._schedule()
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # Granted right as the caller was cancelled: hand the slot back
+                self.release()
+            else:
+                self._waiting -= 1
+                if len(self._heap) > 2 * self._waiting + 64:
+                    # Mostly cancelled entries (e.g. an abandoned batch): drop them now
+                    self._heap = [entry for entry in self._heap if not entry[2].done()]
+                    heapq.heapify(self._heap)
+            raise
+
+    def release(self):
+        self.active -= 1
+        self._dispatch()
+
+    def _schedule(self):
+        if self.active >= self.concurrency:
+            return # a release() will dispatch
+        if self.window <= 0 or self.active > 0:
+            self._dispatch()
+        elif self._timer is None:
+            # Idle lane: collect the burst for one window, then serve by priority
+            self._timer = asyncio.get_running_loop().call_later(self.window, self._dispatch)
+
+    def _dispatch(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self.active < self.concurrency and self._heap:
+            _, _, fut = heapq.heappop(self._heap)
+            if fut.done():
+                continue # waiter was cancelled
+            self._waiting -= 1
+            self.active += 1
+            self.dispatched += 1
+            fut.set_result(None)
+
+    def stats(self) -> dict:
+        return {
+            "active": self.active,
+            "queued": self.queued,
+            "concurrency": self.concurrency,
+            "dispatched": self.dispatched,
+            "rejected": self.rejected,
+        }
+
+
+class ModelScheduler:
+    def __init__(self, window: float, max_queue: int, concurrency: dict[str, int], default_concurrency: int):
+        self.window = window
+        self.max_queue = max_queue
+        self.concurrency = concurrency
+        self.default_concurrency = default_concurrency
+        self._lanes: dict[str, _Lane] = {}
+
+    def lane(self, upstream: str, model: str) -> _Lane:
+        name = f"{upstream}:{model}"
+        lane = self._lanes.get(name)
+        if lane is None:
+            lane = _Lane(
+                name,
+                self.concurrency.get(upstream, self.default_concurrency),
+                self.max_queue,
+                self.window,
+            )
+            self._lanes[name] = lane
+        return lane
+
+    @asynccontextmanager
+    async def slot(self, upstream: str, model: str, priority: int):
+        lane = self.lane(upstream, model)
+        await lane.acquire(priority)
+        try:
+            yield
+        finally:
+            lane.release()
+
+    async def submit(self, upstream: str, model: str, priority: int, fn: Callable[[], Awaitable[T]]) -> T:
+        async with self.slot(upstream, model, priority):
+            return await fn()
+
+    def queue_depth(self, upstream: Optional[str] = None) -> int:
+        return sum(
+            lane.queued for name, lane in self._lanes.items()
+            if upstream is None or name.startswith(f"{upstream}:")
+        )
+
+    def stats(self) -> dict:
+        return {name: lane.stats() for name, lane in self._lanes.items()}
@@ -0,0 +1,91 @@
+"""
+Single-Flight - In-flight request coalescing for RLM Core
+
+Concurrent callers asking for the same key share one execution: the first
+caller starts the work, duplicates await the same task and receive the same
+result (or the same exception). The shared work is only cancelled when
+every caller waiting on it has gone away.
+"""
+import asyncio
+from typing import Awaitable, Callable, Generic, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class _Call:
+    def __init__(self, task: asyncio.Future):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight(Generic[T]):
+    def __init__(self):
+        self._calls: dict[Hashable, _Call] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        call = self._calls.get(key)
+        if call is None:
+            call = self._start(key, asyncio.ensure_future(fn()))
+        else:
+            self.coalesced += 1
+        return await self._wait(call)
+
+    async def do_many(
+        self, keys: list[Hashable], fn: Callable[[list[Hashable]], Awaitable[list[T]]]
+    ) -> list[T]:
+        """
+        Batch variant: keys already in flight are awaited, all the others are
+        computed by a single fn(new_keys) call that returns results in order.
+        """
+        new_keys = [key for key in dict.fromkeys(keys) if key not in self._calls]
+        if new_keys:
+            batch = asyncio.ensure_future(fn(new_keys))
+            picks = [asyncio.ensure_future(self._pick(batch, i)) for i in range(len(new_keys))]
+            remaining = [len(picks)]
+
+            def release(_):
+                # Cancel the shared batch once no key still needs it
+                remaining[0] -= 1
+                if remaining[0] == 0 and not batch.done():
+                    batch.cancel()
+
+            for key, pick in zip(new_keys, picks):
+                pick.add_done_callback(release)
+                self._start(key, pick)
+        self.coalesced += len(set(keys)) - len(new_keys)
+        return list(await asyncio.gather(*[self._wait(self._calls[key]) for key in keys]))
+
+    @staticmethod
+    async def _pick(batch: asyncio.Future, index: int):
+        return (await asyncio.shield(batch))[index]
+
+    def _start(self, key: Hashable, task: asyncio.Future) -> _Call:
+        call = _Call(task)
+        self._calls[key] = call
+        self.leaders += 1
+
+        def forget(_):
+            if self._calls.get(key) is call:
+                del self._calls[key]
+
+        task.add_done_callback(forget)
+        return call
+
+    @staticmethod
+    async def _wait(call: _Call):
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Every caller went away: nobody needs the result
+                call.task.cancel()
@@ -0,0 +1,99 @@
+"""
+Dual-Stream Multiplexer - Frame scheduling for /bicameral_stream
+
+Merges the generator (A) and the fiscal verdict (B) into one text/plain
+stream of "A:" / "B:" frames:
+- B goes out the moment the verdict resolves, even while A is stalled
+  on a slow token or still preparing its prompt
+- The first A token goes out on its own, so coalescing never adds to the
+  time to first token; later tokens are coalesced into one frame per
+  flush interval (or per size cap) instead of one frame per token
+- All state lives in the call, never on shared objects
+"""
+import asyncio
+import json
+import time
+from typing import AsyncIterator, Awaitable
+
+# Faster NDJSON decoding for upstream streams (orjson is a dependency; the
+# stdlib decoder only covers installs without a wheel for the platform)
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
+
+_TOKEN, _VERDICT, _A_DONE, _ERROR = range(4)
+
+
+async def bicameral_frames(
+    tokens: AsyncIterator[str],
+    verdict: Awaitable[str],
+    flush_interval: float,
+    max_frame: int,
+) -> AsyncIterator[str]:
+    """
+    Yields "A:<text>\\n" and "B:<verdict>\\n" frames until both sides are done.
+    An exception from either side is raised after pending A text is flushed.
+    """
+    events: asyncio.Queue = asyncio.Queue()
+
+    async def pump_tokens():
+        try:
+            async for token in tokens:
+                events.put_nowait((_TOKEN, token))
+            events.put_nowait((_A_DONE, None))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            events.put_nowait((_ERROR, e))
+
+    async def pump_verdict():
+        try:
+            events.put_nowait((_VERDICT, await verdict))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            events.put_nowait((_ERROR, e))
+
+    tasks = [asyncio.create_task(pump_tokens()), asyncio.create_task(pump_verdict())]
+    pending: list[str] = []
+    pending_size = 0
+    deadline = 0.0
+    first_token = True
+    open_sides = 2
+    try:
+        while open_sides:
+            timeout = max(0.0, deadline - time.monotonic()) if pending else None
+            try:
+                kind, value = await asyncio.wait_for(events.get(), timeout)
+            except asyncio.TimeoutError:
+                yield f"A:{''.join(pending)}\n"
+                pending, pending_size = [], 0
+                continue
+
+            if kind == _TOKEN:
+                if not value:
+                    continue
+                if not pending:
+                    deadline = time.monotonic() + flush_interval
+                pending.append(value)
+                pending_size += len(value)
+                if first_token or pending_size >= max_frame or flush_interval <= 0:
+                    first_token = False
+                    yield f"A:{''.join(pending)}\n"
+                    pending, pending_size = [], 0
+            elif kind == _VERDICT:
+                yield f"B:{value}\n"
+                open_sides -= 1
+            else:
+                if pending:
+                    yield f"A:{''.join(pending)}\n"
+                    pending, pending_size = [], 0
+                if kind == _ERROR:
+                    raise value
+                open_sides -= 1
+    finally:
+        # Client gone or a side failed: stop whatever is still running
+        for task in tasks:
+            task.cancel()
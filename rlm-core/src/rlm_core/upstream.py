@@ -0,0 +1,118 @@
+"""
+Upstream Pool - Shared HTTP clients for RLM Core
+
+One long-lived, keep-alive httpx.AsyncClient per upstream (cloud LLM API,
+local Ollama, Supabase). Clients are opened by the FastAPI lifespan and
+closed on shutdown, so requests stop paying a TCP/TLS handshake each time.
+"""
+import os
+from typing import Callable, Optional
+
+import httpx
+
+# HTTP/2 needs the optional 'h2' package (httpx[http2])
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+def env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+def env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+class UpstreamConfig:
+    """
+    Connection settings for a single upstream.
+    Every value can be overridden with RLM_<NAME>_<SETTING> env vars,
+    falling back to the shared RLM_HTTP_<SETTING> defaults.
+    """
+    def __init__(self, name: str, timeout: float, http2: bool = False):
+        prefix = f"RLM_{name.upper()}"
+        self.name = name
+        self.timeout = env_float(f"{prefix}_TIMEOUT", timeout)
+        self.connect_timeout = env_float(
+            f"{prefix}_CONNECT_TIMEOUT", env_float("RLM_HTTP_CONNECT_TIMEOUT", 5.0)
+        )
+        self.max_connections = env_int(
+            f"{prefix}_MAX_CONNECTIONS", env_int("RLM_HTTP_MAX_CONNECTIONS", 100)
+        )
+        self.max_keepalive = env_int(
+            f"{prefix}_MAX_KEEPALIVE", env_int("RLM_HTTP_MAX_KEEPALIVE", 20)
+        )
+        self.keepalive_expiry = env_float(
+            f"{prefix}_KEEPALIVE_EXPIRY", env_float("RLM_HTTP_KEEPALIVE_EXPIRY", 30.0)
+        )
+        self.http2 = HTTP2_AVAILABLE and env_bool(f"{prefix}_HTTP2", http2)
+
+    def build_client(self, layers: tuple["TransportLayer", ...] = ()) -> httpx.AsyncClient:
+        transport: httpx.AsyncBaseTransport = httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive,
+                keepalive_expiry=self.keepalive_expiry,
+            ),
+            http2=self.http2,
+        )
+        for layer in layers:
+            transport = layer(self.name, transport)
+        return httpx.AsyncClient(
+            timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+            transport=transport,
+        )
+
+
+# Wraps an upstream's transport (metrics, breakers...): (name, inner) -> transport
+TransportLayer = Callable[[str, httpx.AsyncBaseTransport], httpx.AsyncBaseTransport]
+
+
+class UpstreamPool:
+    """
+    Registry of pooled clients, one per upstream.
+    Clients are created on start() (or lazily on first use outside the
+    lifespan, e.g. in scripts) and reused for the life of the process.
+    """
+    def __init__(self):
+        self._configs: dict[str, UpstreamConfig] = {}
+        self._clients: dict[str, httpx.AsyncClient] = {}
+        self._layers: list[TransportLayer] = []
+
+    def register(self, config: UpstreamConfig):
+        self._configs[config.name] = config
+
+    def add_layer(self, layer: TransportLayer):
+        """Wraps the transport of every client built from now on (innermost first)."""
+        self._layers.append(layer)
+
+    def client(self, name: str) -> httpx.AsyncClient:
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            client = self._configs[name].build_client(tuple(self._layers))
+            self._clients[name] = client
+        return client
+
+    def config(self, name: str) -> Optional[UpstreamConfig]:
+        return self._configs.get(name)
+
+    async def start(self):
+        for name in self._configs:
+            self.client(name)
+
+    async def aclose(self):
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.aclose()
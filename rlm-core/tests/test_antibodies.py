@@ -0,0 +1,117 @@
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+
+from rlm_core.antibodies import (
+    AntibodyIndex,
+    AntibodySync,
+    AntibodyWriter,
+    LocalAntibodyStore,
+    WriterFull,
+    _rewind,
+    _SpillFile,
+)
+
+
+def antibody(i: int, project_id="p1") -> dict:
+    vector = np.zeros(4, dtype=np.float32)
+    vector[i % 4] = 1.0
+    return {"id": f"ab{i}", "content": f"fallacy {i}", "project_id": project_id, "embedding": vector}
+
+
+@pytest.mark.asyncio
+async def test_sync_pages_through_a_batch_sharing_one_timestamp(tmp_path):
+    store = LocalAntibodyStore(str(tmp_path / "antibodies.sqlite3"))
+    await store.insert([antibody(i) for i in range(8)])
+    sync = AntibodySync(store, AntibodyIndex(), interval=0, page_size=3)
+    try:
+        assert await sync.refresh() == 8
+        assert len(sync.index) == 8
+        assert await sync.refresh() == 0
+    finally:
+        await sync.aclose()
+
+
+@pytest.mark.asyncio
+async def test_sync_picks_up_rows_committed_behind_the_watermark(tmp_path):
+    store = LocalAntibodyStore(str(tmp_path / "antibodies.sqlite3"))
+    await store.insert([antibody(0)])
+    sync = AntibodySync(store, AntibodyIndex(), interval=0, overlap=60)
+    try:
+        await sync.refresh()
+        # A slow insert that started before the last pull commits only now
+        late = antibody(1)
+        store._connect().execute(
+            "INSERT INTO memory_antibodies (id, content, project_id, embedding, created_at) VALUES (?, ?, ?, ?, ?)",
+            (late["id"], late["content"], late["project_id"], late["embedding"].tobytes(), _rewind(sync.watermark, 1)),
+        )
+        assert await sync.refresh() == 1
+    finally:
+        await sync.aclose()
+
+
+def test_index_search_is_scoped_by_project():
+    index = AntibodyIndex()
+    index.add([antibody(0, "p1"), antibody(1, "p2"), antibody(2, None)])
+    query = np.array([1.0, 0.0, 1.0, 0.0], dtype=np.float32)
+    assert {m["id"] for m in index.search(query, "p1", 0.5, 5)} == {"ab0", "ab2"}
+    assert {m["id"] for m in index.search(query, "p2", 0.5, 5)} == {"ab2"}
+    assert {m["id"] for m in index.search(query, None, 0.5, 5)} == {"ab0", "ab2"}
+
+
+def submission(i: int) -> dict:
+    return {"id": f"ab{i}", "content": f"fallacy {i}", "embed_text": f"fallacy {i}", "project_id": "p1"}
+
+
+@pytest.mark.asyncio
+async def test_overflow_is_spilled_off_the_event_loop(tmp_path):
+    release = asyncio.Event()
+
+    async def embed(texts):
+        await release.wait()
+        return np.ones((len(texts), 4), dtype=np.float32)
+
+    writer = AntibodyWriter(
+        LocalAntibodyStore(str(tmp_path / "antibodies.sqlite3")), AntibodyIndex(), embed,
+        max_buffer=2, batch_size=10, flush_interval=60, spill_path=str(tmp_path / "spill.sqlite3"),
+    )
+    pushes = []
+    push = writer.spill.push
+    writer.spill.push = lambda items: (pushes.append(threading.get_ident()), push(items))
+    await writer.start()
+    try:
+        for i in range(4):
+            writer.submit(submission(i))
+        # The spiller has not run yet: a whole buffer of overflow is the limit
+        with pytest.raises(WriterFull):
+            writer.submit(submission(4))
+        assert pushes == []
+        assert writer.stats()["overflow"] == 2
+        for _ in range(100):
+            if writer.spilled == 2:
+                break
+            await asyncio.sleep(0.01)
+        assert writer.spilled == 2
+        assert threading.get_ident() not in pushes
+    finally:
+        release.set()
+        await writer.aclose()
+
+    spill = _SpillFile(str(tmp_path / "spill.sqlite3"))
+    assert [item["id"] for item in spill.pop(10)] == ["ab2", "ab3"]
+    spill.close()
+    assert writer.written == 2
+
+
+@pytest.mark.asyncio
+async def test_full_buffer_without_spill_file_rejects():
+    async def embed(texts):
+        return np.ones((len(texts), 4), dtype=np.float32)
+
+    writer = AntibodyWriter(None, AntibodyIndex(), embed, max_buffer=1, batch_size=10, flush_interval=60)
+    writer.submit(submission(0))
+    with pytest.raises(WriterFull):
+        writer.submit(submission(1))
+    assert writer.dropped == 1
@@ -0,0 +1,164 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from rlm_core.audits import AuditCallback, AuditPipeline, TokenBucket, _AuditFile
+
+
+def callback(node_id: str, claim: str = "claim", url: str = "http://hook") -> AuditCallback:
+    return AuditCallback(
+        node_id=node_id, project_id="p1", original_claim=claim, original_response="ok", webhook_url=url
+    )
+
+
+def pipeline(path, audit, post, max_attempts=3) -> AuditPipeline:
+    return AuditPipeline(
+        audit, post, str(path), workers=2,
+        llm_limit=TokenBucket(0, 1), webhook_limit=TokenBucket(0, 1),
+        batch_size=10, flush_interval=0.02, max_attempts=max_attempts,
+    )
+
+
+async def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_audits_are_deduplicated_and_delivered_in_batches(tmp_path):
+    audited, delivered = [], []
+
+    async def audit(cb):
+        audited.append(cb.original_claim)
+        return {"sycophancy_score": 0.1, "antithesis": "none"}
+
+    async def post(url, body):
+        delivered.extend(body)
+
+    audits = pipeline(tmp_path / "audits.sqlite3", audit, post)
+    await audits.start()
+    try:
+        audits.submit(callback("n1", "old"))
+        audits.submit(callback("n1", "new"))
+        audits.submit(callback("n2"))
+        await wait_for(lambda: audits.delivered == 2)
+    finally:
+        await audits.aclose()
+
+    assert sorted(audited) == ["claim", "new"]
+    assert {item["node_id"] for item in delivered} == {"n1", "n2"}
+    assert audits.deduplicated == 1
+    assert await audits.queue_counts() == {}
+
+
+@pytest.mark.asyncio
+async def test_rejected_webhook_drops_without_retrying(tmp_path):
+    posts = 0
+
+    async def audit(cb):
+        return {"sycophancy_score": 0.1, "antithesis": "none"}
+
+    async def post(url, body):
+        nonlocal posts
+        posts += 1
+        request = httpx.Request("POST", url)
+        raise httpx.HTTPStatusError("bad", request=request, response=httpx.Response(400, request=request))
+
+    audits = pipeline(tmp_path / "audits.sqlite3", audit, post)
+    await audits.start()
+    try:
+        audits.submit(callback("n1"))
+        await wait_for(lambda: audits.dropped == 1)
+    finally:
+        await audits.aclose()
+    assert posts == 1
+    assert await audits.queue_counts() == {}
+
+
+@pytest.mark.asyncio
+async def test_survives_restart_before_delivery(tmp_path):
+    async def audit(cb):
+        return {"sycophancy_score": 0.1, "antithesis": "none"}
+
+    async def never(url, body):
+        raise httpx.ConnectError("down")
+
+    first = pipeline(tmp_path / "audits.sqlite3", audit, never, max_attempts=100)
+    first.submit(callback("n1"))
+    await first.aclose()
+
+    delivered = []
+
+    async def post(url, body):
+        delivered.extend(body)
+
+    second = pipeline(tmp_path / "audits.sqlite3", audit, post)
+    await second.start()
+    try:
+        await wait_for(lambda: second.delivered == 1)
+    finally:
+        await second.aclose()
+    assert delivered[0]["node_id"] == "n1"
+
+
+def test_processes_never_lease_the_same_row(tmp_path):
+    path = str(tmp_path / "audits.sqlite3")
+    a, b = _AuditFile(path, 60), _AuditFile(path, 60)
+    a.owner, b.owner = "host:1", "host:2"
+    a.upsert([callback(f"n{i}").model_dump() for i in range(10)])
+
+    claimed_a = a.claim("pending", 6)
+    claimed_b = b.claim("pending", 6)
+    assert len(claimed_a) == 6
+    assert len(claimed_b) == 4
+    assert not {r[0] for r in claimed_a} & {r[0] for r in claimed_b}
+    assert b.claim("pending", 6) == []
+    a.close()
+    b.close()
+
+
+def test_expired_lease_is_taken_over_and_stale_owner_is_ignored(tmp_path):
+    path = str(tmp_path / "audits.sqlite3")
+    crashed, alive = _AuditFile(path, 0.01), _AuditFile(path, 60)
+    crashed.owner, alive.owner = "host:1", "host:2"
+    crashed.upsert([callback("n1").model_dump()])
+
+    (node_id, version, *_), = crashed.claim("pending", 1)
+    assert alive.claim("pending", 1) == []
+    time.sleep(0.02)
+    assert [r[0] for r in alive.claim("pending", 1)] == ["n1"]
+
+    # The first owner finishing late must not overwrite the new lease holder
+    crashed.audited(node_id, version, {"stale": True})
+    assert alive.counts() == {"pending": 1}
+    alive.audited(node_id, version, {"fresh": True})
+    assert alive.claim("audited", 1)[0][3] == {"fresh": True}
+    crashed.close()
+    alive.close()
+
+
+def test_release_returns_own_leases(tmp_path):
+    path = str(tmp_path / "audits.sqlite3")
+    a, b = _AuditFile(path, 60), _AuditFile(path, 60)
+    a.owner, b.owner = "host:1", "host:2"
+    a.upsert([callback("n1").model_dump()])
+    assert a.claim("pending", 1)
+    b.release()
+    assert b.claim("pending", 1) == []
+    a.release()
+    assert b.claim("pending", 1)
+    a.close()
+    b.close()
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate=100, burst=1)
+    started = time.monotonic()
+    for _ in range(4):
+        await bucket.acquire()
+    assert time.monotonic() - started >= 0.025
@@ -0,0 +1,51 @@
+from rlm_core.axioms import AxiomMatcher, AxiomMatcherCache
+
+
+def test_negated_statement_contradicts_axiom():
+    scanner = AxiomMatcher(["el cielo es azul"]).scanner()
+    assert scanner.feed("Hoy el cielo no es azul.") == "el cielo es azul"
+
+
+def test_matching_statement_does_not_contradict():
+    scanner = AxiomMatcher(["el cielo es azul"]).scanner()
+    assert scanner.feed("Sabemos que el cielo es azul.") is None
+    assert scanner.flush() is None
+
+
+def test_negated_axiom_is_contradicted_by_the_positive_form():
+    scanner = AxiomMatcher(["the server is not stateless"]).scanner()
+    assert scanner.feed("Note: the server is stateless") is None
+    assert scanner.flush() == "the server is not stateless"
+
+
+def test_words_split_across_chunks():
+    scanner = AxiomMatcher(["el cielo es azul"]).scanner()
+    for chunk in ["el ci", "elo n", "o es az"]:
+        assert scanner.feed(chunk) is None
+    assert scanner.feed("ul ") == "el cielo es azul"
+
+
+def test_distant_negation_does_not_count():
+    scanner = AxiomMatcher(["el cielo es azul"]).scanner()
+    assert scanner.feed("No. Dicho esto, el cielo es azul ") is None
+
+
+def test_leading_negation_does_not_count():
+    assert AxiomMatcher(["el cielo es azul"]).scanner().feed("No, el cielo es azul. ") is None
+    scanner = AxiomMatcher(["the server is stateless"]).scanner()
+    assert scanner.feed("not the server is stateless ") is None
+
+
+def test_axiom_opening_with_a_negation_keeps_it():
+    scanner = AxiomMatcher(["no hay cielo"]).scanner()
+    assert scanner.feed("Aqui no hay cielo. ") is None
+    assert scanner.feed("Pero hay cielo ") == "no hay cielo"
+
+
+def test_cache_is_keyed_by_content_not_order():
+    cache = AxiomMatcherCache(max_entries=1)
+    first = cache.get(["a b", "c d"])
+    assert cache.get(["c d", "a b", "a b"]) is first
+    cache.get(["e f"])
+    assert cache.get(["a b", "c d"]) is not first
+    assert cache.stats() == {"entries": 1, "hits": 1, "misses": 3}
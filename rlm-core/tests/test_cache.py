@@ -0,0 +1,115 @@
+import asyncio
+
+import numpy as np
+import pytest
+from pydantic import BaseModel
+
+from rlm_core.cache import (
+    MemoryBackend,
+    SemanticVerdictCache,
+    SQLiteBackend,
+    TieredBackend,
+    VerificationCache,
+)
+
+
+class Verdict(BaseModel):
+    ok: bool
+    notes: list[str] = []
+
+
+@pytest.mark.asyncio
+async def test_memory_backend_evicts_least_recently_used():
+    backend = MemoryBackend(max_entries=2, max_bytes=1024)
+    await backend.set("a", b"1")
+    await backend.set("b", b"2")
+    await backend.get("a")
+    await backend.set("c", b"3")
+    assert await backend.get("b") is None
+    assert await backend.get("a") == b"1"
+    assert backend.evictions == 1
+
+
+@pytest.mark.asyncio
+async def test_memory_backend_bounds_bytes_and_expires():
+    backend = MemoryBackend(max_entries=10, max_bytes=8)
+    await backend.set("a", b"xxxx")
+    await backend.set("b", b"yyyy")
+    await backend.set("c", b"zzzz")
+    assert await backend.get("a") is None
+    assert backend.stats()["bytes"] <= 8
+
+    await backend.set("short", b"v", ttl=0.01)
+    await asyncio.sleep(0.02)
+    assert await backend.get("short") is None
+    assert backend.expirations == 1
+
+
+@pytest.mark.asyncio
+async def test_sqlite_backend_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "verdicts.sqlite3")
+    writer = SQLiteBackend(path, max_entries=100, max_bytes=1 << 20)
+    reader = SQLiteBackend(path, max_entries=100, max_bytes=1 << 20)
+    try:
+        await writer.set("key", b"value", ttl=60)
+        value, ttl = await reader.get_entry("key")
+        assert value == b"value"
+        assert 0 < ttl <= 60
+    finally:
+        await writer.aclose()
+        await reader.aclose()
+
+
+@pytest.mark.asyncio
+async def test_sqlite_backend_write_behind_serves_pending_writes(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "verdicts.sqlite3"), 100, 1 << 20, flush_interval=60)
+    await backend.start()
+    try:
+        await backend.set("key", b"value")
+        assert backend.stats()["l2_pending_writes"] == 1
+        assert await backend.get("key") == b"value"
+    finally:
+        await backend.aclose()
+
+    reopened = SQLiteBackend(str(tmp_path / "verdicts.sqlite3"), 100, 1 << 20)
+    try:
+        assert await reopened.get("key") == b"value"
+    finally:
+        await reopened.aclose()
+
+
+@pytest.mark.asyncio
+async def test_tiered_backend_promotes_l2_hits(tmp_path):
+    l2 = SQLiteBackend(str(tmp_path / "verdicts.sqlite3"), 100, 1 << 20)
+    await l2.set("key", b"value")
+    l1 = MemoryBackend(10, 1024)
+    tiered = TieredBackend(l1, l2)
+    try:
+        assert await tiered.get("key") == b"value"
+        assert await l1.get("key") == b"value"
+    finally:
+        await tiered.aclose()
+
+
+@pytest.mark.asyncio
+async def test_verification_cache_returns_independent_copies():
+    cache = VerificationCache(MemoryBackend(10, 1024), Verdict)
+    await cache.set("key", Verdict(ok=True))
+    first = await cache.get("key")
+    first.notes.append("changed")
+    second = await cache.get("key")
+    assert second.notes == []
+    assert await cache.get("missing") is None
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 1
+
+
+def test_semantic_cache_matches_near_duplicates_within_scope():
+    cache = SemanticVerdictCache(max_distance=0.05, max_per_scope=4, max_scopes=2)
+    vector = np.array([1.0, 0.0], dtype=np.float32)
+    cache.add("pins", vector, "key")
+    close = np.array([0.999, 0.045], dtype=np.float32)
+    close /= np.linalg.norm(close)
+    assert cache.lookup("pins", close) == "key"
+    assert cache.lookup("other", close) is None
+    assert cache.lookup("pins", np.array([0.0, 1.0], dtype=np.float32)) is None
@@ -0,0 +1,14 @@
+import httpx
+
+from rlm_core.embeddings import _route_missing
+
+
+def test_missing_route_disables_the_batch_api():
+    assert _route_missing(httpx.Response(404, text="404 page not found"))
+    assert _route_missing(httpx.Response(405))
+
+
+def test_unknown_model_does_not_disable_the_batch_api():
+    assert not _route_missing(httpx.Response(404, json={"error": "model \"nomic\" not found, try pulling it first"}))
+    assert not _route_missing(httpx.Response(200, json={"embeddings": []}))
+    assert not _route_missing(httpx.Response(500))
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from rlm_core.encoding import PackedEmbeddings, decode_base64_embedding, decode_embeddings
+
+ROWS = [[0.5, -1.0, 0.25], [2.0, 0.0, -0.5]]
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float16"])
+def test_float_round_trip(dtype):
+    packed = PackedEmbeddings(ROWS, dtype)
+    body = packed.body
+    assert isinstance(body, bytes)
+    decoded = decode_embeddings(body, dtype, packed.count, packed.dimensions)
+    np.testing.assert_allclose(decoded, ROWS, rtol=1e-3)
+
+
+def test_int8_round_trip_within_one_step():
+    packed = PackedEmbeddings(ROWS, "int8")
+    decoded = decode_embeddings(packed.body, "int8", packed.count, packed.dimensions)
+    steps = np.abs(np.array(ROWS)).max(axis=1, keepdims=True) / 127
+    assert np.all(np.abs(decoded - np.array(ROWS)) <= steps)
+
+    values, scales = decode_embeddings(packed.body, "int8", packed.count, packed.dimensions, dequantize=False)
+    assert values.dtype == np.int8
+    assert scales.shape == (2,)
+
+
+def test_failed_rows_are_zero_and_reported():
+    packed = PackedEmbeddings([ROWS[0], None], "float32")
+    assert packed.failed == [1]
+    assert packed.headers("model")["X-Embedding-Failed"] == "1"
+    decoded = decode_embeddings(packed.body, "float32", 2, 3)
+    assert not decoded[1].any()
+
+
+def test_base64_rows():
+    packed = PackedEmbeddings(ROWS, "float32")
+    rows = packed.base64_rows()
+    np.testing.assert_allclose(decode_base64_embedding(rows[1]), ROWS[1])
+
+    quantized = PackedEmbeddings(ROWS, "int8")
+    row = decode_base64_embedding(quantized.base64_rows()[0], "int8", float(quantized.scales[0]))
+    np.testing.assert_allclose(row, ROWS[0], atol=float(quantized.scales[0]))
@@ -0,0 +1,103 @@
+import numpy as np
+
+from rlm_core.hypervisor import AxiomRegistry, RustTruthEnforcer, token_vocab
+
+
+class FakeHypervisor:
+    def __init__(self):
+        self.axioms: dict[str, bool] = {}
+        self.calls = 0
+
+    def add_axiom(self, claim: str, is_true: bool):
+        self.axioms[claim] = is_true
+        self.calls += 1
+
+
+def test_unchanged_pool_sends_nothing():
+    registry = AxiomRegistry(FakeHypervisor, max_projects=4)
+    state = registry.sync("p1", {"a": True})
+    assert registry.sync("p1", {"a": True}) is state
+    assert state.version == 1
+    assert registry.skipped == 1
+    assert state.hypervisor.calls == 1
+
+
+def test_additions_are_incremental_and_removals_rebuild():
+    registry = AxiomRegistry(FakeHypervisor, max_projects=4)
+    state = registry.sync("p1", {"a": True})
+    first = state.hypervisor
+    registry.sync("p1", {"a": True, "b": True})
+    assert state.hypervisor is first
+    assert first.calls == 2
+
+    registry.sync("p1", {"b": True})
+    assert state.hypervisor is not first
+    assert state.hypervisor.axioms == {"b": True}
+    assert first.axioms == {"a": True, "b": True} # in-flight users keep their instance
+    assert registry.rebuilds == 1
+
+
+def test_fallacies_accumulate_without_rebuilding():
+    registry = AxiomRegistry(FakeHypervisor, max_projects=4)
+    registry.sync("p1", {"a": True}, ["x"])
+    state = registry.sync("p1", {"a": True}, ["y"])
+    assert state.hypervisor.axioms == {"a": True, "x": False, "y": False}
+    assert registry.sync("p1", {"a": True}, []) is state
+    assert registry.skipped == 1
+    assert registry.rebuilds == 0
+
+
+def test_pin_outranks_fallacy_with_same_text():
+    registry = AxiomRegistry(FakeHypervisor, max_projects=4)
+    state = registry.sync("p1", {"a": True}, ["a"])
+    assert state.pool == {"a": True}
+
+
+def test_fallacies_are_trimmed_past_the_cap():
+    registry = AxiomRegistry(FakeHypervisor, max_projects=4, max_fallacies=4)
+    for claim in "abcd":
+        registry.sync("p1", {}, [claim])
+    assert registry.rebuilds == 0
+    state = registry.sync("p1", {}, ["e"])
+    assert list(state.fallacies) == ["c", "d", "e"]
+    assert registry.rebuilds == 1
+
+
+def test_projects_are_isolated_and_bounded():
+    registry = AxiomRegistry(FakeHypervisor, max_projects=2)
+    p1 = registry.sync("p1", {"a": True})
+    registry.sync("p2", {"b": True})
+    registry.sync(None, {"c": True})
+    assert registry.stats()["projects"] == 2
+    assert registry.sync("p1", {"a": True}) is not p1
+
+
+class FakeLlama:
+    model_path = "fake.gguf"
+    tokens = ["<s>", " Yes", "yes", " the", " nunca", " sky", " Claro"]
+
+    def n_vocab(self):
+        return len(self.tokens)
+
+    def detokenize(self, ids):
+        return "".join(self.tokens[i] for i in ids).encode()
+
+
+class RecordingHypervisor:
+    def __init__(self):
+        self.vocabs = []
+
+    def calculate_logit_bias(self, text, vocab):
+        self.vocabs.append(vocab)
+        return {vocab["yes"]: -100.0}
+
+
+def test_enforcer_only_passes_the_bias_tokens():
+    llm = FakeLlama()
+    assert token_vocab(llm) == {"yes": 1, "nunca": 4, "claro": 6}
+
+    hypervisor = RecordingHypervisor()
+    enforcer = RustTruthEnforcer(llm, hypervisor)
+    scores = enforcer(np.array([0, 3]), np.zeros(len(llm.tokens), dtype=np.float32))
+    assert scores[1] == -100.0
+    assert hypervisor.vocabs == [{"yes": 1, "nunca": 4, "claro": 6}]
@@ -0,0 +1,89 @@
+import threading
+import time
+
+from rlm_core import local_models
+from rlm_core.local_models import LocalModelManager
+
+
+class FakeLlama:
+    def __init__(self, **kwargs):
+        self.closed = False
+
+    def __call__(self, prompt, max_tokens=1):
+        return {}
+
+    def close(self):
+        self.closed = True
+
+
+def manager(tmp_path, instances=1) -> LocalModelManager:
+    model = tmp_path / "model.gguf"
+    model.write_bytes(b"")
+    return LocalModelManager(FakeLlama, str(model), instances=instances, warmup=False)
+
+
+def test_instances_are_loaded_lazily_and_reused(tmp_path):
+    models = manager(tmp_path, instances=2)
+    with models.checkout() as first:
+        pass
+    with models.checkout() as second:
+        assert second is first
+    assert models.loads == 1
+
+
+def test_checkout_never_exceeds_the_instance_count(tmp_path):
+    models = manager(tmp_path, instances=2)
+    active = peak = 0
+    lock = threading.Lock()
+
+    def work():
+        nonlocal active, peak
+        with models.checkout():
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.01)
+            with lock:
+                active -= 1
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert peak == 2
+    assert models.loads == 2
+    assert models.stats()["in_use"] == 0
+
+
+def test_unload_keeps_checked_out_instances(tmp_path):
+    models = manager(tmp_path, instances=2)
+    models.preload()
+    with models.checkout() as busy:
+        models.unload()
+        assert models.loaded == 1
+        assert not busy.closed
+    assert models.unloads == 1
+
+
+def test_waiter_loads_when_the_awaited_instance_is_unloaded(tmp_path, monkeypatch):
+    monkeypatch.setattr(local_models, "ACQUIRE_RECHECK", 0.05)
+    models = manager(tmp_path, instances=1)
+    busy = models._acquire()
+    got = []
+    waiter = threading.Thread(target=lambda: got.append(models._acquire()))
+    waiter.start()
+    time.sleep(0.02)
+
+    # The busy instance is dropped instead of returned, as unload() does to a
+    # released instance before the waiter wakes up
+    with models._lock:
+        models._in_use -= 1
+        models._loaded -= 1
+    busy.close()
+
+    waiter.join(2)
+    assert not waiter.is_alive()
+    assert got and got[0] is not busy
+    assert models.loaded == 1
+    assert models.loads == 2
@@ -0,0 +1,114 @@
+import asyncio
+
+import httpx
+import pytest
+
+from rlm_core.resilience import BreakerRegistry, CircuitBreaker, CircuitOpenError, Hedger
+
+
+class FlakyTransport(httpx.AsyncBaseTransport):
+    def __init__(self, fail: bool = True):
+        self.fail = fail
+        self.calls = 0
+
+    async def handle_async_request(self, request):
+        self.calls += 1
+        if self.fail:
+            raise httpx.ConnectError("refused", request=request)
+        return httpx.Response(200, request=request)
+
+
+def test_breaker_opens_after_consecutive_failures_and_probes_after_cooldown():
+    breaker = CircuitBreaker("ollama", failure_threshold=2, cooldown=0.0, probes=1)
+    for _ in range(2):
+        breaker.record(False, breaker.acquire())
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    probe = breaker.acquire()
+    assert probe
+    with pytest.raises(CircuitOpenError):
+        breaker.acquire()
+    breaker.record(True, probe)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.opened == 1
+
+
+def test_failed_probe_reopens():
+    breaker = CircuitBreaker("ollama", failure_threshold=1, cooldown=60, probes=1)
+    breaker.record(False, breaker.acquire())
+    with pytest.raises(CircuitOpenError):
+        breaker.acquire()
+    breaker._opened_at -= 60
+    breaker.record(False, breaker.acquire())
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.rejected == 1
+
+
+def test_cancelled_probe_frees_its_slot():
+    breaker = CircuitBreaker("ollama", failure_threshold=1, cooldown=0.0, probes=1)
+    breaker.record(False, breaker.acquire())
+    probe = breaker.acquire()
+    breaker.release(probe)
+    assert breaker.acquire()
+
+
+@pytest.mark.asyncio
+async def test_open_breaker_fails_fast_without_calling_upstream():
+    inner = FlakyTransport()
+    registry = BreakerRegistry(failure_threshold=2, cooldown=60, probes=1)
+    async with httpx.AsyncClient(transport=registry.layer("ollama", inner)) as client:
+        for _ in range(2):
+            with pytest.raises(httpx.ConnectError):
+                await client.get("http://ollama/api/tags")
+        with pytest.raises(CircuitOpenError):
+            await client.get("http://ollama/api/tags")
+    assert inner.calls == 2
+    assert registry.stats()["ollama"]["state"] == "open"
+
+
+@pytest.mark.asyncio
+async def test_hedger_starts_alternate_when_primary_is_slow():
+    hedger = Hedger(min_delay=0.01)
+
+    async def slow():
+        await asyncio.sleep(1)
+        return "primary"
+
+    async def fast():
+        return "alternate"
+
+    assert await hedger.run(slow, fast, delay=0.01) == (True, "alternate")
+    assert hedger.hedged == 1
+
+
+@pytest.mark.asyncio
+async def test_hedger_fails_over_and_raises_when_both_fail():
+    hedger = Hedger(min_delay=0.01)
+
+    async def broken():
+        raise httpx.ConnectError("down")
+
+    async def fine():
+        return "alternate"
+
+    assert await hedger.run(broken, fine, delay=None) == (True, "alternate")
+    assert hedger.failovers == 1
+    with pytest.raises(httpx.ConnectError):
+        await hedger.run(broken, broken, delay=None)
+
+
+@pytest.mark.asyncio
+async def test_hedger_without_history_waits_for_primary():
+    hedger = Hedger(min_delay=0.01)
+    started = []
+
+    async def primary():
+        await asyncio.sleep(0.05)
+        return "primary"
+
+    async def alternate():
+        started.append(True)
+        return "alternate"
+
+    assert await hedger.run(primary, alternate, delay=None) == (False, "primary")
+    assert not started
@@ -0,0 +1,75 @@
+import pytest
+
+from rlm_core.router import MIN_SAMPLES, RouteTarget, SmartRouter, Telemetry
+from rlm_core.scheduler import ModelScheduler
+
+
+def router(prefer="cloud", quality_enabled=True, budget=0.0, window=60.0) -> SmartRouter:
+    return SmartRouter(
+        local=RouteTarget("local", "ollama", "phi3", True),
+        cloud=RouteTarget("cloud", "cloud", "gpt-4o-mini", True, 0.15, 0.60),
+        quality=RouteTarget("quality", "cloud", "gpt-4o", quality_enabled, 5.0, 15.0),
+        scheduler=ModelScheduler(window=0, max_queue=10, concurrency={}, default_concurrency=1),
+        prefer=prefer,
+        slo=1.0,
+        hourly_budget=budget,
+        window=window,
+        max_error_rate=0.5,
+    )
+
+
+def test_latency_needs_minimum_samples_and_uses_lower_rank():
+    telemetry = Telemetry(60)
+    for latency in range(MIN_SAMPLES - 1):
+        telemetry.record(0.1, True)
+    assert telemetry.latency(95) is None
+    telemetry.record(10.0, True)
+    assert telemetry.latency(95) == 0.1
+
+
+def test_latency_ignores_samples_outside_the_window():
+    telemetry = Telemetry(60)
+    for _ in range(MIN_SAMPLES):
+        telemetry.record(5.0, True)
+    telemetry.window = 0
+    assert telemetry.latency(50) is None
+
+
+def test_disabled_quality_target_is_not_returned():
+    decision = router(quality_enabled=False).decide(100, "HIGH", "generation")
+    assert decision.target.name == "cloud"
+    decision = router().decide(100, require_high_quality=True)
+    assert decision.target.name == "quality"
+
+
+def test_spills_when_preferred_target_breaks_the_slo():
+    r = router()
+    for _ in range(MIN_SAMPLES):
+        r.record(r.targets["cloud"], 3.0, True)
+    decision = r.decide(100)
+    assert decision.use_local
+    assert r.spills == 1
+
+
+def test_spills_when_preferred_target_is_failing():
+    r = router()
+    for _ in range(MIN_SAMPLES):
+        r.record(r.targets["cloud"], 0.1, False)
+    assert r.decide(100).use_local
+    assert r.alternate(r.targets["local"]) is None
+
+
+def test_spent_budget_keeps_calls_local():
+    r = router(budget=0.01)
+    r.record(r.targets["cloud"], 0.1, True, tokens=100_000, input_tokens=0)
+    assert r.over_budget()
+    assert r.decide(100).use_local
+    assert r.alternate(r.targets["local"]) is None
+
+
+def test_no_enabled_target_raises():
+    r = router()
+    for target in r.targets.values():
+        target.enabled = False
+    with pytest.raises(RuntimeError):
+        r.decide(100)
@@ -0,0 +1,113 @@
+import asyncio
+
+import pytest
+
+from rlm_core.scheduler import ModelScheduler, SchedulerSaturated, priority_for
+
+
+def test_background_work_yields_to_interactive_work():
+    assert priority_for("LOW") < priority_for("MEDIUM") < priority_for("HIGH")
+    assert priority_for("HIGH") < priority_for("LOW", background=True)
+
+
+@pytest.mark.asyncio
+async def test_burst_is_served_by_priority():
+    scheduler = ModelScheduler(window=0.02, max_queue=10, concurrency={}, default_concurrency=1)
+    order = []
+
+    async def call(priority):
+        async with scheduler.slot("ollama", "model", priority):
+            order.append(priority)
+            await asyncio.sleep(0)
+
+    await asyncio.gather(*[call(p) for p in (12, 2, 0, 1)])
+    assert order == [0, 1, 2, 12]
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_bounded_per_lane():
+    scheduler = ModelScheduler(window=0, max_queue=10, concurrency={"ollama": 2}, default_concurrency=8)
+    running = peak = 0
+
+    async def call():
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+
+    await asyncio.gather(*[scheduler.submit("ollama", "model", 1, call) for _ in range(6)])
+    assert peak == 2
+    assert scheduler.stats()["ollama:model"]["dispatched"] == 6
+
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects_instead_of_waiting():
+    scheduler = ModelScheduler(window=0, max_queue=1, concurrency={}, default_concurrency=1)
+    gate = asyncio.Event()
+
+    async def hold():
+        await gate.wait()
+
+    holder = asyncio.create_task(scheduler.submit("cloud", "model", 1, hold))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(scheduler.submit("cloud", "model", 1, hold))
+    await asyncio.sleep(0)
+    with pytest.raises(SchedulerSaturated):
+        await scheduler.submit("cloud", "model", 1, hold)
+    assert scheduler.queue_depth("cloud") == 1
+
+    gate.set()
+    await asyncio.gather(holder, waiter)
+    assert scheduler.stats()["cloud:model"]["rejected"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_leak_a_slot():
+    scheduler = ModelScheduler(window=0, max_queue=10, concurrency={}, default_concurrency=1)
+    gate = asyncio.Event()
+
+    async def hold():
+        await gate.wait()
+
+    holder = asyncio.create_task(scheduler.submit("cloud", "model", 1, hold))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(scheduler.submit("cloud", "model", 1, hold))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    gate.set()
+    await holder
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    lane = scheduler.lane("cloud", "model")
+    assert lane.active == 0
+    assert await asyncio.wait_for(scheduler.submit("cloud", "model", 1, hold), 1) is None
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiters_do_not_count_against_the_queue():
+    scheduler = ModelScheduler(window=0, max_queue=3, concurrency={}, default_concurrency=1)
+    gate = asyncio.Event()
+
+    async def hold():
+        await gate.wait()
+
+    holder = asyncio.create_task(scheduler.submit("cloud", "model", 1, hold))
+    await asyncio.sleep(0)
+    abandoned = [asyncio.create_task(scheduler.submit("cloud", "model", 1, hold)) for _ in range(3)]
+    await asyncio.sleep(0)
+    for task in abandoned:
+        task.cancel()
+    await asyncio.gather(*abandoned, return_exceptions=True)
+    assert scheduler.queue_depth("cloud") == 0
+
+    # The lane is still busy: new waiters must queue, not be rejected
+    waiters = [asyncio.create_task(scheduler.submit("cloud", "model", 1, hold)) for _ in range(3)]
+    await asyncio.sleep(0)
+    assert all(not task.done() for task in waiters)
+    assert scheduler.queue_depth("cloud") == 3
+
+    gate.set()
+    await asyncio.gather(holder, *waiters)
+    assert scheduler.stats()["cloud:model"]["rejected"] == 0
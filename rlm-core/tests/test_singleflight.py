@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+from rlm_core.singleflight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "result"
+
+    results = await asyncio.gather(*[flight.do("key", work) for _ in range(5)])
+    assert results == ["result"] * 5
+    assert calls == 1
+    assert flight.leaders == 1
+    assert flight.coalesced == 4
+    assert len(flight) == 0
+
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_caller():
+    flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    results = await asyncio.gather(*[flight.do("key", work) for _ in range(3)], return_exceptions=True)
+    assert all(isinstance(r, ValueError) for r in results)
+    assert "key" not in flight
+
+
+@pytest.mark.asyncio
+async def test_work_survives_until_the_last_caller_leaves():
+    flight = SingleFlight()
+    started = asyncio.Event()
+    cancelled = asyncio.Event()
+
+    async def work():
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    first = asyncio.create_task(flight.do("key", work))
+    second = asyncio.create_task(flight.do("key", work))
+    await started.wait()
+
+    first.cancel()
+    await asyncio.sleep(0)
+    assert not cancelled.is_set()
+
+    second.cancel()
+    await asyncio.wait_for(cancelled.wait(), 1)
+
+
+@pytest.mark.asyncio
+async def test_do_many_batches_new_keys_and_joins_in_flight_ones():
+    flight = SingleFlight()
+    batches = []
+
+    async def single():
+        await asyncio.sleep(0.01)
+        return "a!"
+
+    async def batch(keys):
+        batches.append(keys)
+        await asyncio.sleep(0.01)
+        return [f"{k}!" for k in keys]
+
+    leader = asyncio.create_task(flight.do("a", single))
+    await asyncio.sleep(0)
+    results = await flight.do_many(["a", "b", "c", "b"], batch)
+    assert results == ["a!", "b!", "c!", "b!"]
+    assert batches == [["b", "c"]]
+    assert await leader == "a!"
@@ -0,0 +1,83 @@
+import asyncio
+import time
+
+import pytest
+
+from rlm_core.streaming import bicameral_frames
+
+
+async def tokens_from(items, delay=0.0):
+    for item in items:
+        if delay:
+            await asyncio.sleep(delay)
+        yield item
+
+
+async def verdict_after(delay, value="OK"):
+    await asyncio.sleep(delay)
+    return value
+
+
+async def collect(frames):
+    return [frame async for frame in frames]
+
+
+@pytest.mark.asyncio
+async def test_first_token_is_not_held_for_the_flush_interval():
+    async def slow_tail():
+        yield "first"
+        await asyncio.sleep(1)
+        yield "second"
+
+    frames = bicameral_frames(slow_tail(), verdict_after(2), flush_interval=0.5, max_frame=512)
+    started = time.monotonic()
+    first = await frames.__anext__()
+    assert first == "A:first\n"
+    assert time.monotonic() - started < 0.1
+    await frames.aclose()
+
+
+@pytest.mark.asyncio
+async def test_later_tokens_are_coalesced():
+    frames = await collect(bicameral_frames(
+        tokens_from(["a", "b", "c", "d"]), verdict_after(0.05), flush_interval=0.02, max_frame=512
+    ))
+    assert frames[0] == "A:a\n"
+    assert frames[1] == "A:bcd\n"
+    assert frames[-1] == "B:OK\n"
+
+
+@pytest.mark.asyncio
+async def test_frames_are_capped_in_size():
+    frames = await collect(bicameral_frames(
+        tokens_from(["x"] * 7), verdict_after(0.05), flush_interval=1, max_frame=3
+    ))
+    a_frames = [f for f in frames if f.startswith("A:")]
+    assert a_frames == ["A:x\n", "A:xxx\n", "A:xxx\n"]
+
+
+@pytest.mark.asyncio
+async def test_verdict_is_sent_while_the_generator_stalls():
+    async def stalled():
+        yield "a"
+        await asyncio.sleep(10)
+        yield "b"
+
+    frames = bicameral_frames(stalled(), verdict_after(0.01, "FAIL"), flush_interval=0.01, max_frame=512)
+    assert await frames.__anext__() == "A:a\n"
+    assert await asyncio.wait_for(frames.__anext__(), 1) == "B:FAIL\n"
+    await frames.aclose()
+
+
+@pytest.mark.asyncio
+async def test_generator_error_is_raised_after_pending_text():
+    async def failing():
+        yield "a"
+        yield "b"
+        raise RuntimeError("model crashed")
+
+    seen = []
+    with pytest.raises(RuntimeError):
+        async for frame in bicameral_frames(failing(), verdict_after(1), flush_interval=1, max_frame=512):
+            seen.append(frame)
+    assert seen == ["A:a\n", "A:b\n"]
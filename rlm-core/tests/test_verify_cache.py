@@ -0,0 +1,59 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from rlm_core import main
+from rlm_core.cache import MemoryBackend, VerificationCache
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(main, "verification_cache", VerificationCache(MemoryBackend(100, 1 << 20), main.VerificationResponse))
+    monkeypatch.setattr(main, "semantic_cache", None)
+    decisions = []
+    monkeypatch.setattr(main.smart_router, "decide", lambda *args, **kwargs: decisions.append(args))
+    main.app.dependency_overrides[main.verify_jwt] = lambda: None
+    try:
+        yield TestClient(main.app), decisions
+    finally:
+        main.app.dependency_overrides.clear()
+
+
+async def store(req: main.VerificationRequest, model: str):
+    await main.verification_cache.set(
+        main.VerificationPrompt(req).cache_key,
+        main.VerificationResponse(consistent=False, confidence=0.9, reasoning="paid", model_used=model, cost_usd=0.01),
+    )
+
+
+@pytest.mark.asyncio
+async def test_cached_verdict_is_served_without_routing(client):
+    http, decisions = client
+    req = main.VerificationRequest(claim="the sky is green", pin_nodes=[{"content": "the sky is blue"}])
+    await store(req, "gpt-4o-mini")
+
+    response = http.post("/verify", json=req.model_dump())
+    assert response.status_code == 200
+    assert response.json()["model_used"] == "gpt-4o-mini (Cached)"
+    assert decisions == []
+
+
+@pytest.mark.asyncio
+async def test_cached_batch_items_are_not_routed(client):
+    http, decisions = client
+    batch = main.BatchVerificationRequest(claims=[{"claim": "a"}, {"claim": "b"}])
+    for req in batch.requests():
+        await store(req, "phi3")
+
+    response = http.post("/verify/batch", json=batch.model_dump())
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(line["index"] for line in lines) == [0, 1]
+    assert all(line["result"]["model_used"] == "phi3 (Cached)" for line in lines)
+    assert decisions == []
+
+
+def test_cache_key_does_not_depend_on_the_route_target():
+    req = main.VerificationRequest(claim="  the sky   is green ", pin_nodes=[{"content": "b"}, {"content": "a"}])
+    same = main.VerificationRequest(claim="the sky is green", pin_nodes=[{"content": "a"}, {"content": "b"}])
+    assert main.VerificationPrompt(req).cache_key == main.VerificationPrompt(same).cache_key
@@ -1,87 +1,141 @@
 import { NextResponse } from 'next/server';
+import { z } from 'zod';
 import { createClient } from '../../../../lib/supabase-server';
 
-export async function POST(req: Request) {
-    try {
-        const body = await req.json();
-        const { node_id, project_id, audit } = body;
+// One Devil's Advocate audit as posted by RLM Core
+const AuditResultPayloadSchema = z.object({
+    node_id: z.string().min(1),
+    project_id: z.string().min(1),
+    audit: z.object({
+        sycophancy_score: z.number(),
+        thesis: z.string().optional(),
+        antithesis: z.string(),
+        audited_at: z.string().optional(),
+        model_auditor: z.string().optional()
+    }).passthrough()
+});
 
-        if (!node_id || !project_id || !audit) {
-            return NextResponse.json({ error: 'Invalid payload' }, { status: 400 });
-        }
+type AuditResultPayload = z.infer<typeof AuditResultPayloadSchema>;
+type SupabaseServerClient = Awaited<ReturnType<typeof createClient>>;
+type AuditResult = { node_id?: string; status: number; error?: string; success?: boolean; healed?: boolean };
 
-        const supabase = await createClient();
+async function applyAudit(supabase: SupabaseServerClient, payload: AuditResultPayload): Promise<AuditResult> {
+    const { node_id, project_id, audit } = payload;
 
-        // 1. Fetch current node for metadata reference
-        const { data: node, error: fetchError } = await supabase
-            .from('work_nodes')
-            .select('metadata')
-            .eq('id', node_id)
-            .single();
+    // 1. Fetch current node for metadata reference
+    const { data: node, error: fetchError } = await supabase
+        .from('work_nodes')
+        .select('metadata')
+        .eq('id', node_id)
+        .single();
 
-        if (fetchError || !node) {
-            console.error('[AuditThreshold] Node not found:', node_id);
-            return NextResponse.json({ error: 'Node not found' }, { status: 404 });
-        }
+    if (fetchError || !node) {
+        console.error('[AuditThreshold] Node not found:', node_id);
+        return { node_id, status: 404, error: 'Node not found' };
+    }
+
+    // 2. Fusion audit into original node metadata
+    const updatedMetadata = {
+        ...node.metadata,
+        audit: audit,
+        updated_at: new Date().toISOString()
+    };
 
-        // 2. Fusion audit into original node metadata
-        const updatedMetadata = {
-            ...node.metadata,
-            audit: audit,
-            updated_at: new Date().toISOString()
-        };
+    await supabase
+        .from('work_nodes')
+        .update({ metadata: updatedMetadata })
+        .eq('id', node_id);
 
-        await supabase
+    // 3. GOD MODE: Active Self-Healing
+    // If the sycophancy_score is critical (> 0.85), automatically create a correction
+    let healed = false;
+    if (audit.sycophancy_score > 0.85) {
+        console.log(`[AuditShadow] CRITICAL SYCOPHANCY DETECTED (${audit.sycophancy_score}). Triggering Self-Healing...`);
+
+        // I. Insert Correction Node
+        const { data: correctionNode, error: nodeError } = await supabase
             .from('work_nodes')
-            .update({ metadata: updatedMetadata })
-            .eq('id', node_id);
-
-        // 3. GOD MODE: Active Self-Healing
-        // If the sycophancy_score is critical (> 0.85), automatically create a correction
-        let healed = false;
-        if (audit.sycophancy_score > 0.85) {
-            console.log(`[AuditShadow] CRITICAL SYCOPHANCY DETECTED (${audit.sycophancy_score}). Triggering Self-Healing...`);
-
-            // I. Insert Correction Node
-            const { data: correctionNode, error: nodeError } = await supabase
-                .from('work_nodes')
+            .insert({
+                project_id,
+                type: 'evidence', // Axiomatic Green in UI
+                content: {
+                    content: `⚠️ AUTO-CORRECCIÓN: ${audit.antithesis}`,
+                    rationale: 'Generado automáticamente por el protocolo Abogado del Diablo tras detectar complacencia crítica.'
+                },
+                origin: 'ai_generated',
+                confidence: 1.0,
+                metadata: {
+                    system_auto_heal: true,
+                    refers_to: node_id,
+                    audit_source: audit.model_auditor,
+                    pin: true
+                }
+            })
+            .select()
+            .single();
+
+        if (correctionNode && !nodeError) {
+            // II. Insert Contradicts Edge (Triggers physical tension)
+            await supabase
+                .from('work_edges')
                 .insert({
                     project_id,
-                    type: 'evidence', // Axiomatic Green in UI
-                    content: {
-                        content: `⚠️ AUTO-CORRECCIÓN: ${audit.antithesis}`,
-                        rationale: 'Generado automáticamente por el protocolo Abogado del Diablo tras detectar complacencia crítica.'
-                    },
-                    origin: 'ai_generated',
-                    confidence: 1.0,
-                    metadata: {
-                        system_auto_heal: true,
-                        refers_to: node_id,
-                        audit_source: audit.model_auditor,
-                        pin: true
-                    }
-                })
-                .select()
-                .single();
-
-            if (correctionNode && !nodeError) {
-                // II. Insert Contradicts Edge (Triggers physical tension)
-                await supabase
-                    .from('work_edges')
-                    .insert({
-                        project_id,
-                        source_node_id: correctionNode.id,
-                        target_node_id: node_id,
-                        relation: 'contradicts',
-                        metadata: { automated_correction: true }
-                    });
-
-                healed = true;
-                console.log(`[AuditShadow] Self-Healing complete for node ${node_id}. Correction: ${correctionNode.id}`);
+                    source_node_id: correctionNode.id,
+                    target_node_id: node_id,
+                    relation: 'contradicts',
+                    metadata: { automated_correction: true }
+                });
+
+            healed = true;
+            console.log(`[AuditShadow] Self-Healing complete for node ${node_id}. Correction: ${correctionNode.id}`);
+        }
+    }
+
+    return { node_id, status: 200, success: true, healed };
+}
+
+async function applyBatchItem(supabase: SupabaseServerClient, item: unknown): Promise<AuditResult> {
+    const parsed = AuditResultPayloadSchema.safeParse(item);
+    if (!parsed.success) {
+        return { status: 400, error: 'Invalid payload' };
+    }
+    try {
+        return await applyAudit(supabase, parsed.data);
+    } catch (err) {
+        console.error('[AuditWebhook] Audit failed for node:', parsed.data.node_id, err);
+        return { node_id: parsed.data.node_id, status: 500, error: 'Internal Server Error' };
+    }
+}
+
+export async function POST(req: Request) {
+    try {
+        const body: unknown = await req.json();
+        const supabase = await createClient();
+
+        // RLM Core delivers audits in batches (a JSON array); a single object is still accepted
+        if (Array.isArray(body)) {
+            const results: AuditResult[] = [];
+            for (const item of body) {
+                results.push(await applyBatchItem(supabase, item));
             }
+            // Always 200 with per-item results: a retried batch would re-insert the
+            // correction nodes of the items that already succeeded
+            return NextResponse.json({
+                success: results.every(r => r.status === 200),
+                healed: results.filter(r => r.healed).length,
+                results
+            });
         }
 
-        return NextResponse.json({ success: true, healed });
+        const parsed = AuditResultPayloadSchema.safeParse(body);
+        if (!parsed.success) {
+            return NextResponse.json({ error: 'Invalid payload' }, { status: 400 });
+        }
+        const { status, error, success, healed } = await applyAudit(supabase, parsed.data);
+        if (error) {
+            return NextResponse.json({ error }, { status });
+        }
+        return NextResponse.json({ success, healed });
 
     } catch (err) {
         console.error('[AuditWebhook] Critical Error:', err);